@@ -0,0 +1,313 @@
+"""
+Stand-in for Journiv and Immich serving a synthetic, deterministic dataset.
+
+Implements the endpoints used by JournivClient and ImmichClient, with
+optional injected latency and errors, and counts calls per endpoint so a
+benchmark can report upstream traffic.
+
+    python -m bench.fake_upstream --entries 2000 --latency-ms 20 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+
+JOURNAL_ID = "bench-journal"
+USER_ID = "bench-user"
+OWNER_ID = "00000000-0000-4000-8000-000000000001"
+
+WORDS = (
+    "morning coffee walk park rain sun river mountain friend family dinner book music "
+    "work meeting code train city museum garden beach sunset bike run tired happy calm "
+    "market bread letter photo trip airport hotel lake forest snow spring autumn summer"
+).split()
+MOODS = [("happy", "😊", "positive"), ("calm", "😌", "positive"), ("tired", "😴", "neutral"), ("sad", "😢", "negative")]
+
+
+def _timestamp(day: date, hour: int = 12) -> str:
+    return f"{day.isoformat()}T{hour:02d}:00:00"
+
+
+def _jwt(claims: dict) -> str:
+    def encode(part: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.bench"
+
+
+@dataclass
+class Dataset:
+    """Synthetic journal: roughly one entry per day going back from `end`"""
+    entries: int = 1000
+    tags: int = 30
+    max_assets_per_day: int = 8
+    seed: int = 42
+    end: date = field(default_factory=lambda: date(2025, 6, 30))
+
+    def __post_init__(self):
+        rng = random.Random(self.seed)
+        created = datetime(2020, 1, 1)
+        self.tag_list = [
+            {
+                "id": f"tag-{i:03d}", "name": f"Tag {i}", "user_id": USER_ID, "usage_count": 0,
+                "created_at": created.isoformat(), "updated_at": created.isoformat(),
+            }
+            for i in range(self.tags)
+        ]
+        self.moods = [
+            {"id": f"mood-{name}", "name": name, "icon": icon, "category": category,
+             "created_at": created.isoformat(), "updated_at": created.isoformat()}
+            for name, icon, category in MOODS
+        ]
+
+        self.entry_list: List[dict] = []
+        self.mood_logs: List[dict] = []
+        self.entry_tags: Dict[str, List[dict]] = {}
+        day = self.end
+        for i in range(self.entries):
+            # About one day in eight gets a second entry
+            if i and rng.random() > 0.12:
+                day -= timedelta(days=1)
+            words = rng.choices(WORDS, k=rng.randint(20, 200))
+            entry_id = f"entry-{i:06d}"
+            self.entry_list.append({
+                "id": entry_id,
+                "title": " ".join(rng.choices(WORDS, k=3)).capitalize(),
+                "content": " ".join(words),
+                "entry_date": day.isoformat(),
+                "journal_id": JOURNAL_ID,
+                "location": None,
+                "weather": None,
+                "prompt_id": None,
+                "word_count": len(words),
+                "is_pinned": False,
+                "created_at": _timestamp(day, 21),
+                "updated_at": _timestamp(day, 22),
+            })
+            if rng.random() < 0.7:
+                mood = rng.choice(self.moods)
+                self.mood_logs.append({
+                    "id": f"mood-log-{i:06d}", "mood_id": mood["id"], "note": None, "entry_id": entry_id,
+                    "user_id": USER_ID, "created_at": _timestamp(day, 21), "logged_date": day.isoformat(),
+                    "mood": mood, "entry_date": day.isoformat(),
+                })
+            self.entry_tags[entry_id] = rng.sample(self.tag_list, rng.randint(0, 3))
+
+        self.entry_list.sort(key=lambda entry: (entry["entry_date"], entry["id"]), reverse=True)
+        self.entries_by_id = {entry["id"]: entry for entry in self.entry_list}
+
+    @property
+    def dates(self) -> List[str]:
+        return sorted({entry["entry_date"] for entry in self.entry_list})
+
+    def assets_for_day(self, day: date) -> List[dict]:
+        digest = hashlib.sha256(f"{self.seed}:{day.isoformat()}".encode()).digest()
+        count = digest[0] % (self.max_assets_per_day + 1)
+        assets = []
+        for k in range(count):
+            asset_id = str(uuid.UUID(bytes=hashlib.md5(f"{self.seed}:{day}:{k}".encode()).digest(), version=4))
+            taken = f"{day.isoformat()}T{8 + k:02d}:30:00.000Z"
+            assets.append({
+                "id": asset_id, "deviceAssetId": f"IMG_{day:%Y%m%d}_{k}", "ownerId": OWNER_ID,
+                "deviceId": "bench-phone", "type": "IMAGE", "originalPath": f"/photos/{day}/{k}.jpg",
+                "originalFileName": f"IMG_{day:%Y%m%d}_{k}.jpg", "resized": True, "thumbhash": None,
+                "fileCreatedAt": taken, "fileModifiedAt": taken, "localDateTime": taken, "updatedAt": taken,
+                "isFavorite": k == 0, "isArchived": False, "duration": "0:00:00.00000",
+                "exifInfo": {"make": "Bench", "model": "Phone", "city": "Rome", "country": "Italy",
+                             "exifImageWidth": 4032, "exifImageHeight": 3024},
+                "livePhotoVideoId": None, "tags": [], "people": [],
+                "checksum": base64.b64encode(hashlib.sha1(asset_id.encode()).digest()).decode(),
+            })
+        return assets
+
+
+@dataclass
+class Faults:
+    """Latency and errors injected into every upstream call"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    token_ttl: float = 3600.0
+
+
+def _page(items: list, limit: int, offset: int) -> list:
+    return items[offset:offset + limit]
+
+
+def create_app(dataset: Optional[Dataset] = None, faults: Optional[Faults] = None) -> FastAPI:
+    dataset = dataset or Dataset()
+    faults = faults or Faults()
+    calls: Counter = Counter()
+
+    async def inject_faults(request: Request):
+        if request.url.path.startswith("/__"):
+            return
+        if faults.latency_ms or faults.jitter_ms:
+            await asyncio.sleep((faults.latency_ms + random.uniform(0, faults.jitter_ms)) / 1000)
+        if faults.error_rate and random.random() < faults.error_rate:
+            raise HTTPException(status_code=faults.error_status, detail="Injected failure")
+
+    app = FastAPI(title="Fake Journiv/Immich", dependencies=[Depends(inject_faults)])
+    app.state.dataset = dataset
+    app.state.faults = faults
+    app.state.calls = calls
+
+    @app.middleware("http")
+    async def count_calls(request: Request, call_next):
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if not request.url.path.startswith("/__"):
+            calls[f"{request.method} {getattr(route, 'path', 'unmatched')}"] += 1
+        return response
+
+    def check_token(authorization: Optional[str]) -> None:
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(authorization.split(".")[1] + "=="))
+        except Exception:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        if claims["exp"] < time.time():
+            raise HTTPException(status_code=401, detail="Token expired")
+
+    def tokens() -> dict:
+        now = time.time()
+        return {
+            "access_token": _jwt({"sub": USER_ID, "exp": now + faults.token_ttl}),
+            "refresh_token": _jwt({"sub": USER_ID, "exp": now + 30 * 86400, "type": "refresh"}),
+            "token_type": "bearer",
+        }
+
+    # Journiv #################################################################
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        return tokens()
+
+    @app.post("/api/v1/auth/refresh")
+    async def refresh():
+        return tokens()
+
+    @app.get("/api/v1/entries/journal/{journal_id}")
+    async def journal_entries(journal_id: str, limit: int = 50, offset: int = 0, authorization: str = Header(None)):
+        check_token(authorization)
+        entries = dataset.entry_list if journal_id == JOURNAL_ID else []
+        return _page(entries, min(limit, 100), offset)
+
+    @app.get("/api/v1/entries/date-range")
+    async def entries_by_date_range(start_date: str, end_date: str, authorization: str = Header(None)):
+        check_token(authorization)
+        return [entry for entry in dataset.entry_list if start_date <= entry["entry_date"] <= end_date]
+
+    @app.get("/api/v1/moods/logs")
+    async def mood_logs(
+        entry_id: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+        limit: int = 50, offset: int = 0, authorization: str = Header(None),
+    ):
+        check_token(authorization)
+        logs = [
+            log for log in dataset.mood_logs
+            if (entry_id is None or log["entry_id"] == entry_id)
+            and (start_date is None or log["logged_date"] >= start_date)
+            and (end_date is None or log["logged_date"] <= end_date)
+        ]
+        return _page(logs, min(limit, 100), offset)
+
+    @app.get("/api/v1/tags/")
+    async def tags(limit: int = 50, offset: int = 0, search: Optional[str] = None, authorization: str = Header(None)):
+        check_token(authorization)
+        found = [tag for tag in dataset.tag_list if not search or search.lower() in tag["name"].lower()]
+        return _page(found, min(limit, 100), offset)
+
+    @app.get("/api/v1/tags/entry/{entry_id}")
+    async def entry_tags(entry_id: str, authorization: str = Header(None)):
+        check_token(authorization)
+        return dataset.entry_tags.get(entry_id, [])
+
+    @app.post("/api/v1/tags/entry/{entry_id}/tag/{tag_id}", status_code=201)
+    async def add_entry_tag(entry_id: str, tag_id: str, authorization: str = Header(None)):
+        check_token(authorization)
+        now = datetime.now(timezone.utc).isoformat()
+        return {"entry_id": entry_id, "tag_id": tag_id, "created_at": now, "updated_at": now}
+
+    # Immich ##################################################################
+
+    @app.post("/api/search/metadata")
+    async def search_metadata(request: Request):
+        body = await request.json()
+        after = datetime.fromisoformat(body.get("takenAfter", "1970-01-01T00:00:00Z").replace("Z", "+00:00"))
+        before = datetime.fromisoformat(body.get("takenBefore", "2100-01-01T00:00:00Z").replace("Z", "+00:00"))
+        first, last = max(after.date(), dataset.end - timedelta(days=dataset.entries * 2)), min(before.date(), dataset.end)
+        items = []
+        day = first
+        while day <= last:
+            items.extend(dataset.assets_for_day(day))
+            day += timedelta(days=1)
+        if body.get("order", "desc") == "desc":
+            items.reverse()
+        page, size = int(body.get("page") or 1), int(body.get("size") or 250)
+        chunk = items[(page - 1) * size:page * size]
+        return {
+            "albums": {"total": 0, "count": 0, "items": [], "facets": [], "nextPage": None},
+            "assets": {
+                "total": len(items), "count": len(chunk), "items": chunk, "facets": [],
+                "nextPage": str(page + 1) if page * size < len(items) else None,
+            },
+        }
+
+    @app.get("/api/assets/{asset_id}")
+    async def asset_info(asset_id: str):
+        return {"id": asset_id, "checksum": base64.b64encode(hashlib.sha1(asset_id.encode()).digest()).decode()}
+
+    @app.get("/api/assets/{asset_id}/thumbnail")
+    async def thumbnail(asset_id: str, size: str = "thumbnail"):
+        length = 20_000 if size == "thumbnail" else 200_000
+        body = (hashlib.sha256(asset_id.encode()).digest() * (length // 32 + 1))[:length]
+        # Like Immich's defaults: WebP thumbnails, JPEG previews
+        return Response(body, media_type="image/webp" if size == "thumbnail" else "image/jpeg")
+
+    # Benchmark control #######################################################
+
+    @app.get("/__stats")
+    async def stats():
+        return dict(sorted(calls.items()))
+
+    @app.post("/__reset")
+    async def reset():
+        calls.clear()
+        return {}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(
+        Dataset(entries=args.entries, seed=args.seed),
+        Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status),
+    )
+    print(f"Journal id: {JOURNAL_ID}; point JOURNIV_URL and IMMICH_URL at http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Load test of the API against the fake upstream in bench/fake_upstream.py.
+
+By default both run in this process: the fake upstream is served by
+uvicorn on a free local port (so the real HTTP clients, pools and retries
+are exercised) and the API is driven through its ASGI interface. With
+--target, an already running API is load-tested instead; pass
+--upstream-url too if it talks to a fake upstream, to get call counts.
+
+For every scenario it reports throughput, latency percentiles, status
+codes and upstream calls per endpoint, and writes everything to a JSON
+file that can be compared against an earlier run with --baseline.
+
+    python -m bench.load_test --entries 2000 --latency-ms 20 --requests 300
+    python -m bench.load_test --baseline bench/results/<earlier>.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.fake_upstream import JOURNAL_ID, Dataset, Faults, create_app
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# (method, path, JSON body) for one request
+Request = Tuple[str, str, Optional[dict]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    make_request: Callable[[random.Random], Request]
+
+
+def build_scenarios(dataset: Dataset, page_size: int) -> List[Scenario]:
+    pages = max(1, dataset.entries // page_size)
+    dates = dataset.dates
+
+    def random_day(rng: random.Random) -> date:
+        return date.fromisoformat(rng.choice(dates))
+
+    def thumbnail(rng: random.Random) -> Request:
+        for _ in range(20):
+            assets = dataset.assets_for_day(random_day(rng))
+            if assets:
+                asset = rng.choice(assets)
+                return "GET", f"/api/immich/assets/{asset['id']}/thumbnail?checksum={asset['checksum']}", None
+        return "GET", "/api/immich/cache/stats", None
+
+    def date_range(rng: random.Random) -> Request:
+        start = random_day(rng)
+        return "POST", "/api/immich/search/assets/dates", {
+            "startDate": start.isoformat(), "endDate": (start + timedelta(days=29)).isoformat(), "withExif": False,
+        }
+
+    return [
+        Scenario("journal_page", lambda rng: (
+            "GET", f"/api/journal-entries/paginated?journal_id={JOURNAL_ID}&page={rng.randint(1, pages)}&limit={page_size}", None,
+        )),
+        Scenario("journal_page_annotated", lambda rng: (
+            "GET", f"/api/journal-entries/paginated?journal_id={JOURNAL_ID}&page={rng.randint(1, pages)}&limit={page_size}&annotate=true", None,
+        )),
+        Scenario("blog_posts", lambda rng: (
+            "GET", f"/api/blog-posts?journal_id={JOURNAL_ID}&page={rng.randint(1, pages)}&limit={page_size}", None,
+        )),
+        Scenario("journal_all", lambda rng: ("GET", "/api/journal-entries", None)),
+        Scenario("journal_export", lambda rng: ("GET", f"/api/journal-entries/export?journal_id={JOURNAL_ID}", None)),
+        Scenario("immich_day", lambda rng: ("POST", f"/api/immich/search/assets/date/{random_day(rng)}", None)),
+        Scenario("immich_date_range", date_range),
+        Scenario("immich_thumbnail", thumbnail),
+    ]
+
+
+def percentile(ordered: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    upstream: Optional[httpx.AsyncClient],
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int,
+) -> dict:
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        method, path, body = scenario.make_request(rng)
+        await client.request(method, path, json=body)
+
+    if upstream is not None:
+        await upstream.post("/__reset")
+
+    plan = [scenario.make_request(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    response_bytes = 0
+    queue = iter(plan)
+
+    async def worker():
+        nonlocal response_bytes
+        for method, path, body in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                statuses[str(response.status_code)] += 1
+                response_bytes += len(response.content)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    upstream_calls: Dict[str, int] = {}
+    if upstream is not None:
+        upstream_calls = (await upstream.get("/__stats")).json()
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None  # noqa: E731
+    total_upstream = sum(upstream_calls.values())
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "statuses": dict(statuses),
+        "mean_response_bytes": round(response_bytes / len(latencies)) if latencies else None,
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_request": round(total_upstream / len(latencies), 2) if latencies else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_upstream(dataset: Dataset, faults: Faults) -> Tuple[str, Callable[[], None]]:
+    """Serve the fake upstream from a background thread; returns its URL and a stop function"""
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(dataset, faults), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def configure_app_env(upstream_url: str, args: argparse.Namespace, workdir: str) -> None:
+    """Point the API at the fake upstream; must run before `src` is imported"""
+    os.environ.update({
+        "JOURNIV_URL": upstream_url,
+        "IMMICH_URL": upstream_url,
+        "JOURNIV_EMAIL": "bench@example.com",
+        "JOURNIV_PASSWORD": "bench",
+        "IMMICH_API_KEY": "bench",
+        "JOURNIV_JOURNAL_ID": JOURNAL_ID,
+        "IMMICH_HTTP2": "false",
+        "JOURNIV_MIRROR_ENABLED": "true" if args.mirror else "false",
+        "JOURNIV_MIRROR_PATH": os.path.join(workdir, "mirror.sqlite3"),
+        "IMMICH_THUMBNAIL_CACHE_DIR": os.path.join(workdir, "thumbnails"),
+    })
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_PATHS"] = ""
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def wait_for_mirror(timeout: float = 120) -> None:
+    from src.api.endpoints.journiv.journiv import journiv_mirror
+
+    deadline = time.monotonic() + timeout
+    while journiv_mirror is not None and not journiv_mirror.is_ready(JOURNAL_ID):
+        if time.monotonic() > deadline:
+            raise RuntimeError("Mirror did not finish its first sync")
+        await asyncio.sleep(0.2)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    dataset = Dataset(entries=args.entries, seed=args.seed)
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate)
+    scenarios = [s for s in build_scenarios(dataset, args.page_size) if not args.scenario or s.name in args.scenario]
+    results: Dict[str, dict] = {}
+    stop_upstream: Optional[Callable[[], None]] = None
+    timeout = httpx.Timeout(120)
+
+    if args.target:
+        upstream_url = args.upstream_url
+        client = httpx.AsyncClient(base_url=args.target, timeout=timeout)
+        lifespan = None
+    else:
+        upstream_url, stop_upstream = start_fake_upstream(dataset, faults)
+        workdir = tempfile.mkdtemp(prefix="bench-")
+        configure_app_env(upstream_url, args, workdir)
+        from src.main import app
+
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+
+    upstream = httpx.AsyncClient(base_url=upstream_url) if upstream_url else None
+    try:
+        if args.mirror and not args.target:
+            await wait_for_mirror()
+        for i, scenario in enumerate(scenarios):
+            result = await run_scenario(
+                client, upstream, scenario, args.requests, args.concurrency, args.warmup, args.seed + i
+            )
+            results[scenario.name] = result
+            latency = result["latency_ms"]
+            print(
+                f"{scenario.name:<24} {result['throughput_rps']:>9} req/s  "
+                f"p50 {latency['p50']:>8} ms  p95 {latency['p95']:>8} ms  p99 {latency['p99']:>8} ms  "
+                f"upstream/req {result['upstream_calls_per_request']}  {result['statuses']}"
+            )
+    finally:
+        await client.aclose()
+        if upstream is not None:
+            await upstream.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+        if stop_upstream is not None:
+            stop_upstream()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "target": args.target or "in-process",
+            "dataset": {"entries": args.entries, "seed": args.seed},
+            "faults": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_rate": args.error_rate},
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "mirror": args.mirror,
+            "response_cache": not args.no_response_cache,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    """Print throughput and p95 changes against an earlier report"""
+    print(f"\nAgainst {baseline['meta'].get('git_commit')} ({baseline['meta'].get('timestamp')}):")
+    for name, result in report["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+
+        def change(new, old) -> str:
+            return f"{(new - old) / old * 100:+.1f}%" if new is not None and old else "n/a"
+
+        print(
+            f"{name:<24} throughput {change(result['throughput_rps'], before['throughput_rps']):>8}  "
+            f"p95 {change(result['latency_ms']['p95'], before['latency_ms']['p95']):>8}  "
+            f"upstream/req {before['upstream_calls_per_request']} -> {result['upstream_calls_per_request']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of a running API instead of the in-process app")
+    parser.add_argument("--upstream-url", help="Fake upstream used by --target, for upstream call counts")
+    parser.add_argument("--scenario", action="append", help="Only run this scenario (repeatable)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each scenario")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mirror", action="store_true", help="Enable the SQLite mirror and wait for its first sync")
+    parser.add_argument("--no-response-cache", action="store_true", help="Disable the response cache middleware")
+    parser.add_argument("--out", help="Results file (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Columnar statistics over the journal and its photos, on stdlib arrays.
+
+Days are stored as proleptic ordinals (`date.toordinal()`) in `array("l")`
+columns and measures in `array("d")`, with NaN for "no value". This keeps
+the loaded journal compact (machine ints and floats instead of models or
+dicts per row); the aggregations themselves are plain Python loops over
+the arrays, with bucketing by day, week or month done as integer
+arithmetic on the ordinals.
+"""
+import math
+import statistics
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Literal, Optional
+
+Period = Literal["day", "week", "month"]
+
+NAN = float("nan")
+
+
+def day_ordinals(days: Iterable[str]) -> array:
+    """YYYY-MM-DD (or ISO datetime) strings as a column of day ordinals"""
+    memo: Dict[str, int] = {}
+    column = array("l")
+    for day in days:
+        ordinal = memo.get(day)
+        if ordinal is None:
+            ordinal = memo[day] = date.fromisoformat(day[:10]).toordinal()
+        column.append(ordinal)
+    return column
+
+
+def bucket_keys(days: array, period: Period) -> array:
+    """Ordinal of the first day of each row's day, week (Monday) or month"""
+    if period == "day":
+        return days
+    if period == "week":
+        # Ordinal 1 (0001-01-01) is a Monday
+        return array("l", [day - (day - 1) % 7 for day in days])
+    memo: Dict[int, int] = {}
+    column = array("l")
+    for day in days:
+        start = memo.get(day)
+        if start is None:
+            start = memo[day] = date.fromordinal(day).replace(day=1).toordinal()
+        column.append(start)
+    return column
+
+
+@dataclass
+class Groups:
+    """Per-bucket row counts and sums of one measure, buckets ascending"""
+    keys: array
+    counts: array
+    sums: array
+
+    def means(self) -> array:
+        return array("d", [total / n if n else NAN for total, n in zip(self.sums, self.counts)])
+
+    def lookup(self) -> Dict[int, int]:
+        """Bucket ordinal -> position"""
+        return {key: i for i, key in enumerate(self.keys)}
+
+
+def group_by(days: array, period: Period, values: Optional[array] = None) -> Groups:
+    """
+    Count rows (and sum `values`, skipping NaN) per day, week or month.
+    Without `values` the sums are the counts.
+    """
+    keys = bucket_keys(days, period)
+    if values is None:
+        counts = Counter(keys)
+        ordered = sorted(counts)
+        column = array("l", [counts[key] for key in ordered])
+        return Groups(array("l", ordered), column, array("d", column))
+
+    counts: Dict[int, int] = {}
+    sums: Dict[int, float] = {}
+    for key, value in zip(keys, values):
+        if value == value:  # NaN is the only value not equal to itself
+            counts[key] = counts.get(key, 0) + 1
+            sums[key] = sums.get(key, 0.0) + value
+    ordered = sorted(counts)
+    return Groups(
+        array("l", ordered),
+        array("l", [counts[key] for key in ordered]),
+        array("d", [sums[key] for key in ordered]),
+    )
+
+
+def dense(groups: Groups, start: int, end: int) -> Groups:
+    """Daily groups filled out to every day in [start, end], missing days empty"""
+    size = max(end - start + 1, 0)
+    counts = array("l", [0]) * size
+    sums = array("d", [0.0]) * size
+    for key, n, total in zip(groups.keys, groups.counts, groups.sums):
+        if start <= key <= end:
+            counts[key - start] = n
+            sums[key - start] = total
+    return Groups(array("l", range(start, end + 1)), counts, sums)
+
+
+def rolling_mean(groups: Groups, window: int, per_bucket: bool = False) -> array:
+    """
+    Trailing mean over the last `window` buckets of dense groups: the sum
+    of the measure divided by the number of rows in the window (NaN while
+    it holds none), or by the number of buckets with `per_bucket`, e.g.
+    for entries per day. Running totals keep it O(n).
+    """
+    means = array("d")
+    total = 0.0
+    n = 0
+    for i, (count, value) in enumerate(zip(groups.counts, groups.sums)):
+        total += value
+        n += count
+        if i >= window:
+            total -= groups.sums[i - window]
+            n -= groups.counts[i - window]
+        divisor = min(i + 1, window) if per_bucket else n
+        means.append(total / divisor if divisor else NAN)
+    return means
+
+
+def correlation(x: Iterable[float], y: Iterable[float]) -> Optional[float]:
+    """Pearson correlation over the pairs where both values are set"""
+    pairs = [(a, b) for a, b in zip(x, y) if a == a and b == b]
+    if len(pairs) < 3:
+        return None
+    try:
+        return statistics.correlation([a for a, _ in pairs], [b for _, b in pairs])
+    except statistics.StatisticsError:  # one side is constant
+        return None
+
+
+def to_json_number(value: float, digits: int = 4) -> Optional[float]:
+    return None if math.isnan(value) else round(value, digits)
+
+
+def iso(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def period_rows(groups: Groups, **columns: List[Optional[float]]) -> List[dict]:
+    """One JSON row per bucket: its start date plus the given columns"""
+    return [
+        {"period_start": iso(key), **{name: values[i] for name, values in columns.items()}}
+        for i, key in enumerate(groups.keys)
+    ]
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as day_time
+from typing import Dict, List, Optional, Tuple
+
+from src.analytics.columns import NAN, day_ordinals
+from src.api.endpoints.immich.schemas import AssetOrder, AssetTypeEnum, SearchAssetsRequest, SearchMetadataSummaryResponse
+from src.config import Config
+from src.homelab_services.immich.immich import ImmichClient
+from src.homelab_services.journiv.journiv import JournivClient
+from src.homelab_services.journiv.mirror import JournivMirror
+from src.homelab_services.journiv.schemas import EntryStats
+from src.logger import logger
+
+# Mood categories as numbers, so moods can be averaged and correlated
+MOOD_SCORES = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+@dataclass
+class JournalColumns:
+    """
+    The journal, its moods, tags and photos as parallel columns.
+
+    Entries: `entry_days` / `word_counts`. Mood logs: `mood_days` /
+    `mood_scores` (NaN for categories without a score). Photos:
+    `photo_days` (local day taken) / `photo_videos` (1 for videos).
+    Tags: `tag_names` / `tag_usage`.
+    """
+    journal_id: str
+    entry_days: array = field(default_factory=lambda: array("l"))
+    word_counts: array = field(default_factory=lambda: array("l"))
+    mood_days: array = field(default_factory=lambda: array("l"))
+    mood_scores: array = field(default_factory=lambda: array("d"))
+    photo_days: array = field(default_factory=lambda: array("l"))
+    photo_videos: array = field(default_factory=lambda: array("b"))
+    tag_names: List[str] = field(default_factory=list)
+    tag_usage: array = field(default_factory=lambda: array("l"))
+    photos_loaded: bool = False
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def first_day(self) -> Optional[int]:
+        return min(self.entry_days) if self.entry_days else None
+
+    @property
+    def last_day(self) -> Optional[int]:
+        return max(self.entry_days) if self.entry_days else None
+
+
+class PhotoWindows:
+    """
+    Photo days and types per window of `window_days` days, kept between
+    loads of the columns so a reload only searches Immich for windows that
+    are new, were invalidated, reach into the last days (where photos are
+    still being added) or were searched more than `max_age` seconds ago.
+
+    Windows sit on a fixed grid of day ordinals, so they line up across
+    loads and journals. A window searched while it was invalidated is not
+    kept, as its result may predate the change.
+    """
+
+    def __init__(
+        self,
+        window_days: int = Config.STATS_PHOTO_WINDOW_DAYS,
+        concurrency: int = Config.STATS_PHOTO_CONCURRENCY,
+        max_age: float = Config.STATS_PHOTO_WINDOW_TTL,
+    ):
+        self.window_days = window_days
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self.searches = 0
+        self._windows: Dict[int, Tuple[List[str], array, float]] = {}  # start -> days, videos, loaded at
+        self._version = 0
+        self._invalidated: Dict[int, int] = {}  # start -> version of its last invalidation
+
+    def window_start(self, ordinal: int) -> int:
+        return ordinal - ordinal % self.window_days
+
+    def invalidate_day(self, day: str) -> int:
+        """
+        Drop the windows that may hold photos of `day`; its neighbours too,
+        since windows are searched by UTC time and grouped by local day.
+        Returns how many were dropped.
+        """
+        self._version += 1
+        try:
+            ordinal = date.fromisoformat(day[:10]).toordinal()
+        except ValueError:
+            # Not knowing which windows it touches, drop them all
+            dropped = len(self._windows)
+            for start in self._windows:
+                self._invalidated[start] = self._version
+            self._windows.clear()
+            return dropped
+        dropped = 0
+        for start in {self.window_start(ordinal + offset) for offset in (-1, 0, 1)}:
+            self._invalidated[start] = self._version
+            dropped += self._windows.pop(start, None) is not None
+        return dropped
+
+    def clear(self) -> None:
+        self._windows.clear()
+
+    def _is_fresh(self, start: int, today: int, now: float) -> bool:
+        window = self._windows.get(start)
+        return (
+            window is not None
+            and start + self.window_days - 1 < today - 1
+            and now - window[2] < self.max_age
+        )
+
+    async def load(self, immich: ImmichClient, first: int, last: int) -> Tuple[List[str], array]:
+        """Local days and video flags of the photos taken from day `first` to `last`"""
+        today = date.today().toordinal()
+        now = time.time()
+        starts = range(self.window_start(first), last + 1, self.window_days)
+        stale = [start for start in starts if not self._is_fresh(start, today, now)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(start: int) -> None:
+            version = self._version
+            async with semaphore:
+                days, videos = await self._search(immich, start, start + self.window_days - 1)
+            if self._invalidated.get(start, -1) <= version:
+                self._windows[start] = (days, videos, now)
+
+        await asyncio.gather(*(refresh(start) for start in stale))
+        if stale:
+            logger.info(f"Searched {len(stale)} of {len(starts)} photo windows for the statistics")
+
+        first_day, last_day = date.fromordinal(first).isoformat(), date.fromordinal(last).isoformat()
+        days: List[str] = []
+        videos = array("b")
+        for start in starts:
+            window_days, window_videos, _ = self._windows[start]
+            for day, video in zip(window_days, window_videos):
+                if first_day <= day <= last_day:
+                    days.append(day)
+                    videos.append(video)
+        return days, videos
+
+    async def _search(self, immich: ImmichClient, start: int, end: int) -> Tuple[List[str], array]:
+        self.searches += 1
+        request = SearchAssetsRequest(
+            takenAfter=datetime.combine(date.fromordinal(start), day_time.min),
+            takenBefore=datetime.combine(date.fromordinal(end), day_time.max),
+            withExif=False,
+            order=AssetOrder.ASC,
+            size=Config.IMMICH_SEARCH_PAGE_SIZE,
+        )
+        days: List[str] = []
+        videos = array("b")
+        # Not cached: the pages would push every day search out of the LRU
+        assets = immich.iter_assets(request, prefetch=True, use_cache=False, model=SearchMetadataSummaryResponse)
+        async for asset in assets:
+            days.append(immich.local_day(asset))
+            videos.append(1 if asset.type == AssetTypeEnum.VIDEO else 0)
+        return days, videos
+
+
+async def load_photo_columns(columns: JournalColumns, immich: ImmichClient, windows: PhotoWindows) -> None:
+    """
+    Local day and type of every photo taken over the journal's span, from
+    `windows`, which searches Immich only for the windows it lacks
+    """
+    if not columns.entry_days:
+        return
+    # Padded by a day, like the day searches, for assets stored in UTC
+    days, videos = await windows.load(immich, columns.first_day - 1, columns.last_day + 1)
+    columns.photo_days = day_ordinals(days)
+    columns.photo_videos = videos
+    columns.photos_loaded = True
+
+
+async def load_columns(
+    journal_id: str,
+    journiv: JournivClient,
+    immich: ImmichClient,
+    mirror: Optional[JournivMirror] = None,
+    photo_windows: Optional[PhotoWindows] = None,
+) -> JournalColumns:
+    """
+    Load the journal into columns, from the mirror's tables when it is in
+    sync (no models are built) or from bulk Journiv fetches, validating
+    entries into the EntryStats projection only. Photos come from paged
+    Immich searches over the journal's span, reusing the windows still
+    held by `photo_windows`; if Immich is down the columns are returned
+    without them.
+    """
+    start = time.monotonic()
+    columns = JournalColumns(journal_id)
+
+    if mirror is not None and mirror.is_ready(journal_id):
+        entry_rows, mood_rows, tags = await asyncio.to_thread(
+            lambda: (mirror.get_entry_stats(journal_id), mirror.get_mood_stats(), mirror.get_tags())
+        )
+    else:
+        entries, mood_logs, tags = await asyncio.gather(
+            journiv.get_all_journal_entries(journal_id, model=EntryStats),
+            journiv.get_all_mood_logs(),
+            journiv.get_all_tags(),
+        )
+        entry_rows = [(entry.entry_date, entry.word_count) for entry in entries]
+        mood_rows = [(log.logged_date, log.mood.category) for log in mood_logs]
+
+    columns.entry_days = day_ordinals(day for day, _ in entry_rows)
+    columns.word_counts = array("l", [words for _, words in entry_rows])
+    columns.mood_days = day_ordinals(day for day, _ in mood_rows)
+    columns.mood_scores = array("d", [MOOD_SCORES.get(category, NAN) for _, category in mood_rows])
+    columns.tag_names = [tag.name for tag in tags]
+    columns.tag_usage = array("l", [tag.usage_count for tag in tags])
+
+    try:
+        await load_photo_columns(columns, immich, photo_windows or PhotoWindows())
+    except Exception as e:
+        logger.warning(f"Statistics are missing photos, Immich search failed: {e}")
+
+    logger.info(
+        f"Loaded statistics columns for journal {journal_id}: {len(columns.entry_days)} entries, "
+        f"{len(columns.mood_days)} mood logs, {len(columns.photo_days)} photos "
+        f"in {time.monotonic() - start:.2f}s"
+    )
+    return columns
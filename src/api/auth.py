@@ -0,0 +1,28 @@
+import hmac
+from typing import Callable, Optional
+
+from fastapi import Header, HTTPException
+
+
+def bearer_matches(authorization: Optional[str], token: Optional[str]) -> bool:
+    """Whether an Authorization header carries `token` as a bearer token"""
+    if not token:
+        return False
+    scheme, _, credentials = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(credentials.encode(), token.encode())
+
+
+def require_bearer_token(get_token: Callable[[], Optional[str]], feature: str):
+    """
+    Dependency checking for `Authorization: Bearer <token>`. The routes
+    behind it do not exist (404) while no token is configured.
+    """
+
+    async def dependency(authorization: Optional[str] = Header(None)) -> None:
+        token = get_token()
+        if not token:
+            raise HTTPException(status_code=404, detail=f"{feature} are not configured")
+        if not bearer_matches(authorization, token):
+            raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+
+    return dependency
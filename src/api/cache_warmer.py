@@ -0,0 +1,164 @@
+import asyncio
+import json
+import random
+import time
+from datetime import date
+from typing import Awaitable, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from starlette.types import ASGIApp, Message
+
+from src.api.endpoints.immich.immich import immich_client, on_this_day_dates
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.api.response_cache import WARM_EXTENSION
+from src.config import Config
+from src.logger import logger
+
+
+async def asgi_get(app: ASGIApp, path: str, params: dict) -> Tuple[int, bytes]:
+    """Run a GET through the whole app in-process, marked as a cache-warming request"""
+    query = urlencode(params).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"host", b"cache-warmer")],
+        "client": None,
+        "server": None,
+        "extensions": {WARM_EXTENSION: {}},
+    }
+    status = 500
+    chunks: List[bytes] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+class CacheWarmer:
+    """
+    Background task that keeps the busiest responses cached.
+
+    Every `interval` (plus random jitter) it requests the first `pages`
+    pages of each warmed path through the app, so the response cache, the
+    entry index and the Immich search cache are refreshed before a visitor
+    needs them. It then warms the Immich searches for the dates of each of
+    those pages, batched exactly like /blog-posts batches them, and today's
+    "on this day" lookup. At most `concurrency` requests
+    run at once, and a cycle is skipped while an upstream's breaker is open.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        journal_id: str,
+        interval: float = Config.CACHE_WARMER_INTERVAL,
+        jitter: float = Config.CACHE_WARMER_JITTER,
+        initial_delay: float = Config.CACHE_WARMER_INITIAL_DELAY,
+        concurrency: int = Config.CACHE_WARMER_CONCURRENCY,
+        pages: int = Config.CACHE_WARMER_PAGES,
+        page_size: int = Config.CACHE_WARMER_PAGE_SIZE,
+        paths: Optional[List[str]] = None,
+    ):
+        self.app = app
+        self.journal_id = journal_id
+        self.interval = interval
+        self.jitter = jitter
+        self.initial_delay = initial_delay
+        self.pages = pages
+        self.page_size = page_size
+        self.paths = paths if paths is not None else [path for path in Config.CACHE_WARMER_PATHS if path]
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        await asyncio.sleep(self.initial_delay + random.uniform(0, self.jitter))
+        while True:
+            try:
+                await self.warm()
+            except Exception as e:
+                logger.error(f"Cache warming failed: {e}")
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+
+    async def _limited(self, label: str, call: Awaitable) -> Optional[object]:
+        async with self._semaphore:
+            try:
+                return await call
+            except Exception as e:
+                logger.warning(f"Cache warmer could not warm {label}: {e}")
+                return None
+
+    async def _warm_page(self, path: str, page: int) -> List[str]:
+        """Request one page; returns the entry dates found on it"""
+        params = {"journal_id": self.journal_id, "page": page, "limit": self.page_size}
+        status, body = await asgi_get(self.app, path, params)
+        if status != 200:
+            raise RuntimeError(f"{path} page {page} returned {status}")
+        data = json.loads(body)
+        items = data.get("entries") or data.get("posts") or []
+        return [item["entry_date"] for item in items]
+
+    async def warm(self) -> None:
+        start = time.monotonic()
+        journiv_down = journiv_client.upstream.breaker.state == "open"
+        immich_down = immich_client.upstream.breaker.state == "open"
+
+        # Immich searches are cached per window, so each page's dates are
+        # searched together, as one page of /blog-posts searches them
+        page_dates: Set[Tuple[str, ...]] = set()
+        if not journiv_down:
+            pages = await asyncio.gather(*(
+                self._limited(f"{path} page {page}", self._warm_page(path, page))
+                for path in self.paths
+                for page in range(1, self.pages + 1)
+            ))
+            page_dates = {tuple(dates) for dates in pages if dates}
+
+        if not immich_down:
+            today = date.today()
+            await asyncio.gather(
+                *(
+                    self._limited(
+                        f"assets of {dates[-1]}..{dates[0]}",
+                        immich_client.search_assets_by_dates([date.fromisoformat(day) for day in dates]),
+                    )
+                    for dates in sorted(page_dates)
+                ),
+                self._limited(
+                    "on this day",
+                    immich_client.search_assets_by_dates(on_this_day_dates(today, Config.IMMICH_ON_THIS_DAY_YEARS)),
+                ),
+            )
+
+        logger.debug(
+            f"Cache warmed {len(self.paths) * self.pages} pages and the photos of {len(page_dates)} distinct pages "
+            f"in {time.monotonic() - start:.2f}s"
+        )
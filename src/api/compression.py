@@ -0,0 +1,49 @@
+"""
+Streaming content coding for large responses.
+
+gzip is always available. zstd needs the standard library's
+`compression.zstd`, which only exists from Python 3.14; on older
+interpreters (the project supports 3.13) it is simply never offered.
+Responses whose coding depends on Accept-Encoding must send
+`Vary: Accept-Encoding` so shared caches keep the variants apart.
+"""
+import zlib
+from typing import AsyncIterator, Optional
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best content coding we can stream that the client accepts"""
+    accepted = {coding.split(";")[0].strip().lower() for coding in accept_encoding.split(",")}
+    if zstd is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    Compress a byte stream chunk by chunk, flushing after each chunk so the
+    client can decode what it has received so far.
+    """
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    if encoding == "zstd":
+        compressor = zstd.ZstdCompressor()
+        async for chunk in chunks:
+            yield compressor.compress(chunk, mode=zstd.ZstdCompressor.FLUSH_BLOCK)
+        yield compressor.flush()
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
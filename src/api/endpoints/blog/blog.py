@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.immich.schemas import AssetsByDate
+from src.api.endpoints.journiv.journiv import fetch_annotations, fetch_entries_page, get_journiv_client, tag_entries_page
+from src.api.response_cache import tag_response
+from src.api.schemas import BlogPost, BlogPostPage, build_pagination
+from src.config import Config
+from src.homelab_services.journiv.auth import JournivAuthError
+from src.homelab_services.journiv.journiv import JournivClient
+from src.homelab_services.journiv.schemas import EntrySummary
+from src.homelab_services.resilience import UPSTREAM_ERRORS
+from src.logger import logger
+
+router = APIRouter(tags=["blog"])
+
+
+async def fetch_media(entries: List[EntrySummary]) -> AssetsByDate:
+    """Photos for every entry date; Immich being down only drops the media"""
+    try:
+        dates = [date.fromisoformat(entry.entry_date) for entry in entries]
+        return await immich_client.search_assets_by_dates(dates)
+    except Exception as e:
+        logger.warning(f"Could not fetch blog post media from Immich: {e}")
+        return {}
+
+
+@router.get("/blog-posts", response_model=BlogPostPage)
+async def get_blog_posts(
+    journal_id: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Keyset cursor '<entry_date>,<id>' of the last entry seen"),
+    client: JournivClient = Depends(get_journiv_client)
+):
+    """
+    Get a page of fully assembled blog posts: each journal entry with its
+    mood, tags and that day's photos.
+
+    Media (one batched Immich search), moods (one mood-log sweep over the
+    page's dates) and tags (per-entry calls bounded by
+    BLOG_UPSTREAM_CONCURRENCY) are fetched concurrently, so a page costs
+    about as much as the slowest upstream call.
+    """
+    journal_id = journal_id or Config.JOURNIV_JOURNAL_ID
+    try:
+        entries, offset, total_count = await fetch_entries_page(client, journal_id, page, limit, after)
+
+        media, (moods, tags) = await asyncio.gather(
+            fetch_media(entries),
+            fetch_annotations(client, entries, concurrency=Config.BLOG_UPSTREAM_CONCURRENCY),
+        )
+
+        posts = []
+        for entry in entries:
+            entry_moods = moods.get(entry.id) or []
+            posts.append(BlogPost(
+                id=entry.id,
+                title=entry.title,
+                content=entry.content,
+                entry_date=entry.entry_date,
+                created_at=entry.created_at,
+                updated_at=entry.updated_at,
+                mood=entry_moods[0] if entry_moods else None,
+                tags=tags.get(entry.id, []),
+                media=media.get(entry.entry_date, []),
+            ))
+
+        # Photos are looked up by day, so a page also depends on its dates
+        tag_entries_page(journal_id, entries, tags)
+        tag_response(*(f"date:{entry.entry_date}" for entry in entries))
+        return BlogPostPage(posts=posts, pagination=build_pagination(entries, offset, limit, total_count))
+
+    except HTTPException:
+        raise
+    except JournivAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except UPSTREAM_ERRORS as e:
+        raise HTTPException(status_code=503, detail=f"Journiv is unavailable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building blog posts: {str(e)}")
@@ -1,110 +1,92 @@
+import asyncio
+import json
 import pydantic
-from src.api.endpoints.immich.schemas import SearchAssetsRequest, SearchMetadataResponse, AssetOrder
-from typing import List, Optional
-from datetime import datetime
+from src.api.endpoints.immich.schemas import AssetsByDate, DateBatchSearchRequest, SearchAssetsRequest, SearchMetadataResponse, SearchMetadataSummaryResponse, AssetOrder
+from typing import List, Literal, Optional
+from datetime import date, datetime
+from uuid import UUID
 from src.config import Config
+from src.api.file_response import ZeroCopyFileResponse
+from src.homelab_services.immich.immich import ImmichAPIError, ImmichClient
+from src.homelab_services.immich.thumbnail_cache import ThumbnailCache
+from src.homelab_services.resilience import CircuitOpenError
+from src.logger import logger
 
 # FastAPI endpoint
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 import httpx
 
 router = APIRouter(prefix="/immich", tags=["immich"])
 
+# One pooled client per process; its connections are closed on app shutdown
+immich_client = ImmichClient()
+thumbnail_cache = ThumbnailCache()
 
-# Configuration for your Immich instance
-class ImmichConfig:
-    def __init__(self):
-        self.base_url = Config.IMMICH_BASE_URL  # Update with your server
-        self.api_key = Config.IMMICH_API_KEY  # Set your API key
 
-config = ImmichConfig()
+def build_date_search(target_date: str, with_exif: bool = True) -> SearchAssetsRequest:
+    """Search request covering one whole day; raises ValueError on a bad date"""
+    # Parse the target date and create date range
+    target_dt = datetime.strptime(target_date, "%Y-%m-%d")
+    taken_after = target_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    taken_before = target_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
+    
+    return SearchAssetsRequest(
+        takenAfter=taken_after,
+        takenBefore=taken_before,
+        withExif=with_exif,
+        order=AssetOrder.ASC,
+        size=Config.IMMICH_SEARCH_PAGE_SIZE
+    )
 
 
-async def get_immich_headers():
-    """Get headers for Immich API requests"""
-    return {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "x-api-key": config.api_key
-    }
+def on_this_day_dates(target: date, years: int) -> List[date]:
+    """The same calendar day in each of the previous `years` years (Feb 29 falls back to Feb 28)"""
+    dates = []
+    for year in range(target.year - years, target.year):
+        try:
+            dates.append(target.replace(year=year))
+        except ValueError:
+            dates.append(target.replace(year=year, day=28))
+    return dates
 
 
 async def search_assets_by_date_logic(target_date: str, with_exif: bool = True):
     """
     Core logic for searching assets by date without FastAPI dependencies.
+    Follows every result page, so busy days are not truncated.
     """
     try:
-        # Parse the target date and create date range
-        target_dt = datetime.strptime(target_date, "%Y-%m-%d")
-        taken_after = target_dt.replace(hour=0, minute=0, second=0, microsecond=0)
-        taken_before = target_dt.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        search_request = SearchAssetsRequest(
-            takenAfter=taken_after,
-            takenBefore=taken_before,
-            withExif=with_exif,
-            order=AssetOrder.ASC
-        )
-        
-        # Convert to JSON-serializable dict
-        request_data = search_request.model_dump(exclude_none=True, mode='json')
-        
-        # Get headers directly instead of using Depends
-        headers = await get_immich_headers()
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{config.base_url}/api/search/metadata",
-                json=request_data,
-                headers=headers,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Immich API error: {response.text}")
-            
-            # return response.json()
-            return_data = SearchMetadataResponse(**response.json())
-            return return_data
-            
+        search_request = build_date_search(target_date, with_exif)
+        return await immich_client.search_all_metadata(search_request)
             
+    except ImmichAPIError as e:
+        raise Exception(str(e))
     except ValueError as e:
         # This catches date parsing errors
         raise Exception(f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
     except pydantic.ValidationError as e:
         # This catches Pydantic validation errors
         raise Exception(f"Response validation error: {str(e)}")
-    except httpx.RequestError as e:
+    except (httpx.RequestError, CircuitOpenError) as e:
         raise Exception(f"Unable to connect to Immich server: {str(e)}")
 
 
 @router.post("/search/assets", response_model=SearchMetadataResponse)
-async def search_assets(
-    search_request: SearchAssetsRequest,
-    headers: dict = Depends(get_immich_headers)
-):
+async def search_assets(search_request: SearchAssetsRequest):
     """
     Search for assets in Immich based on various criteria.
     Requires 'asset.read' permission.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{config.base_url}/api/search/metadata",
-                json=search_request.model_dump(exclude_unset=True),
-                headers=headers,
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Immich API error: {response.text}"
-                )
-            
-            return response.json()
+        return await immich_client.search_metadata(search_request)
             
-    except httpx.RequestError as e:
+    except ImmichAPIError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Immich API error: {e.detail}"
+        )
+    except (httpx.RequestError, CircuitOpenError) as e:
         raise HTTPException(
             status_code=503,
             detail=f"Unable to connect to Immich server: {str(e)}"
@@ -120,6 +102,190 @@ async def search_assets_by_date(
     return await search_assets_by_date_logic(target_date, with_exif)
 
 
+@router.post("/search/assets/date/{target_date}/stream")
+async def stream_assets_by_date(
+    target_date: str,
+    with_exif: bool = True,
+    prefetch: bool = True,
+    lean: bool = False,
+):
+    """
+    Stream a day's assets as NDJSON (one SearchAssetResponseDto per line,
+    or one AssetSummary with `lean`), walking Immich result pages as the
+    client reads. If the stream fails part way, its last line is an
+    `{"error": ...}` record instead of an asset.
+    """
+    try:
+        search_request = build_date_search(target_date, with_exif)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format. Use YYYY-MM-DD: {str(e)}")
+
+    async def ndjson_lines():
+        model = SearchMetadataSummaryResponse if lean else SearchMetadataResponse
+        assets = immich_client.iter_assets(search_request, prefetch=prefetch, use_cache=False, model=model)
+        try:
+            async for asset in assets:
+                yield asset.model_dump_json() + "\n"
+        except Exception as e:
+            # Headers are already sent; end the stream with the error so a
+            # truncated stream cannot pass for a complete one
+            logger.error(f"Immich asset stream for {target_date} aborted: {e}")
+            yield json.dumps({"error": f"Asset stream aborted: {str(e)}"}) + "\n"
+        finally:
+            await assets.aclose()
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+@router.post("/search/assets/dates", response_model=AssetsByDate)
+async def search_assets_by_dates(batch_request: DateBatchSearchRequest):
+    """
+    Get assets for a list or range of dates in one call, grouped by local day.
+    Dates close together share a single widened Immich search.
+    """
+    try:
+        dates = batch_request.get_dates()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(dates) > Config.IMMICH_BATCH_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {Config.IMMICH_BATCH_MAX_DAYS} dates per request")
+
+    try:
+        return await immich_client.search_assets_by_dates(dates, with_exif=batch_request.withExif)
+    except ImmichAPIError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Immich API error: {e.detail}"
+        )
+    except (httpx.RequestError, CircuitOpenError) as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Unable to connect to Immich server: {str(e)}"
+        )
+
+
+@router.post("/search/assets/on-this-day/{target_date}", response_model=AssetsByDate)
+async def search_assets_on_this_day(
+    target_date: date,
+    years: int = Query(Config.IMMICH_ON_THIS_DAY_YEARS, ge=1, le=50),
+    with_exif: bool = True,
+):
+    """
+    Assets taken on the same day and month in previous years, grouped by
+    date. Each year is its own search; results are cached like any other.
+    """
+    try:
+        return await immich_client.search_assets_by_dates(on_this_day_dates(target_date, years), with_exif=with_exif)
+    except ImmichAPIError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Immich API error: {e.detail}"
+        )
+    except (httpx.RequestError, CircuitOpenError) as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Unable to connect to Immich server: {str(e)}"
+        )
+
+
+@router.get("/assets/{asset_id}/thumbnail")
+async def get_asset_thumbnail(
+    request: Request,
+    asset_id: UUID,
+    size: Literal["thumbnail", "preview"] = "thumbnail",
+    checksum: Optional[str] = Query(None, description="Asset checksum from the search result, for cache-busting URLs"),
+):
+    """
+    Proxy an Immich thumbnail through an on-disk cache keyed by the asset
+    checksum, which is always looked up server-side (and cached); a
+    `checksum` in the URL only versions the URL and is never trusted as
+    the key. Cache hits are served from disk with ETag and Range support,
+    under the content type Immich sent; misses are written to the cache as
+    they stream to the client.
+    """
+    try:
+        resolved = await immich_client.get_asset_checksum(str(asset_id))
+    except ImmichAPIError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Immich API error: {e.detail}")
+    except (httpx.RequestError, CircuitOpenError) as e:
+        raise HTTPException(status_code=503, detail=f"Unable to connect to Immich server: {str(e)}")
+
+    key = thumbnail_cache.key(resolved, size)
+    etag = f'"{key[:32]}"'
+    # A URL carrying an outdated checksum must not pin the current image forever
+    cache_control = "public, max-age=31536000, immutable" if checksum in (None, resolved) else "no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    cached = thumbnail_cache.get(key)
+    if cached is not None:
+        path, media_type = cached
+        return ZeroCopyFileResponse(path, media_type=media_type, headers=headers)
+
+    try:
+        upstream = await immich_client.open_thumbnail(str(asset_id), size)
+    except ImmichAPIError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Immich API error: {e.detail}")
+    except (httpx.RequestError, CircuitOpenError) as e:
+        raise HTTPException(status_code=503, detail=f"Unable to connect to Immich server: {str(e)}")
+    media_type = upstream.headers.get("content-type", "image/jpeg")
+
+    async def tee():
+        # Chunks go to a temp file in the cache as they arrive, off the event
+        # loop; the file is renamed into place only once the body is complete
+        pending = None
+        try:
+            pending = await asyncio.to_thread(thumbnail_cache.begin, key)
+        except OSError as e:
+            logger.warning(f"Could not cache thumbnail of {asset_id}: {e}")
+        try:
+            async for chunk in upstream.aiter_bytes():
+                if pending is not None:
+                    try:
+                        await asyncio.to_thread(pending.write, chunk)
+                    except OSError as e:
+                        logger.warning(f"Could not cache thumbnail of {asset_id}: {e}")
+                        await asyncio.to_thread(pending.abort)
+                        pending = None
+                yield chunk
+            if pending is not None:
+                await asyncio.to_thread(pending.commit, media_type)
+                pending = None
+        except OSError as e:
+            logger.warning(f"Could not cache thumbnail of {asset_id}: {e}")
+            pending = None
+        finally:
+            await upstream.aclose()
+            if pending is not None:
+                await asyncio.to_thread(pending.abort)
+
+    return StreamingResponse(tee(), media_type=media_type, headers=headers)
+
+
+@router.get("/cache/stats", response_model=dict)
+async def get_cache_stats():
+    """
+    Hit/miss counters of the Immich search cache and how many identical
+    concurrent searches were coalesced into one upstream call
+    """
+    return {
+        **immich_client.search_cache.stats(),
+        "singleflight": immich_client.singleflight.stats(),
+        "thumbnails": thumbnail_cache.stats(),
+    }
+
+
+@router.get("/upstream/stats", response_model=dict)
+async def get_upstream_stats():
+    """
+    Circuit breaker state and per-operation latency, retry and timeout
+    counters of the Immich client
+    """
+    return immich_client.upstream.stats()
+
+
 # Utility function to get assets for analysis
 def get_assets_for_analysis(assets_response: SearchMetadataResponse) -> List[dict]:
     """
@@ -164,7 +330,6 @@ def get_assets_for_analysis(assets_response: SearchMetadataResponse) -> List[dic
 
 
 if __name__ == "__main__":
-    import asyncio
     # Example usage
     ass = asyncio.run(search_assets_by_date("2022-01-01"))
     pass
\ No newline at end of file
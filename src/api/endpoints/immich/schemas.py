@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -71,6 +71,21 @@ class SearchAssetsRequest(BaseModel):
     withStacked: Optional[bool] = None
 
 
+class DateBatchSearchRequest(BaseModel):
+    """Either explicit `dates` or an inclusive `startDate`..`endDate` range"""
+    dates: Optional[List[date]] = None
+    startDate: Optional[date] = None
+    endDate: Optional[date] = None
+    withExif: bool = True
+
+    def get_dates(self) -> List[date]:
+        if self.dates:
+            return sorted(set(self.dates))
+        if self.startDate and self.endDate and self.startDate <= self.endDate:
+            return [date.fromordinal(d) for d in range(self.startDate.toordinal(), self.endDate.toordinal() + 1)]
+        raise ValueError("Provide either dates or a startDate <= endDate range")
+
+
 # Response models
 class SearchAlbumResponseDto(BaseModel):
     id: UUID
@@ -120,6 +135,7 @@ class SearchAssetResponseDto(BaseModel):
     thumbhash: Optional[str] = None
     fileCreatedAt: datetime
     fileModifiedAt: datetime
+    localDateTime: Optional[datetime] = None
     updatedAt: datetime
     isFavorite: bool
     isArchived: bool
@@ -131,6 +147,18 @@ class SearchAssetResponseDto(BaseModel):
     checksum: str
 
 
+class AssetSummary(BaseModel):
+    """Projection of SearchAssetResponseDto with the fields the blog displays"""
+    id: UUID
+    type: AssetTypeEnum
+    originalFileName: str
+    fileCreatedAt: datetime
+    localDateTime: Optional[datetime] = None
+    thumbhash: Optional[str] = None
+    isFavorite: bool
+    checksum: str
+
+
 # Response models
 class AlbumSearchResponse(BaseModel):
     total: int
@@ -148,4 +176,18 @@ class AssetSearchResponse(BaseModel):
 
 class SearchMetadataResponse(BaseModel):
     albums: AlbumSearchResponse
-    assets: AssetSearchResponse
\ No newline at end of file
+    assets: AssetSearchResponse
+
+class AssetSummarySearchResponse(BaseModel):
+    total: int
+    count: int
+    items: List[AssetSummary]
+    nextPage: Optional[int] = None
+
+class SearchMetadataSummaryResponse(BaseModel):
+    """Lean search response: albums and facets are never parsed"""
+    assets: AssetSummarySearchResponse
+
+
+# Assets grouped by local day (YYYY-MM-DD)
+AssetsByDate = Dict[str, List[SearchAssetResponseDto]]
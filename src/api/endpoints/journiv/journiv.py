@@ -1,28 +1,195 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple
 
-from pydantic import BaseModel
-
-from homelab_services.journiv.schemas import EntryResponse
+from src.api.compression import choose_encoding, compress_stream
+from src.api.response_cache import tag_response
+from src.api.schemas import JournalEntryResponse, build_pagination
+from src.homelab_services.journiv.schemas import EntrySummary, MoodLogResponse, Tag
+from src.homelab_services.journiv.auth import JournivAuthError
+from src.homelab_services.journiv.entry_index import JournalIndex, JournalIndexCache, parse_cursor
 from src.homelab_services.journiv.journiv import JournivClient
+from src.homelab_services.journiv.mirror import JournivMirror, MirrorSyncWorker
+from src.homelab_services.resilience import UPSTREAM_ERRORS
 from src.config import Config
+from src.logger import logger
+from src.tracing import span
 
 router = APIRouter()
 
-class JournalEntryResponse(BaseModel):
-    id: str
-    title: str
-    content: str
-    entry_date: str
-    created_at: str
-    updated_at: str
-
-def get_journiv_client():
-    """Dependency to get Journiv client instance"""
-    client = JournivClient()
-    if not client.login():
-        raise HTTPException(status_code=401, detail="Failed to authenticate with Journiv")
-    return client
+# One pooled client per process; its connections are closed on app shutdown
+journiv_client = JournivClient()
+entry_index = JournalIndexCache(journiv_client)
+
+# Optional local mirror of the configured journal, synced in the background
+journiv_mirror = JournivMirror() if Config.JOURNIV_MIRROR_ENABLED else None
+mirror_worker = (
+    MirrorSyncWorker(journiv_mirror, journiv_client, Config.JOURNIV_JOURNAL_ID)
+    if journiv_mirror is not None and Config.JOURNIV_JOURNAL_ID
+    else None
+)
+
+async def get_journiv_client():
+    """Dependency to get the shared Journiv client (authenticates lazily)"""
+    return journiv_client
+
+async def get_ready_mirror(journal_id: Optional[str]) -> Optional[JournivMirror]:
+    """The local mirror, if enabled and holding a full copy of the journal"""
+    if journiv_mirror is not None and journal_id and await asyncio.to_thread(journiv_mirror.is_ready, journal_id):
+        return journiv_mirror
+    return None
+
+async def get_fallback_mirror(journal_id: Optional[str]) -> Optional[JournivMirror]:
+    """The local mirror, even if behind, for when Journiv cannot be reached"""
+    if (
+        journiv_mirror is not None
+        and journal_id
+        and await asyncio.to_thread(journiv_mirror.count_entries, journal_id) > 0
+    ):
+        return journiv_mirror
+    return None
+
+def resolve_offset(index: JournalIndex, after: str) -> int:
+    """Translate a keyset cursor into an offset, rejecting malformed cursors"""
+    try:
+        return index.offset_after(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+async def paginate_from_journiv(
+    client: JournivClient, journal_id: str, page: int, limit: int, after: Optional[str]
+) -> Tuple[List[EntrySummary], int, int]:
+    """One upstream page plus the total count from the cached entry index"""
+    index = await entry_index.get(journal_id)
+
+    # Calculate offset
+    offset = resolve_offset(index, after) if after else (page - 1) * limit
+    
+    # Get paginated entries
+    entries = await client.get_journal_entries(journal_id, limit=limit, offset=offset, model=EntrySummary)
+
+    # The page disagrees with the index: the journal changed. Refresh the
+    # index from the newest entries, then rebuild it if the change is further back
+    if not index.matches_page(offset, entries):
+        for full in (False, True):
+            entry_index.invalidate(journal_id, full=full)
+            index = await entry_index.get(journal_id)
+            if after:
+                new_offset = resolve_offset(index, after)
+                if new_offset != offset:
+                    offset = new_offset
+                    entries = await client.get_journal_entries(journal_id, limit=limit, offset=offset, model=EntrySummary)
+            if index.matches_page(offset, entries):
+                break
+
+    return entries, offset, index.total_count
+
+def paginate_from_mirror(
+    mirror: JournivMirror, journal_id: str, page: int, limit: int, after: Optional[str]
+) -> Tuple[List[EntrySummary], int, int]:
+    """A page served by indexed queries on the local mirror"""
+    if after:
+        try:
+            entry_date, entry_id = parse_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+    with span("mirror page", "mirror", limit=limit):
+        if after:
+            offset = mirror.count_entries_before(journal_id, entry_date, entry_id)
+            entries = mirror.get_entries_after(journal_id, entry_date, entry_id, limit)
+        else:
+            offset = (page - 1) * limit
+            entries = mirror.get_entries(journal_id, limit=limit, offset=offset)
+        return entries, offset, mirror.count_entries(journal_id)
+
+async def fetch_entries_page(
+    client: JournivClient, journal_id: str, page: int, limit: int, after: Optional[str]
+) -> Tuple[List[EntrySummary], int, int]:
+    """
+    A page of entries with its offset and the journal's total count.
+    Falls back to a lagging mirror when Journiv is down.
+    """
+    mirror = await get_ready_mirror(journal_id)
+    if mirror is not None:
+        return await asyncio.to_thread(paginate_from_mirror, mirror, journal_id, page, limit, after)
+    try:
+        return await paginate_from_journiv(client, journal_id, page, limit, after)
+    except UPSTREAM_ERRORS as e:
+        mirror = await get_fallback_mirror(journal_id)
+        if mirror is None:
+            raise
+        logger.warning(f"Journiv unavailable, serving journal {journal_id} from the mirror: {e}")
+        return await asyncio.to_thread(paginate_from_mirror, mirror, journal_id, page, limit, after)
+
+async def fetch_mood_logs(client: JournivClient, entries: List[EntrySummary]) -> Dict[str, List[MoodLogResponse]]:
+    """Mood logs of a page of entries keyed by entry_id, without per-entry calls"""
+    if not entries:
+        return {}
+    mirror = await get_ready_mirror(entries[0].journal_id)
+    if mirror is not None:
+        def read() -> Dict[str, List[MoodLogResponse]]:
+            return {entry.id: mirror.get_mood_logs(entry.id) for entry in entries}
+
+        return await asyncio.to_thread(read)
+    dates = [entry.entry_date for entry in entries]
+    return await client.get_mood_logs_by_entry(min(dates), max(dates))
+
+async def fetch_annotations(
+    client: JournivClient, entries: List[EntrySummary], concurrency: int = Config.JOURNIV_FANOUT_CONCURRENCY
+) -> Tuple[Dict[str, List[MoodLogResponse]], Dict[str, List[Tag]]]:
+    """
+    Mood logs and tags for a page of entries, both keyed by entry_id.
+    Whatever cannot be fetched while Journiv is down is left out.
+    """
+    moods, tags = await asyncio.gather(
+        fetch_mood_logs(client, entries),
+        client.get_tags_for_entries([entry.id for entry in entries], concurrency=concurrency),
+        return_exceptions=True,
+    )
+    for result in (moods, tags):
+        if isinstance(result, UPSTREAM_ERRORS):
+            logger.warning(f"Journiv unavailable, leaving out annotations: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+    return (
+        {} if isinstance(moods, BaseException) else moods,
+        {} if isinstance(tags, BaseException) else tags,
+    )
+
+def tag_entries_page(journal_id: str, entries: List[EntrySummary], tags: Dict[str, List[Tag]]) -> None:
+    """
+    Mark a cached page as depending on its journal (total count, page
+    boundaries), its entries and the tags shown on them
+    """
+    tag_response(
+        f"journal:{journal_id}",
+        *(f"entry:{entry.id}" for entry in entries),
+        *(f"tag:{tag.id}" for entry_tags in tags.values() for tag in entry_tags),
+    )
+
+@router.get("/journiv/auth/metrics", response_model=dict)
+async def get_journiv_auth_metrics():
+    """
+    Login, refresh and auth-retry counters of the shared Journiv session
+    """
+    return journiv_client.auth.get_metrics()
+
+@router.get("/journiv/singleflight/stats", response_model=dict)
+async def get_journiv_singleflight_stats():
+    """
+    How many identical concurrent Journiv GETs were coalesced, per request
+    """
+    return journiv_client.singleflight.stats()
+
+@router.get("/journiv/upstream/stats", response_model=dict)
+async def get_journiv_upstream_stats():
+    """
+    Circuit breaker state and per-operation latency, retry and timeout
+    counters of the Journiv client
+    """
+    return journiv_client.upstream.stats()
 
 @router.get("/journal-entries", response_model=List[JournalEntryResponse])
 async def get_all_journal_entries(
@@ -32,8 +199,18 @@ async def get_all_journal_entries(
     Get all journal entries from Journiv and return them in TypeScript interface format
     """
     try:
-        # Get all entries from Journiv
-        entries: List[EntryResponse] = client.get_all_journal_entries(Config.JOURNIV_JOURNAL_ID)
+        mirror = await get_ready_mirror(Config.JOURNIV_JOURNAL_ID)
+        if mirror is not None:
+            entries: List[EntrySummary] = await asyncio.to_thread(mirror.get_entries, Config.JOURNIV_JOURNAL_ID)
+        else:
+            # Get all entries from Journiv
+            try:
+                entries = await client.get_all_journal_entries(Config.JOURNIV_JOURNAL_ID, model=EntrySummary)
+            except UPSTREAM_ERRORS:
+                mirror = await get_fallback_mirror(Config.JOURNIV_JOURNAL_ID)
+                if mirror is None:
+                    raise
+                entries = await asyncio.to_thread(mirror.get_entries, Config.JOURNIV_JOURNAL_ID)
         
         # Convert to the response model that matches TypeScript interface
         response_entries = []
@@ -47,54 +224,181 @@ async def get_all_journal_entries(
                 updated_at=entry.entry_date
             ))
         
+        tag_response(f"journal:{Config.JOURNIV_JOURNAL_ID}")
         return response_entries
         
+    except JournivAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except UPSTREAM_ERRORS as e:
+        raise HTTPException(status_code=503, detail=f"Journiv is unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching journal entries: {str(e)}")
 
+async def iter_entry_pages(client: JournivClient, journal_id: str) -> AsyncIterator[List[EntrySummary]]:
+    """Whole journal one page at a time, from the mirror or sequentially from Journiv"""
+    mirror = await get_ready_mirror(journal_id)
+    if mirror is not None:
+        pages = mirror.iter_entry_pages(journal_id)
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            yield page
+        return
+
+    page: List[EntrySummary] = []
+    entries = client.iter_journal_entries(journal_id, model=EntrySummary, concurrency=1)
+    try:
+        async for entry in entries:
+            page.append(entry)
+            if len(page) == 100:
+                yield page
+                page = []
+        if page:
+            yield page
+    finally:
+        await entries.aclose()
+
+@router.get("/journal-entries/export")
+async def export_journal_entries(
+    request: Request,
+    journal_id: Optional[str] = None,
+    format: Literal["ndjson", "json"] = "ndjson",
+    client: JournivClient = Depends(get_journiv_client)
+):
+    """
+    Stream the whole journal as NDJSON (default) or as a chunked JSON array.
+
+    Entries are read and written a page at a time, so the first entry goes
+    out after one upstream round-trip and memory stays bounded by a page.
+    The body is gzip- or zstd-compressed when the client accepts it. An
+    export that fails part way ends with an `{"error": ...}` line (NDJSON)
+    or without the closing bracket (JSON).
+    """
+    journal_id = journal_id or Config.JOURNIV_JOURNAL_ID
+
+    async def body() -> AsyncIterator[bytes]:
+        first = True
+        if format == "json":
+            yield b"["
+        try:
+            async for page in iter_entry_pages(client, journal_id):
+                lines = []
+                for entry in page:
+                    line = JournalEntryResponse(
+                        id=entry.id,
+                        title=entry.title,
+                        content=entry.content,
+                        entry_date=entry.entry_date,
+                        created_at=entry.created_at,
+                        updated_at=entry.updated_at
+                    ).model_dump_json()
+                    if format == "json":
+                        lines.append(line if first else "," + line)
+                    else:
+                        lines.append(line + "\n")
+                    first = False
+                yield "".join(lines).encode()
+        except Exception as e:
+            # Headers are already sent, so the body has to show the export is
+            # incomplete: NDJSON ends with an error record, and the JSON
+            # array is left unclosed so it does not parse
+            logger.error(f"Journal export of {journal_id} aborted: {e}")
+            if format == "ndjson":
+                yield (json.dumps({"error": f"Export aborted: {str(e)}"}) + "\n").encode()
+            return
+        if format == "json":
+            yield b"]"
+
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = "application/json" if format == "json" else "application/x-ndjson"
+    return StreamingResponse(compress_stream(body(), encoding), media_type=media_type, headers=headers)
+
 @router.get("/journal-entries/paginated", response_model=dict)
 async def get_paginated_journal_entries(
     journal_id: str,
-    page: int = 1,
-    limit: int = 10,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    after: Optional[str] = Query(None, description="Keyset cursor '<entry_date>,<id>' of the last entry seen"),
+    annotate: bool = Query(False, description="Include each entry's mood and tag names"),
     client: JournivClient = Depends(get_journiv_client)
 ):
     """
-    Get paginated journal entries from Journiv
+    Get paginated journal entries.
+
+    Pages are addressed either by `page` or by an `after` cursor. They are
+    read from the local mirror when it is in sync, otherwise from Journiv
+    with the total count taken from a cached per-journal index, so each
+    page costs at most one upstream call regardless of journal size.
+    With `annotate`, moods come from one bulk mood-log sweep over the
+    page's date window and tags from concurrent per-entry calls.
     """
     try:
-        # Calculate offset
-        offset = (page - 1) * limit
-        
-        # Get paginated entries
-        entries = client.get_journal_entries(journal_id, limit=limit, offset=offset)
-        
-        # Get total count for pagination info
-        all_entries = client.get_all_journal_entries(journal_id)
-        total_count = len(all_entries)
+        entries, offset, total_count = await fetch_entries_page(client, journal_id, page, limit, after)
+
+        moods, tags = await fetch_annotations(client, entries) if annotate else ({}, {})
         
         # Convert to response model
         response_entries = []
         for entry in entries:
+            entry_moods = moods.get(entry.id) or []
             response_entries.append(JournalEntryResponse(
                 id=entry.id,
                 title=entry.title,
                 content=entry.content,
                 entry_date=entry.entry_date,
                 created_at=entry.created_at,
-                updated_at=entry.updated_at
+                updated_at=entry.updated_at,
+                mood=entry_moods[0].mood.name if entry_moods else None,
+                tags=[tag.name for tag in tags.get(entry.id, [])]
             ))
         
+        tag_entries_page(journal_id, entries, tags)
         return {
             "entries": response_entries,
-            "pagination": {
-                "currentPage": page,
-                "totalPages": (total_count + limit - 1) // limit,  # Ceiling division
-                "totalCount": total_count,
-                "hasNext": page < ((total_count + limit - 1) // limit),
-                "hasPrevious": page > 1
-            }
+            "pagination": build_pagination(entries, offset, limit, total_count)
+        }
+
+    except HTTPException:
+        raise
+    except JournivAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except UPSTREAM_ERRORS as e:
+        raise HTTPException(status_code=503, detail=f"Journiv is unavailable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching journal entries: {str(e)}")
+
+@router.get("/journal-entries/search", response_model=dict)
+async def search_journal_entries(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in entry titles and bodies"),
+    journal_id: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Full-text search over journal entries.
+
+    Answered from the mirror's FTS5 index without calling Journiv. Every
+    word must match (as a prefix); results are ranked by bm25 with title
+    matches weighted up, and come with <mark>-highlighted titles and
+    content snippets.
+    """
+    journal_id = journal_id or Config.JOURNIV_JOURNAL_ID
+    mirror = await get_fallback_mirror(journal_id)
+    if mirror is None:
+        raise HTTPException(
+            status_code=503, detail="Search needs the Journiv mirror (JOURNIV_MIRROR_ENABLED) to have synced"
+        )
+    try:
+        offset = (page - 1) * limit
+        with span("fts search", "mirror", limit=limit) as attrs:
+            hits, total_count = await asyncio.to_thread(
+                mirror.search_entries, journal_id, q, limit=limit, offset=offset
+            )
+            attrs["matches"] = total_count
+        return {
+            "results": hits,
+            "pagination": build_pagination(hits, offset, limit, total_count, with_cursor=False),
         }
-        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching journal entries: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error searching journal entries: {str(e)}")
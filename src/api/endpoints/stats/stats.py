@@ -0,0 +1,206 @@
+from array import array
+from typing import Iterable, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from src.analytics.columns import (
+    NAN, Period, correlation, dense, group_by, iso, period_rows, rolling_mean, to_json_number
+)
+from src.analytics.dataset import JournalColumns, PhotoWindows, load_columns
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv.journiv import journiv_client, journiv_mirror
+from src.api.response_cache import tag_response
+from src.config import Config
+from src.homelab_services.cache import TTLCache
+from src.homelab_services.journiv.auth import JournivAuthError
+from src.homelab_services.resilience import UPSTREAM_ERRORS
+from src.homelab_services.singleflight import SingleFlight
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+# Loaded columns per journal; responses built from them sit in the response cache
+stats_cache = TTLCache(maxsize=4, ttl=Config.STATS_CACHE_TTL)
+stats_singleflight = SingleFlight()
+# Photo search results per window, outliving the columns so a reload reuses them
+photo_windows = PhotoWindows()
+
+
+async def get_columns(journal_id: Optional[str] = None) -> JournalColumns:
+    """Dependency loading (or reusing) the journal's statistics columns"""
+    journal_id = journal_id or Config.JOURNIV_JOURNAL_ID
+    if not journal_id:
+        raise HTTPException(status_code=400, detail="journal_id is required")
+    # Every statistic depends on the whole journal
+    tag_response("stats")
+    columns = stats_cache.get(journal_id)
+    if columns is not None:
+        return columns
+    try:
+        columns = await stats_singleflight.do(
+            journal_id, lambda: load_columns(journal_id, journiv_client, immich_client, journiv_mirror, photo_windows)
+        )
+    except JournivAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except UPSTREAM_ERRORS as e:
+        raise HTTPException(status_code=503, detail=f"Journiv is unavailable: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading statistics: {str(e)}")
+    stats_cache.set(journal_id, columns)
+    return columns
+
+
+def invalidate_stats(photo_days: Iterable[str] = ()) -> None:
+    """Drop the loaded columns, and the photo windows of days whose assets changed"""
+    stats_cache.clear()
+    for day in photo_days:
+        photo_windows.invalidate_day(day)
+
+
+def numbers(values: array, digits: int = 4) -> list:
+    return [to_json_number(value, digits) for value in values]
+
+
+@router.get("/summary", response_model=dict)
+async def get_summary(columns: JournalColumns = Depends(get_columns)):
+    """
+    Totals over the whole journal
+    """
+    entries = len(columns.entry_days)
+    words = sum(columns.word_counts)
+    scores = [score for score in columns.mood_scores if score == score]
+    return {
+        "journal_id": columns.journal_id,
+        "entries": entries,
+        "words": words,
+        "average_words": round(words / entries, 1) if entries else None,
+        "first_day": iso(columns.first_day) if entries else None,
+        "last_day": iso(columns.last_day) if entries else None,
+        "days_with_entries": len(set(columns.entry_days)),
+        "mood_logs": len(columns.mood_days),
+        "average_mood": round(sum(scores) / len(scores), 4) if scores else None,
+        "photos": len(columns.photo_days),
+        "videos": sum(columns.photo_videos),
+        "photos_loaded": columns.photos_loaded,
+        "tags": len(columns.tag_names),
+        "loaded_at": columns.loaded_at,
+    }
+
+
+@router.get("/entries", response_model=list)
+async def get_entry_stats(
+    period: Period = Query("month"),
+    columns: JournalColumns = Depends(get_columns),
+):
+    """
+    Entries and words written per day, week (from Monday) or month
+    """
+    groups = group_by(columns.entry_days, period, columns.word_counts)
+    return period_rows(
+        groups,
+        entries=list(groups.counts),
+        words=[int(total) for total in groups.sums],
+        average_words=numbers(groups.means(), 1),
+    )
+
+
+@router.get("/moods", response_model=list)
+async def get_mood_stats(
+    period: Period = Query("month"),
+    columns: JournalColumns = Depends(get_columns),
+):
+    """
+    Mood logs and the average mood (positive 1, neutral 0, negative -1) per period
+    """
+    groups = group_by(columns.mood_days, period, columns.mood_scores)
+    return period_rows(groups, mood_logs=list(groups.counts), average_mood=numbers(groups.means()))
+
+
+@router.get("/photos", response_model=list)
+async def get_photo_stats(
+    period: Period = Query("month"),
+    columns: JournalColumns = Depends(get_columns),
+):
+    """
+    Photos and videos taken per period over the journal's span
+    """
+    groups = group_by(columns.photo_days, period, columns.photo_videos)
+    return period_rows(groups, photos=list(groups.counts), videos=[int(total) for total in groups.sums])
+
+
+@router.get("/tags", response_model=list)
+async def get_tag_stats(
+    limit: int = Query(20, ge=1, le=500),
+    columns: JournalColumns = Depends(get_columns),
+):
+    """
+    Most used tags
+    """
+    usage = columns.tag_usage
+    top = sorted(range(len(usage)), key=usage.__getitem__, reverse=True)[:limit]
+    return [{"name": columns.tag_names[i], "usage_count": usage[i]} for i in top]
+
+
+@router.get("/rolling", response_model=list)
+async def get_rolling_stats(
+    metric: Literal["mood", "words", "entries", "photos"] = Query("mood"),
+    window: int = Query(30, ge=1, le=365, description="Trailing window in days"),
+    columns: JournalColumns = Depends(get_columns),
+):
+    """
+    Trailing average of a metric for every day of the journal: the mood of
+    the logs in the window, words per entry, or entries or photos per day
+    """
+    if metric == "photos" and not columns.photos_loaded:
+        raise HTTPException(status_code=400, detail="Photo statistics are unavailable, the Immich search failed")
+    if not columns.entry_days:
+        return []
+    days, values = {
+        "mood": (columns.mood_days, columns.mood_scores),
+        "words": (columns.entry_days, columns.word_counts),
+        "entries": (columns.entry_days, None),
+        "photos": (columns.photo_days, None),
+    }[metric]
+    daily = dense(group_by(days, "day", values), columns.first_day, columns.last_day)
+    means = rolling_mean(daily, window, per_bucket=values is None)
+    return [
+        {"day": iso(day), "value": value}
+        for day, value in zip(daily.keys, numbers(means))
+    ]
+
+
+@router.get("/correlation", response_model=dict)
+async def get_correlation_stats(
+    period: Period = Query("day"),
+    columns: JournalColumns = Depends(get_columns),
+):
+    """
+    Pearson correlations between the average mood, words written and photos
+    taken per period, over the periods with at least one entry
+    """
+    entries = group_by(columns.entry_days, period, columns.word_counts)
+    mood_groups = group_by(columns.mood_days, period, columns.mood_scores)
+    moods, mood_positions = mood_groups.means(), mood_groups.lookup()
+    photos = group_by(columns.photo_days, period)
+    photo_positions = photos.lookup()
+
+    # Aligned on the entry periods; a period without photos has 0 of them
+    mood = array("d", [moods[mood_positions[key]] if key in mood_positions else NAN for key in entries.keys])
+    words = entries.sums
+    if columns.photos_loaded:
+        photo_counts = array(
+            "d", [photos.counts[photo_positions[key]] if key in photo_positions else 0 for key in entries.keys]
+        )
+    else:
+        photo_counts = array("d", [NAN]) * len(entries.keys)
+
+    def r(x: array, y: array) -> Optional[float]:
+        value = correlation(x, y)
+        return None if value is None else round(value, 4)
+
+    return {
+        "period": period,
+        "periods": len(entries.keys),
+        "mood_vs_photos": r(mood, photo_counts),
+        "mood_vs_words": r(mood, words),
+        "words_vs_photos": r(words, photo_counts),
+    }
@@ -0,0 +1,39 @@
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands whole-file bodies to the server as a
+    `http.response.zerocopysend` (sendfile) when the ASGI server supports
+    that extension. Range and HEAD requests use the regular FileResponse
+    path, which already handles single and multi-range bodies.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        headers = Headers(scope=scope)
+        if (
+            "http.response.zerocopysend" not in extensions
+            or scope["method"].upper() == "HEAD"
+            or "range" in headers
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        stat_result = os.stat(self.path)
+        self.set_stat_headers(stat_result)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        with open(self.path, "rb") as file:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file,
+                "offset": 0,
+                "count": stat_result.st_size,
+                "more_body": False,
+            })
+        if self.background is not None:
+            await self.background()
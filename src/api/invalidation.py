@@ -0,0 +1,301 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, model_validator
+
+from src.api.auth import require_bearer_token
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv.journiv import entry_index, journiv_client, journiv_mirror, mirror_worker
+from src.api.endpoints.stats.stats import invalidate_stats
+from src.api.response_cache import invalidate_tagged
+from src.config import Config
+from src.homelab_services.immich.immich import ImmichClient
+from src.homelab_services.journiv.entry_index import JournalIndexCache
+from src.homelab_services.journiv.journiv import JournivClient
+from src.homelab_services.journiv.mirror import JournivMirror, MirrorSyncWorker
+from src.logger import logger
+from src.static_site.build import forget_entries
+
+router = APIRouter(prefix="/hooks", tags=["hooks"])
+
+
+class ChangeEvent(BaseModel):
+    """
+    One change in Journiv or Immich.
+
+    Entry events carry the entry `id` and, when known, its `entry_date`
+    (plus `previous_entry_date` if it moved). Mood log events carry the
+    `entry_id` they belong to; tag events the `entry_id` the tag was added
+    to or removed from, or the tag `id` when the tag itself was renamed or
+    deleted. Asset events carry the `day` the photo was taken.
+    """
+    type: Literal["entry", "mood_log", "tag", "asset"]
+    action: Literal["created", "updated", "deleted"] = "updated"
+    id: Optional[str] = None
+    entry_id: Optional[str] = None
+    journal_id: Optional[str] = None
+    entry_date: Optional[str] = None
+    previous_entry_date: Optional[str] = None
+    day: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_target(self) -> "ChangeEvent":
+        missing = {
+            "entry": self.id is None,
+            "mood_log": self.entry_id is None,
+            "tag": self.id is None and self.entry_id is None,
+            "asset": self.day is None,
+        }[self.type]
+        if missing:
+            raise ValueError(f"{self.type} event does not say what changed")
+        return self
+
+
+class InvalidationRequest(BaseModel):
+    events: List[ChangeEvent]
+
+
+@dataclass
+class InvalidationPlan:
+    """What a batch of change events invalidates; computing it changes nothing"""
+    tags: Set[str] = field(default_factory=set)  # Response tags
+    journals: Set[str] = field(default_factory=set)  # Journals whose entry index is refreshed
+    reindex: Set[str] = field(default_factory=set)  # Journals whose entry index is rebuilt
+    days: Set[str] = field(default_factory=set)  # Days whose Immich searches are dropped
+    rerender: Set[str] = field(default_factory=set)  # Entries whose static pages are forgotten
+    mirror_dates: Set[str] = field(default_factory=set)  # Dates the mirror re-pulls
+    mirror_deletes: Set[str] = field(default_factory=set)  # Deleted entries the window re-pull cannot find
+    entries_changed: bool = False
+    mood_logs_changed: bool = False
+    tags_changed: bool = False
+
+
+class Invalidator:
+    """
+    Turns change events into precise invalidations instead of flushing
+    everything: cached responses tagged with the changed entry, tag or day
+    (or with the journal, when entries appear, vanish or move), the
+    journal's entry index, Immich searches covering the day, the lookup
+    index, the mirror's window around the change, the static site
+    manifest and the statistics columns. This is what lets the response
+    and search caches use long TTLs.
+    """
+
+    def __init__(
+        self,
+        client: JournivClient,
+        index_cache: JournalIndexCache,
+        immich: ImmichClient,
+        mirror: Optional[JournivMirror] = None,
+        worker: Optional[MirrorSyncWorker] = None,
+        journal_id: Optional[str] = Config.JOURNIV_JOURNAL_ID,
+        static_dir: str = Config.STATIC_SITE_DIR,
+    ):
+        self.client = client
+        self.index_cache = index_cache
+        self.immich = immich
+        self.mirror = mirror
+        self.worker = worker
+        self.journal_id = journal_id
+        self.static_dir = static_dir
+        self._refreshes: Set[asyncio.Task] = set()
+
+    def _plan(self, events: List[ChangeEvent]) -> InvalidationPlan:
+        """What `events` invalidate, without touching anything"""
+        plan = InvalidationPlan()
+
+        for event in events:
+            if event.type == "entry":
+                plan.tags.add(f"entry:{event.id}")
+                plan.entries_changed = True
+                moved = event.previous_entry_date is not None and event.previous_entry_date != event.entry_date
+                if event.action != "updated" or moved:
+                    plan.journals.add(event.journal_id or self.journal_id)
+                # New entries are picked up from the head of the journal;
+                # deletions and moves may be anywhere in it
+                if event.action == "deleted" or moved:
+                    plan.reindex.add(event.journal_id or self.journal_id)
+                if event.action == "deleted" and event.entry_date is None:
+                    plan.mirror_deletes.add(event.id)
+                plan.mirror_dates.update(d for d in (event.entry_date, event.previous_entry_date) if d)
+            elif event.type == "mood_log":
+                plan.tags.add(f"entry:{event.entry_id}")
+                plan.rerender.add(event.entry_id)
+                plan.mood_logs_changed = True
+                if event.entry_date:
+                    plan.mirror_dates.add(event.entry_date)
+            elif event.type == "tag":
+                if event.entry_id:
+                    plan.tags.add(f"entry:{event.entry_id}")
+                    plan.rerender.add(event.entry_id)
+                if event.id:
+                    plan.tags.add(f"tag:{event.id}")
+                plan.tags_changed = True
+            else:
+                plan.tags.add(f"date:{event.day}")
+                plan.days.add(event.day)
+
+        plan.journals.discard(None)
+        plan.reindex.discard(None)
+        plan.tags.update(f"journal:{journal_id}" for journal_id in plan.journals)
+        # Statistics aggregate everything, so any change makes them stale
+        if events:
+            plan.tags.add("stats")
+        return plan
+
+    def _drop(self, tags: Set[str], journals: Set[str], reindex: Set[str] = frozenset()) -> int:
+        for journal_id in journals:
+            self.index_cache.invalidate(journal_id, full=journal_id in reindex)
+        return invalidate_tagged(tags)
+
+    async def apply(self, events: List[ChangeEvent]) -> Dict[str, object]:
+        plan = self._plan(events)
+
+        if plan.entries_changed:
+            self.client.lookup.entries_loaded = False
+        if plan.mood_logs_changed:
+            self.client.lookup.mood_logs_loaded = False
+        if plan.tags_changed:
+            self.client.lookup.tags_loaded = False
+
+        responses = self._drop(plan.tags, plan.journals, plan.reindex)
+        if events:
+            invalidate_stats(plan.days)
+        searches = sum(self.immich.invalidate_day(day) for day in plan.days)
+        static_entries = 0
+        if plan.rerender:
+            # Manifest file I/O, possibly waiting on a running static build's lock
+            static_entries = await asyncio.to_thread(forget_entries, self.static_dir, sorted(plan.rerender))
+
+        # The mirror serves pages itself, so once it has caught up the
+        # responses rendered from it in the meantime are dropped again
+        mirror_refresh = self.worker is not None and bool(plan.mirror_dates or plan.mirror_deletes or plan.tags_changed)
+        if mirror_refresh:
+            task = asyncio.create_task(self._refresh_mirror(plan))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+
+        summary = {
+            "events": len(events),
+            "responses": responses,
+            "journals": sorted(plan.journals),
+            "immich_searches": searches,
+            "static_entries": static_entries,
+            "mirror_refresh": mirror_refresh,
+        }
+        logger.info(f"Invalidated for {len(events)} change events: {summary}")
+        return summary
+
+    async def _refresh_mirror(self, plan: InvalidationPlan) -> None:
+        try:
+            if plan.mirror_deletes:
+                await self.worker.delete_entries(plan.mirror_deletes)
+            await self.worker.refresh(plan.mirror_dates, tags=plan.tags_changed)
+        except Exception as e:
+            logger.warning(f"Mirror refresh after change events failed: {e}")
+        self._drop(plan.tags, plan.journals)
+
+
+class ChangeProbe:
+    """
+    Fallback for when Journiv cannot call the hook.
+
+    Every `interval` it lists the entries dated in the last `days` days
+    (one get_entries_by_date_range call) and compares their updated_at
+    with the previous probe; entries that appeared, changed or disappeared
+    become change events for the Invalidator. Edits to older entries, and
+    mood and tag changes, still wait for the TTLs.
+    """
+
+    def __init__(
+        self,
+        invalidator: Invalidator,
+        client: JournivClient,
+        journal_id: str,
+        interval: float = Config.INVALIDATION_PROBE_INTERVAL,
+        days: int = Config.INVALIDATION_PROBE_DAYS,
+    ):
+        self.invalidator = invalidator
+        self.client = client
+        self.journal_id = journal_id
+        self.interval = interval
+        self.days = days
+        self._seen: Optional[Dict[str, Tuple[str, str]]] = None  # id -> (updated_at, entry_date)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                events = await self.probe()
+                if events:
+                    await self.invalidator.apply(events)
+            except Exception as e:
+                logger.warning(f"Journiv change probe failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def probe(self) -> List[ChangeEvent]:
+        """Change events since the previous probe; the first one only takes a baseline"""
+        today = date.today()
+        since = (today - timedelta(days=self.days)).isoformat()
+        entries = await self.client.get_entries_by_date_range(
+            since, (today + timedelta(days=1)).isoformat(), self.journal_id
+        )
+        seen = {entry.id: (entry.updated_at, entry.entry_date) for entry in entries}
+        previous, self._seen = self._seen, seen
+        if previous is None:
+            return []
+
+        def event(action: str, entry_id: str, entry_date: str, previous_date: Optional[str] = None) -> ChangeEvent:
+            return ChangeEvent(
+                type="entry", action=action, id=entry_id, journal_id=self.journal_id,
+                entry_date=entry_date, previous_entry_date=previous_date,
+            )
+
+        events = []
+        for entry_id, (updated_at, entry_date) in seen.items():
+            before = previous.get(entry_id)
+            if before is None:
+                events.append(event("created", entry_id, entry_date))
+            elif before[0] != updated_at:
+                events.append(event("updated", entry_id, entry_date, before[1]))
+        for entry_id in previous.keys() - seen.keys():
+            # Entries that merely aged out of the window are not deletions
+            entry_date = previous[entry_id][1]
+            if entry_date >= since:
+                events.append(event("deleted", entry_id, entry_date))
+        return events
+
+
+invalidator = Invalidator(journiv_client, entry_index, immich_client, journiv_mirror, mirror_worker)
+
+
+# The hook does not exist without INVALIDATION_HOOK_TOKEN
+require_hook_token = require_bearer_token(lambda: Config.INVALIDATION_HOOK_TOKEN, "Invalidation hooks")
+
+
+@router.post("/invalidate", response_model=dict, dependencies=[Depends(require_hook_token)])
+async def invalidate(request: InvalidationRequest):
+    """
+    Change notifications from Journiv (entries, mood logs, tags) or Immich
+    (assets), invalidating only what depends on them
+    """
+    try:
+        return await invalidator.apply(request.events)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error applying change events: {str(e)}")
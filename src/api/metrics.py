@@ -0,0 +1,139 @@
+import time
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.endpoints.immich.immich import immich_client, thumbnail_cache
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.api.response_cache import WARM_EXTENSION, response_cache
+from src.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUEST_UPSTREAM_TIME,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_RESPONSE_SIZE,
+    CallbackMetric,
+    registry,
+    upstream_time,
+)
+
+router = APIRouter(tags=["metrics"])
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def route_template(scope: Scope, status: int) -> str:
+    """
+    The matched route's path template including router prefixes, so that
+    `/api/immich/assets/<uuid>/thumbnail` is counted as one route.
+    """
+    route = getattr(scope.get("route"), "path", None)
+    if route is None:
+        # Served by a middleware (e.g. the response cache) before routing
+        return scope["path"] if status != 404 else "unmatched"
+    # Routes of included routers may carry their path without the prefix
+    depth = route.count("/")
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[: len(segments) - depth]) if len(segments) > depth + 1 else ""
+    return prefix + route
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, response size and upstream wait time of every
+    HTTP request, labelled by the matched route template (not the raw path).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Cache-warming requests are internal and would skew visitor latency
+        if scope["type"] != "http" or WARM_EXTENSION in (scope.get("extensions") or {}):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+        spent: Dict[str, float] = {}
+        token = upstream_time.set(spent)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.zerocopysend":
+                size += message.get("count") or 0
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            upstream_time.reset(token)
+
+            route_label = route_template(scope, status)
+            method = scope["method"]
+            HTTP_REQUESTS.inc((method, route_label, str(status)))
+            HTTP_REQUEST_DURATION.observe(elapsed, (method, route_label))
+            HTTP_RESPONSE_SIZE.observe(size, (method, route_label))
+            for upstream, seconds in spent.items():
+                HTTP_REQUEST_UPSTREAM_TIME.observe(seconds, (route_label, upstream))
+
+
+def _cache_stats() -> Dict[str, dict]:
+    return {
+        "response": response_cache.stats(),
+        "immich_search": immich_client.search_cache.stats(),
+        "immich_checksum": immich_client.checksum_cache.stats(),
+        "immich_thumbnail": thumbnail_cache.stats(),
+    }
+
+
+registry.register(CallbackMetric(
+    "cache_hits_total", "Cache hits by cache", ("cache",),
+    lambda: [((name,), stats["hits"]) for name, stats in _cache_stats().items()], type="counter",
+))
+registry.register(CallbackMetric(
+    "cache_misses_total", "Cache misses by cache", ("cache",),
+    lambda: [((name,), stats["misses"]) for name, stats in _cache_stats().items()], type="counter",
+))
+registry.register(CallbackMetric(
+    "cache_hit_ratio", "Hits over lookups since startup by cache", ("cache",),
+    lambda: [((name,), stats["hit_ratio"]) for name, stats in _cache_stats().items()],
+))
+registry.register(CallbackMetric(
+    "cache_entries", "Entries held by in-memory caches", ("cache",),
+    lambda: [((name,), stats["size"]) for name, stats in _cache_stats().items() if "size" in stats],
+))
+registry.register(CallbackMetric(
+    "thumbnail_cache_bytes", "Bytes of thumbnails on disk (known after the first write)", (),
+    lambda: [((), thumbnail_cache.stats()["bytes"])],
+))
+registry.register(CallbackMetric(
+    "singleflight_coalesced_total", "Upstream calls avoided by joining an identical in-flight call", ("upstream",),
+    lambda: [(("journiv",), journiv_client.singleflight.coalesced), (("immich",), immich_client.singleflight.coalesced)],
+    type="counter",
+))
+registry.register(CallbackMetric(
+    "upstream_circuit_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ("upstream",),
+    lambda: [
+        ((client.upstream.name,), BREAKER_STATES[client.upstream.breaker.state])
+        for client in (journiv_client, immich_client)
+    ],
+))
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus text exposition of the request, upstream and cache metrics
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
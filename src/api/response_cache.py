@@ -0,0 +1,220 @@
+import asyncio
+import contextvars
+import hashlib
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import Config
+from src.homelab_services.cache import TTLCache
+from src.logger import logger
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    stored_at: float
+    tags: FrozenSet[str] = frozenset()
+
+
+# ASGI scope extension marking in-process requests from the cache warmer
+WARM_EXTENSION = "response_cache.warm"
+
+# Shared so other parts of the app can inspect or invalidate cached responses
+response_cache = TTLCache(
+    maxsize=Config.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=Config.RESPONSE_CACHE_TTL + Config.RESPONSE_CACHE_SWR,
+)
+
+
+# Dependency tags collected while a cacheable response is being produced
+_response_tags: ContextVar[Optional[Set[str]]] = ContextVar("response_tags", default=None)
+
+# Recent invalidations as (sequence number, tags), so a response rendered
+# across one is not stored if it depends on what was invalidated
+_invalidation_seq = 0
+_recent_invalidations: Deque[Tuple[int, FrozenSet[str]]] = deque(maxlen=256)
+
+
+def tag_response(*tags: str) -> None:
+    """
+    Record what the response being rendered depends on, e.g. "entry:<id>",
+    "journal:<id>", "date:<YYYY-MM-DD>" or "tag:<id>", so it can later be
+    dropped by invalidate_tagged. A no-op outside a cached request.
+    """
+    collected = _response_tags.get()
+    if collected is not None:
+        collected.update(tags)
+
+
+def invalidate_tagged(tags: Iterable[str]) -> int:
+    """Drop every cached response carrying one of `tags`; returns how many"""
+    global _invalidation_seq
+    tags = frozenset(tags)
+    if not tags:
+        return 0
+    _invalidation_seq += 1
+    _recent_invalidations.append((_invalidation_seq, tags))
+    dropped = 0
+    for key in response_cache.keys():
+        cached: Optional[CachedResponse] = response_cache.get_stale(key)
+        if cached is not None and not tags.isdisjoint(cached.tags):
+            response_cache.invalidate(key)
+            dropped += 1
+    return dropped
+
+
+def _invalidated_since(seq: int, tags: FrozenSet[str]) -> bool:
+    """Whether any of `tags` was invalidated after invalidation number `seq`"""
+    if seq == _invalidation_seq or not tags:
+        return False
+    if not _recent_invalidations or _recent_invalidations[0][0] > seq + 1:
+        return True  # Too many invalidations since to tell
+    return any(n > seq and not tags.isdisjoint(dropped) for n, dropped in _recent_invalidations)
+
+
+async def _empty_receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class ResponseCacheMiddleware:
+    """
+    Stale-while-revalidate cache for idempotent GET endpoints.
+
+    Successful responses of the configured paths are kept in memory with a
+    strong ETag. Within `ttl` they are served as-is; up to `ttl + swr` they
+    are still served instantly while a single background task re-runs the
+    route to refresh them. `If-None-Match` is answered with 304. Requests
+    from the cache warmer refresh stale entries in the foreground instead.
+    Routes tag their responses (tag_response) so change notifications can
+    drop exactly the affected ones (invalidate_tagged).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Optional[Set[str]] = None,
+        ttl: float = Config.RESPONSE_CACHE_TTL,
+        swr: float = Config.RESPONSE_CACHE_SWR,
+        cache: Optional[TTLCache] = None,
+    ):
+        self.app = app
+        self.paths = paths if paths is not None else set(Config.RESPONSE_CACHE_PATHS)
+        self.ttl = ttl
+        self.swr = swr
+        self.cache = cache if cache is not None else response_cache
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @property
+    def cache_control(self) -> bytes:
+        return f"public, max-age={int(self.ttl)}, stale-while-revalidate={int(self.swr)}".encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._cache_key(scope)
+        cached: Optional[CachedResponse] = self.cache.get(key)
+        state = "HIT"
+
+        if cached is None:
+            state = "MISS"
+            cached = await self._fetch(scope, receive)
+            if cached is None:
+                return
+        elif time.monotonic() - cached.stored_at >= self.ttl:
+            if WARM_EXTENSION in (scope.get("extensions") or {}):
+                # The cache warmer waits for the refresh, so its concurrency cap holds
+                state = "REFRESH"
+                cached = await self._fetch(scope, receive)
+                if cached is None:
+                    return
+            else:
+                state = "STALE"
+                self._schedule_refresh(key, scope)
+
+        await self._send_cached(scope, send, cached, state)
+
+    @staticmethod
+    def _cache_key(scope: Scope) -> str:
+        query = b"&".join(sorted(scope.get("query_string", b"").split(b"&")))
+        return f"{scope['path']}?{query.decode('latin-1')}"
+
+    async def _fetch(self, scope: Scope, receive: Receive) -> Optional[CachedResponse]:
+        """Run the route, keeping its response if it is cacheable"""
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        seq = _invalidation_seq
+        tags: Set[str] = set()
+        token = _response_tags.set(tags)
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            _response_tags.reset(token)
+        body = b"".join(chunks)
+        if start is None:
+            return None
+
+        response = CachedResponse(
+            status=start["status"],
+            headers=[(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"],
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            stored_at=time.monotonic(),
+            tags=frozenset(tags),
+        )
+        # Errors are passed through to the caller but never cached, and neither
+        # is a response that may predate an invalidation of what it depends on
+        if response.status == 200 and not _invalidated_since(seq, response.tags):
+            self.cache.set(self._cache_key(scope), response)
+        return response
+
+    def _schedule_refresh(self, key: str, scope: Scope) -> None:
+        """Re-run the route in the background, at most once per key at a time"""
+        if key in self._refreshing:
+            return
+
+        async def refresh() -> None:
+            try:
+                await self._fetch(dict(scope), _empty_receive)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        # A fresh context, so the refresh does not inherit the triggering
+        # request's trace or upstream timing
+        self._refreshing[key] = asyncio.create_task(refresh(), context=contextvars.Context())
+
+    async def _send_cached(self, scope: Scope, send: Send, cached: CachedResponse, state: str) -> None:
+        headers = dict(scope.get("headers", []))
+        if_none_match = headers.get(b"if-none-match", b"").decode("latin-1")
+        cacheable = cached.status == 200
+        extra = [(b"x-cache", state.encode())]
+        if cacheable:
+            extra += [(b"etag", cached.etag.encode()), (b"cache-control", self.cache_control)]
+
+        if cacheable and cached.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            await send({"type": "http.response.start", "status": 304, "headers": extra})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        response_headers = cached.headers + [(b"content-length", str(len(cached.body)).encode())] + extra
+        await send({"type": "http.response.start", "status": cached.status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": cached.body})
@@ -1,10 +1,49 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from src.api.endpoints.immich.schemas import SearchAssetResponseDto
+from src.homelab_services.journiv.entry_index import make_cursor
+from src.homelab_services.journiv.schemas import EntryKey, MoodLogResponse, Tag
+
+class JournalEntryResponse(BaseModel):
+    id: str
+    title: str
+    content: str
+    entry_date: str
+    created_at: str
+    updated_at: str
+    mood: Optional[str] = None
+    tags: List[str] = []
 
 class BlogPost(BaseModel):
     id: str
     title: str
     content: str
+    entry_date: str
     created_at: str
-    media: Optional[SearchAssetResponseDto] = None
+    updated_at: str
+    mood: Optional[MoodLogResponse] = None
+    tags: List[Tag] = []
+    media: List[SearchAssetResponseDto] = []
+
+class BlogPostPage(BaseModel):
+    posts: List[BlogPost]
+    pagination: dict
+
+def build_pagination(
+    entries: List[EntryKey], offset: int, limit: int, total_count: int, with_cursor: bool = True
+) -> dict:
+    """
+    Pagination block shared by the paginated endpoints and the static build.
+    Pass `with_cursor=False` for results not in journal order (e.g. search
+    ranked by relevance), which a date cursor cannot resume.
+    """
+    total_pages = (total_count + limit - 1) // limit  # Ceiling division
+    has_next = offset + len(entries) < total_count
+    return {
+        "currentPage": offset // limit + 1,
+        "totalPages": total_pages,
+        "totalCount": total_count,
+        "hasNext": has_next,
+        "hasPrevious": offset > 0,
+        "nextCursor": make_cursor(entries[-1]) if with_cursor and has_next and entries else None
+    }
@@ -0,0 +1,126 @@
+import random
+import time
+from typing import Any
+from urllib.parse import parse_qs
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.auth import bearer_matches, require_bearer_token
+from src.api.metrics import route_template
+from src.config import Config
+from src.logger import logger
+from src.tracing import Trace, current_trace, span, trace_buffer
+
+require_admin_token = require_bearer_token(lambda: Config.ADMIN_TOKEN, "Admin endpoints")
+
+router = APIRouter(prefix="/admin/traces", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+TRUTHY = {"1", "true", "yes"}
+
+
+class TracingMiddleware:
+    """
+    Records a span trace for a request when it is asked for (`X-Trace: 1`
+    header or `?trace=1`, together with the ADMIN_TOKEN bearer token),
+    randomly sampled (TRACE_SAMPLE_RATE), or turns out slower than
+    TRACE_SLOW_REQUEST_SECONDS. Kept traces go to the in-memory ring
+    buffer behind /api/admin/traces.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        slow_threshold: float = Config.TRACE_SLOW_REQUEST_SECONDS,
+        sample_rate: float = Config.TRACE_SAMPLE_RATE,
+    ):
+        self.app = app
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def _requested(scope: Scope) -> bool:
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if not bearer_matches(authorization, Config.ADMIN_TOKEN):
+            return False
+        if b"x-trace" in headers:
+            return headers[b"x-trace"].decode("latin-1").lower() in TRUTHY
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return any(value.lower() in TRUTHY for value in query.get("trace", []))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith("/api/admin/traces"):
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._requested(scope)
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (forced or sampled or self.slow_threshold > 0):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}", forced=forced)
+        token = current_trace.set(trace)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                if forced:
+                    MutableHeaders(scope=message)["X-Trace-Id"] = trace.trace_id
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            with span(trace.name, "request") as attrs:
+                await self.app(scope, receive, send_wrapper)
+                attrs["status"] = trace.status
+        finally:
+            trace.duration = time.perf_counter() - start
+            current_trace.reset(token)
+            trace.name = f"{scope['method']} {route_template(scope, trace.status or 500)}"
+
+            slow = self.slow_threshold > 0 and trace.duration >= self.slow_threshold
+            if forced or sampled or slow:
+                trace_buffer.add(trace)
+            if slow:
+                logger.warning(f"Slow request {trace.name} took {trace.duration:.2f}s, trace {trace.trace_id}")
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse whose rendering shows up as a serialization span"""
+
+    def render(self, content: Any) -> bytes:
+        with span("render json", "serialization") as attrs:
+            body = super().render(content)
+            attrs["bytes"] = len(body)
+        return body
+
+
+@router.get("", response_model=list)
+async def list_traces():
+    """
+    Kept request traces, newest first
+    """
+    return trace_buffer.list()
+
+
+@router.get("/{trace_id}")
+async def get_trace(trace_id: str):
+    """
+    One trace as Chrome trace JSON (open in chrome://tracing or ui.perfetto.dev)
+    """
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return JSONResponse(trace.to_chrome(), headers={"Content-Disposition": f'inline; filename="trace-{trace_id}.json"'})
+
+
+@router.delete("", status_code=204)
+async def clear_traces():
+    """
+    Empty the trace buffer
+    """
+    trace_buffer.clear()
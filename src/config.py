@@ -10,4 +10,128 @@ class Config:
     JOURNIV_EMAIL = os.getenv("JOURNIV_EMAIL")
     JOURNIV_PASSWORD = os.getenv("JOURNIV_PASSWORD")
     JOURNIV_JOURNAL_NAME = os.getenv("JOURNIV_JOURNAL_NAME")
-    JOURNIV_JOURNAL_ID = os.getenv("JOURNIV_JOURNAL_ID")
\ No newline at end of file
+    JOURNIV_JOURNAL_ID = os.getenv("JOURNIV_JOURNAL_ID")
+
+    # Journiv HTTP connection pool
+    JOURNIV_TIMEOUT = float(os.getenv("JOURNIV_TIMEOUT", "15"))
+    JOURNIV_CONNECT_TIMEOUT = float(os.getenv("JOURNIV_CONNECT_TIMEOUT", "5"))
+    JOURNIV_MAX_CONNECTIONS = int(os.getenv("JOURNIV_MAX_CONNECTIONS", "20"))
+    JOURNIV_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("JOURNIV_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    JOURNIV_KEEPALIVE_EXPIRY = float(os.getenv("JOURNIV_KEEPALIVE_EXPIRY", "30"))
+    # Seconds before the access token's `exp` at which it is refreshed
+    JOURNIV_TOKEN_REFRESH_MARGIN = float(os.getenv("JOURNIV_TOKEN_REFRESH_MARGIN", "60"))
+
+    # Seconds a journal's pagination index is trusted before being refreshed from the newest
+    # entries, and between full rebuilds that also catch deletions further back
+    JOURNIV_INDEX_TTL = float(os.getenv("JOURNIV_INDEX_TTL", "300"))
+    JOURNIV_INDEX_FULL_REBUILD_INTERVAL = float(os.getenv("JOURNIV_INDEX_FULL_REBUILD_INTERVAL", "3600"))
+
+    # In-process entry-by-date and has-mood-log index: seconds it is trusted
+    # before a reload, and the largest journal it will hold
+    JOURNIV_LOOKUP_TTL = float(os.getenv("JOURNIV_LOOKUP_TTL", "600"))
+    JOURNIV_LOOKUP_MAX_ENTRIES = int(os.getenv("JOURNIV_LOOKUP_MAX_ENTRIES", "50000"))
+
+    # Offset windows fetched in parallel when walking a paginated endpoint
+    JOURNIV_PAGE_CONCURRENCY = int(os.getenv("JOURNIV_PAGE_CONCURRENCY", "4"))
+    # Per-entry calls (e.g. entry tags) in flight at once
+    JOURNIV_FANOUT_CONCURRENCY = int(os.getenv("JOURNIV_FANOUT_CONCURRENCY", "8"))
+
+    # Local SQLite mirror of Journiv, kept current by a background sync
+    JOURNIV_MIRROR_ENABLED = os.getenv("JOURNIV_MIRROR_ENABLED", "false").lower() == "true"
+    JOURNIV_MIRROR_PATH = os.getenv("JOURNIV_MIRROR_PATH", "data/journiv_mirror.sqlite3")
+    JOURNIV_MIRROR_SYNC_INTERVAL = float(os.getenv("JOURNIV_MIRROR_SYNC_INTERVAL", "120"))
+    JOURNIV_MIRROR_FULL_SYNC_INTERVAL = float(os.getenv("JOURNIV_MIRROR_FULL_SYNC_INTERVAL", "21600"))
+    JOURNIV_MIRROR_LOOKBACK_DAYS = int(os.getenv("JOURNIV_MIRROR_LOOKBACK_DAYS", "7"))
+
+    # Immich HTTP connection pool and search cache
+    IMMICH_HTTP2 = os.getenv("IMMICH_HTTP2", "true").lower() == "true"
+    IMMICH_TIMEOUT = float(os.getenv("IMMICH_TIMEOUT", "30"))
+    IMMICH_CONNECT_TIMEOUT = float(os.getenv("IMMICH_CONNECT_TIMEOUT", "5"))
+    IMMICH_MAX_CONNECTIONS = int(os.getenv("IMMICH_MAX_CONNECTIONS", "20"))
+    IMMICH_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("IMMICH_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    IMMICH_KEEPALIVE_EXPIRY = float(os.getenv("IMMICH_KEEPALIVE_EXPIRY", "30"))
+    IMMICH_CACHE_MAX_ENTRIES = int(os.getenv("IMMICH_CACHE_MAX_ENTRIES", "512"))
+    IMMICH_CACHE_TTL_PAST = float(os.getenv("IMMICH_CACHE_TTL_PAST", "86400"))
+    IMMICH_CACHE_TTL_RECENT = float(os.getenv("IMMICH_CACHE_TTL_RECENT", "60"))
+    IMMICH_THUMBNAIL_CACHE_DIR = os.getenv("IMMICH_THUMBNAIL_CACHE_DIR", "data/thumbnails")
+    IMMICH_THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv("IMMICH_THUMBNAIL_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    IMMICH_SEARCH_PAGE_SIZE = int(os.getenv("IMMICH_SEARCH_PAGE_SIZE", "250"))
+    # Most search result pages held in memory while streaming assets
+    IMMICH_STREAM_MAX_PAGES = int(os.getenv("IMMICH_STREAM_MAX_PAGES", "2"))
+    # Multi-date lookups: dates further apart than this go in separate
+    # searches, and no search spans more than IMMICH_BATCH_MAX_WINDOW_DAYS
+    IMMICH_BATCH_MAX_GAP_DAYS = int(os.getenv("IMMICH_BATCH_MAX_GAP_DAYS", "2"))
+    IMMICH_BATCH_MAX_WINDOW_DAYS = int(os.getenv("IMMICH_BATCH_MAX_WINDOW_DAYS", "14"))
+    IMMICH_BATCH_MAX_DAYS = int(os.getenv("IMMICH_BATCH_MAX_DAYS", "366"))
+
+    # Years looked back by the "on this day" asset search
+    IMMICH_ON_THIS_DAY_YEARS = int(os.getenv("IMMICH_ON_THIS_DAY_YEARS", "10"))
+
+    # Upstream calls in flight at once while assembling a page of blog posts
+    BLOG_UPSTREAM_CONCURRENCY = int(os.getenv("BLOG_UPSTREAM_CONCURRENCY", "8"))
+
+    # Stale-while-revalidate response cache for the public GET endpoints
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+    RESPONSE_CACHE_SWR = float(os.getenv("RESPONSE_CACHE_SWR", "300"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+    RESPONSE_CACHE_PATHS = os.getenv(
+        "RESPONSE_CACHE_PATHS",
+        "/api/journal-entries,/api/journal-entries/paginated,/api/blog-posts,"
+        "/api/stats/summary,/api/stats/entries,/api/stats/moods,/api/stats/photos,/api/stats/tags,"
+        "/api/stats/rolling,/api/stats/correlation",
+    ).split(",")
+
+    # Upstream resilience: retries for idempotent calls and the circuit breaker
+    UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+    UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.2"))
+    UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "2"))
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", "5"))
+    UPSTREAM_BREAKER_RESET_TIMEOUT = float(os.getenv("UPSTREAM_BREAKER_RESET_TIMEOUT", "30"))
+    # Per-operation timeout overrides, e.g. "journiv.entries=5,immich.search=15"
+    UPSTREAM_TIMEOUTS = {
+        key.strip(): float(seconds)
+        for key, seconds in (item.split("=") for item in os.getenv("UPSTREAM_TIMEOUTS", "").split(",") if item)
+    }
+
+    # Background cache warmer for the first pages, their days' photos and "on this day";
+    # off unless enabled, since it polls both upstreams around the clock
+    CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER_ENABLED", "false").lower() == "true"
+    CACHE_WARMER_INTERVAL = float(os.getenv("CACHE_WARMER_INTERVAL", "60"))
+    CACHE_WARMER_JITTER = float(os.getenv("CACHE_WARMER_JITTER", "15"))
+    CACHE_WARMER_INITIAL_DELAY = float(os.getenv("CACHE_WARMER_INITIAL_DELAY", "10"))
+    CACHE_WARMER_CONCURRENCY = int(os.getenv("CACHE_WARMER_CONCURRENCY", "2"))
+    CACHE_WARMER_PAGES = int(os.getenv("CACHE_WARMER_PAGES", "3"))
+    CACHE_WARMER_PAGE_SIZE = int(os.getenv("CACHE_WARMER_PAGE_SIZE", "10"))
+    CACHE_WARMER_PATHS = os.getenv("CACHE_WARMER_PATHS", "/api/journal-entries/paginated,/api/blog-posts").split(",")
+
+    # Change notifications: POST /api/hooks/invalidate with "Authorization: Bearer <token>".
+    # Without a token, Journiv is probed every INVALIDATION_PROBE_INTERVAL seconds (0 disables)
+    # for entries dated in the last INVALIDATION_PROBE_DAYS days whose updated_at moved
+    INVALIDATION_HOOK_TOKEN = os.getenv("INVALIDATION_HOOK_TOKEN")
+    INVALIDATION_PROBE_INTERVAL = float(os.getenv("INVALIDATION_PROBE_INTERVAL", "60"))
+    INVALIDATION_PROBE_DAYS = int(os.getenv("INVALIDATION_PROBE_DAYS", "30"))
+
+    # Columns behind /api/stats are reloaded after this long (or on a change notification)
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "900"))
+    # Photos behind the statistics are searched in windows of this many days, this many at once;
+    # a reload re-searches only windows that are new, changed, still filling up or older than the TTL
+    STATS_PHOTO_WINDOW_DAYS = int(os.getenv("STATS_PHOTO_WINDOW_DAYS", "31"))
+    STATS_PHOTO_CONCURRENCY = int(os.getenv("STATS_PHOTO_CONCURRENCY", "4"))
+    STATS_PHOTO_WINDOW_TTL = float(os.getenv("STATS_PHOTO_WINDOW_TTL", "86400"))
+
+    # Bearer token for /api/admin/traces and for forcing a trace with `X-Trace: 1` / `?trace=1`;
+    # without it both are off
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+    # Request tracing, besides forced traces: a TRACE_SAMPLE_RATE fraction of requests, and
+    # requests slower than TRACE_SLOW_REQUEST_SECONDS. Slow-request tracing has to record spans
+    # for every request to keep the slow ones, so it is off (0) unless set
+    TRACE_SLOW_REQUEST_SECONDS = float(os.getenv("TRACE_SLOW_REQUEST_SECONDS", "0"))
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "50"))
+
+    # Keys whose coalesced-caller counts are kept for the single-flight stats
+    SINGLEFLIGHT_MAX_TRACKED_KEYS = int(os.getenv("SINGLEFLIGHT_MAX_TRACKED_KEYS", "500"))
+
+    # Output of `python -m src.static_site.build`
+    STATIC_SITE_DIR = os.getenv("STATIC_SITE_DIR", "data-driven-blog-fe/public/static-api")
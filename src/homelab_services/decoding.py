@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import List, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+from src.tracing import span
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[M]) -> TypeAdapter:
+    """Cached TypeAdapter for List[model]; building one per call is costly"""
+    return TypeAdapter(List[model])
+
+
+def decode_list(content: bytes, model: Type[M]) -> List[M]:
+    """
+    Validate a JSON array straight from response bytes.
+
+    Skips the intermediate `response.json()` dicts, and fields that `model`
+    does not declare are never turned into Python objects, so projected
+    models only pay for what they keep.
+    """
+    with span(f"validate List[{model.__name__}]", "validation", bytes=len(content)) as attrs:
+        items = list_adapter(model).validate_json(content)
+        attrs["items"] = len(items)
+    return items
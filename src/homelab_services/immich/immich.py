@@ -0,0 +1,338 @@
+import asyncio
+import json
+from contextlib import aclosing
+from datetime import date, datetime, time, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple, Type, TypeVar, Union
+
+import httpx
+
+from src.api.endpoints.immich.schemas import AssetOrder, AssetsByDate, AssetSummary, SearchAssetResponseDto, SearchAssetsRequest, SearchMetadataResponse, SearchMetadataSummaryResponse
+from src.config import Config
+from src.homelab_services.cache import TTLCache
+from src.homelab_services.resilience import UPSTREAM_ERRORS, Upstream
+from src.homelab_services.singleflight import SingleFlight
+from src.logger import logger
+from src.tracing import span
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Search response model to validate into: full, or the lean projection
+R = TypeVar("R", SearchMetadataResponse, SearchMetadataSummaryResponse)
+
+
+def date_windows(
+    days: List[date],
+    max_gap: int = Config.IMMICH_BATCH_MAX_GAP_DAYS,
+    max_span: int = Config.IMMICH_BATCH_MAX_WINDOW_DAYS,
+) -> List[Tuple[date, date]]:
+    """
+    Sorted, distinct days merged into (first, last) windows: a day joins the
+    current window when it is at most `max_gap` days after the window's last
+    day and the window would still span at most `max_span` days. Sparse days
+    get windows of their own instead of searching every day in between.
+    """
+    windows: List[Tuple[date, date]] = []
+    for day in days:
+        if windows:
+            start, end = windows[-1]
+            if (day - end).days <= max_gap and (day - start).days < max_span:
+                windows[-1] = (start, day)
+                continue
+        windows.append((day, day))
+    return windows
+
+
+class ImmichAPIError(Exception):
+    """Non-success response from the Immich API"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"Immich API error: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ImmichClient:
+    def __init__(self):
+        self.base_url = Config.IMMICH_BASE_URL
+        self.api_key = Config.IMMICH_API_KEY
+        self._http: Optional[httpx.AsyncClient] = None
+        self.search_cache = TTLCache(maxsize=Config.IMMICH_CACHE_MAX_ENTRIES, ttl=Config.IMMICH_CACHE_TTL_RECENT)
+        self.singleflight = SingleFlight()
+        self.checksum_cache = TTLCache(maxsize=Config.IMMICH_CACHE_MAX_ENTRIES * 8, ttl=Config.IMMICH_CACHE_TTL_PAST)
+        self.upstream = Upstream(
+            "immich",
+            timeouts={"asset_info": 10.0, "thumbnail": 15.0},
+            default_timeout=Config.IMMICH_TIMEOUT,
+            connect_timeout=Config.IMMICH_CONNECT_TIMEOUT,
+        )
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Long-lived pooled HTTP client (HTTP/2 when `h2` is installed)"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url or "",
+                headers={
+                    "Accept": "application/json",
+                    "x-api-key": self.api_key or "",
+                },
+                http2=Config.IMMICH_HTTP2 and HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(Config.IMMICH_TIMEOUT, connect=Config.IMMICH_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=Config.IMMICH_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.IMMICH_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.IMMICH_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and its connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @staticmethod
+    def _cache_ttl(search_request: SearchAssetsRequest) -> float:
+        """Searches bounded entirely in the past are cached much longer"""
+        before = search_request.takenBefore or search_request.createdBefore
+        if before is None:
+            return Config.IMMICH_CACHE_TTL_RECENT
+        now = datetime.now(timezone.utc) if before.tzinfo else datetime.now()
+        if before < now:
+            return Config.IMMICH_CACHE_TTL_PAST
+        return Config.IMMICH_CACHE_TTL_RECENT
+
+    async def search_metadata(
+        self,
+        search_request: SearchAssetsRequest,
+        use_cache: bool = True,
+        model: Type[R] = SearchMetadataResponse,
+    ) -> R:
+        """
+        POST /api/search/metadata, served from the TTL/LRU cache when possible.
+        The body is validated straight from bytes into `model`; pass
+        SearchMetadataSummaryResponse to skip albums and unused asset fields.
+        If Immich is unreachable, an expired cached result is served instead.
+        """
+        payload = search_request.model_dump(exclude_none=True, mode='json')
+        key = f"{model.__name__}:{json.dumps(payload, sort_keys=True)}"
+
+        if use_cache:
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> R:
+            # Searches are read-only, so they are retried like GETs
+            response = await self.upstream.call(
+                "search", lambda timeout: self.http.post("/api/search/metadata", json=payload, timeout=timeout)
+            )
+            if response.status_code != 200:
+                raise ImmichAPIError(response.status_code, response.text)
+            with span(f"validate {model.__name__}", "validation", bytes=len(response.content)):
+                return model.model_validate_json(response.content)
+
+        # Identical concurrent searches share one upstream call
+        try:
+            result = await self.singleflight.do(key, fetch)
+        except (*UPSTREAM_ERRORS, ImmichAPIError) as e:
+            stale = self.search_cache.get_stale(key) if use_cache else None
+            if stale is None or (isinstance(e, ImmichAPIError) and e.status_code < 500):
+                raise
+            logger.warning(f"Serving stale Immich search result: {e}")
+            return stale
+        if use_cache:
+            self.search_cache.set(key, result, ttl=self._cache_ttl(search_request))
+        return result
+
+    def invalidate_day(self, day: str) -> int:
+        """
+        Drop cached searches whose takenAfter/takenBefore window includes
+        `day` (YYYY-MM-DD), e.g. after photos of that day were added or
+        removed; returns how many were dropped
+        """
+        dropped = 0
+        for key in self.search_cache.keys():
+            payload = json.loads(key.split(":", 1)[1])
+            after = payload.get("takenAfter", "")[:10]
+            before = payload.get("takenBefore", "\uffff")[:10]
+            if after <= day <= before:
+                self.search_cache.invalidate(key)
+                dropped += 1
+        return dropped
+
+    async def iter_asset_pages(
+        self,
+        search_request: SearchAssetsRequest,
+        prefetch: bool = False,
+        max_pages: int = Config.IMMICH_STREAM_MAX_PAGES,
+        use_cache: bool = True,
+        model: Type[R] = SearchMetadataResponse,
+    ) -> AsyncIterator[R]:
+        """
+        Yield search result pages by following `nextPage`.
+
+        With `prefetch`, a background task fetches ahead while the caller
+        consumes, but never more than `max_pages` pages are held at once
+        (counting the one being consumed).
+        """
+        page = search_request.page or 1
+
+        if not prefetch:
+            while page:
+                result = await self.search_metadata(search_request.model_copy(update={"page": page}), use_cache, model)
+                yield result
+                page = result.assets.nextPage
+            return
+
+        # A slot is taken before a page is fetched and given back once the
+        # caller has moved past it, which bounds fetched-but-unconsumed pages
+        slots = asyncio.Semaphore(max(max_pages, 1))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce(page: Optional[int]) -> None:
+            try:
+                while page:
+                    await slots.acquire()
+                    result = await self.search_metadata(search_request.model_copy(update={"page": page}), use_cache, model)
+                    queue.put_nowait(result)
+                    page = result.assets.nextPage
+                queue.put_nowait(None)
+            except Exception as e:
+                queue.put_nowait(e)
+
+        producer = asyncio.create_task(produce(page))
+        try:
+            while True:
+                result = await queue.get()
+                if result is None:
+                    return
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+                slots.release()
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def iter_assets(
+        self,
+        search_request: SearchAssetsRequest,
+        prefetch: bool = False,
+        max_pages: int = Config.IMMICH_STREAM_MAX_PAGES,
+        use_cache: bool = True,
+        model: Type[R] = SearchMetadataResponse,
+    ) -> AsyncIterator[Union[SearchAssetResponseDto, AssetSummary]]:
+        """Yield every asset of a search, page by page, as pages arrive"""
+        pages = self.iter_asset_pages(
+            search_request, prefetch=prefetch, max_pages=max_pages, use_cache=use_cache, model=model
+        )
+        async with aclosing(pages):
+            async for result in pages:
+                for asset in result.assets.items:
+                    yield asset
+
+    async def search_all_metadata(self, search_request: SearchAssetsRequest) -> SearchMetadataResponse:
+        """Like search_metadata, but with the assets of every page merged"""
+        first: Optional[SearchMetadataResponse] = None
+        assets: List[SearchAssetResponseDto] = []
+        pages = self.iter_asset_pages(search_request)
+        async with aclosing(pages):
+            async for result in pages:
+                first = first or result
+                assets.extend(result.assets.items)
+        merged = first.assets.model_copy(update={"items": assets, "count": len(assets), "nextPage": None})
+        return first.model_copy(update={"assets": merged})
+
+    @staticmethod
+    def local_day(asset: Union[SearchAssetResponseDto, AssetSummary]) -> str:
+        """Day the asset was taken in its own timezone"""
+        taken = asset.localDateTime or asset.fileCreatedAt
+        return taken.date().isoformat()
+
+    async def search_all_assets(self, search_request: SearchAssetsRequest) -> List[SearchAssetResponseDto]:
+        """Run a search and follow `nextPage` until every asset is collected"""
+        return [asset async for asset in self.iter_assets(search_request)]
+
+    async def search_assets_by_dates(self, dates: List[date], with_exif: bool = True) -> AssetsByDate:
+        """
+        Assets for several days with as few searches as possible.
+
+        Dates are merged into windows by `date_windows`, each window is
+        fetched with one widened takenAfter/takenBefore search, and the
+        assets are grouped by their local day. Windows are padded by a day on
+        each side so assets whose UTC timestamp falls on a neighbouring day
+        are not missed.
+        """
+        days = sorted(set(dates))
+        wanted = {day.isoformat() for day in days}
+        grouped: AssetsByDate = {day: [] for day in sorted(wanted)}
+        if not days:
+            return grouped
+
+        windows = date_windows(days)
+        searches = [
+            self.search_all_assets(SearchAssetsRequest(
+                takenAfter=datetime.combine(start - timedelta(days=1), time.min),
+                takenBefore=datetime.combine(end + timedelta(days=1), time.max),
+                withExif=with_exif,
+                order=AssetOrder.ASC,
+                size=Config.IMMICH_SEARCH_PAGE_SIZE,
+            ))
+            for start, end in windows
+        ]
+        for assets in await asyncio.gather(*searches):
+            for asset in assets:
+                day = self.local_day(asset)
+                if day in wanted:
+                    grouped[day].append(asset)
+        return grouped
+
+    async def get_asset_checksum(self, asset_id: str) -> str:
+        """Checksum of an asset, from GET /api/assets/{id} (cached)"""
+        checksum = self.checksum_cache.get(asset_id)
+        if checksum is not None:
+            return checksum
+
+        async def fetch() -> str:
+            response = await self.upstream.call(
+                "asset_info", lambda timeout: self.http.get(f"/api/assets/{asset_id}", timeout=timeout)
+            )
+            if response.status_code != 200:
+                raise ImmichAPIError(response.status_code, response.text)
+            return response.json()["checksum"]
+
+        try:
+            checksum = await self.singleflight.do(("checksum", asset_id), fetch)
+        except UPSTREAM_ERRORS:
+            # Checksums never change for an asset, so an expired one is still good
+            checksum = self.checksum_cache.get_stale(asset_id)
+            if checksum is None:
+                raise
+            return checksum
+        self.checksum_cache.set(asset_id, checksum)
+        return checksum
+
+    async def open_thumbnail(self, asset_id: str, size: str = "thumbnail") -> httpx.Response:
+        """
+        Start downloading a thumbnail without reading the body; the caller
+        must consume it with `aiter_bytes()` and close it with `aclose()`.
+        """
+        def send(timeout: httpx.Timeout):
+            request = self.http.build_request(
+                "GET", f"/api/assets/{asset_id}/thumbnail", params={"size": size},
+                headers={"Accept": "image/*"}, timeout=timeout,
+            )
+            return self.http.send(request, stream=True)
+
+        response = await self.upstream.call("thumbnail", send)
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            raise ImmichAPIError(response.status_code, response.text)
+        return response
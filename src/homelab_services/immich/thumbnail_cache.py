@@ -0,0 +1,164 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.config import Config
+from src.logger import logger
+
+# Next to each cached file, the Content-Type Immich served it with
+TYPE_SUFFIX = ".type"
+
+
+class ThumbnailCache:
+    """
+    Content-addressed on-disk cache for Immich thumbnails.
+
+    Files are keyed by a hash of the asset checksum and thumbnail size, so
+    an edited asset (new checksum) never serves a stale image. Total size is
+    bounded by `max_bytes`; eviction removes the least recently used files
+    first. Reads are tracked in memory rather than by touching the file, so
+    a file's mtime (and the Last-Modified it is served with) stays put.
+    Downloads are streamed into a temp file next to their final path and
+    renamed into place once complete, with their content type beside them.
+    """
+
+    def __init__(self, directory: str = Config.IMMICH_THUMBNAIL_CACHE_DIR, max_bytes: int = Config.IMMICH_THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes: Optional[int] = None
+        self._last_used: Dict[str, float] = {}  # path -> time of last read this process
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(checksum: str, size: str) -> str:
+        return hashlib.sha256(f"{checksum}:{size}".encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """Path and content type of a cached thumbnail, marking it as recently used"""
+        path = self.path(key)
+        try:
+            with open(path + TYPE_SUFFIX) as f:
+                media_type = f.read()
+        except FileNotFoundError:
+            media_type = None
+        if media_type is None or not os.path.exists(path):
+            self.misses += 1
+            return None
+        self._last_used[path] = time.time()
+        self.hits += 1
+        return path, media_type
+
+    def begin(self, key: str) -> "PendingThumbnail":
+        """Start writing a thumbnail; blocking, like every PendingThumbnail method"""
+        return PendingThumbnail(self, key)
+
+    def _commit(self, pending: "PendingThumbnail", media_type: str) -> None:
+        """Move a finished download into place and evict if over budget"""
+        path = pending.path
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            # The type goes first, so a file in place always has one
+            with open(path + TYPE_SUFFIX, "w") as f:
+                f.write(media_type)
+            os.replace(pending.temp_path, path)
+            self._last_used[path] = time.time()
+            self._total_bytes += pending.size - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith((".part", TYPE_SUFFIX)):
+                    yield os.path.join(root, name)
+
+    def _scan_size(self) -> int:
+        return sum(os.path.getsize(path) for path in self._files())
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache is 90% full"""
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((self._last_used.get(path, stat.st_mtime), stat.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            for stale in (path, path + TYPE_SUFFIX):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            self._last_used.pop(path, None)
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        logger.info(f"Evicted {removed} thumbnails, cache now {total} bytes")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class PendingThumbnail:
+    """
+    A thumbnail being downloaded into a temp file of its own, so concurrent
+    downloads of one thumbnail never interleave; whichever commits last
+    wins, and the bytes are identical anyway. Every method blocks; run them
+    in a worker thread.
+    """
+
+    def __init__(self, cache: ThumbnailCache, key: str):
+        self.cache = cache
+        self.path = cache.path(key)
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        self.file = os.fdopen(fd, "wb")
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self, media_type: str) -> None:
+        try:
+            self.file.close()
+            self.cache._commit(self, media_type)
+        except OSError:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
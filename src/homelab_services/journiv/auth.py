@@ -0,0 +1,108 @@
+import asyncio
+import base64
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Optional
+
+from src.config import Config
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.homelab_services.journiv.journiv import JournivClient
+
+
+class JournivAuthError(Exception):
+    """Raised when neither a token refresh nor a fresh login succeeds"""
+
+
+@dataclass
+class AuthMetrics:
+    logins: int = 0
+    login_failures: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    auth_retries: int = 0
+
+
+def get_token_expiry(token: str) -> Optional[float]:
+    """Read the `exp` claim (epoch seconds) from a JWT without verifying it"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class JournivTokenManager:
+    """
+    Keeps the Journiv session of a shared client alive.
+
+    Logs in once, refreshes the access token shortly before its `exp` and
+    serializes renewals behind a lock, so concurrent requests that find the
+    token expired (or get a 401) trigger a single refresh between them.
+    """
+
+    def __init__(self, client: "JournivClient", refresh_margin: float = Config.JOURNIV_TOKEN_REFRESH_MARGIN):
+        self.client = client
+        self.refresh_margin = refresh_margin
+        self.expires_at: Optional[float] = None
+        self.metrics = AuthMetrics()
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, token: Optional[str]) -> bool:
+        if not token:
+            return False
+        if self.expires_at is None:
+            return True
+        return time.time() < self.expires_at - self.refresh_margin
+
+    async def get_token(self) -> str:
+        """Return a valid access token, logging in or refreshing if needed"""
+        token = self.client.access_token
+        if self._is_fresh(token):
+            return token
+
+        async with self._lock:
+            # Another task may have renewed the token while we waited
+            token = self.client.access_token
+            if self._is_fresh(token):
+                return token
+            return await self._renew()
+
+    async def handle_unauthorized(self, stale_token: Optional[str]) -> str:
+        """Renew after a 401, unless another task already replaced `stale_token`"""
+        self.metrics.auth_retries += 1
+        async with self._lock:
+            token = self.client.access_token
+            if token and token != stale_token:
+                return token
+            return await self._renew()
+
+    async def _renew(self) -> str:
+        if self.client.refresh_token:
+            if await self.client.refresh_access_token():
+                self.metrics.refreshes += 1
+                return self._store_expiry()
+            self.metrics.refresh_failures += 1
+            logger.warning("Journiv token refresh failed, logging in again")
+
+        if await self.client.login():
+            self.metrics.logins += 1
+            return self._store_expiry()
+
+        self.metrics.login_failures += 1
+        raise JournivAuthError("Failed to authenticate with Journiv")
+
+    def _store_expiry(self) -> str:
+        token = self.client.access_token
+        self.expires_at = get_token_expiry(token)
+        return token
+
+    def get_metrics(self) -> dict:
+        """Counters plus the remaining lifetime of the current access token"""
+        metrics = asdict(self.metrics)
+        metrics["expires_in"] = round(self.expires_at - time.time(), 1) if self.expires_at else None
+        return metrics
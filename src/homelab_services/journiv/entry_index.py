@@ -0,0 +1,198 @@
+import asyncio
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from src.config import Config
+from src.homelab_services.journiv.schemas import EntryKey
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.homelab_services.journiv.journiv import JournivClient
+
+
+def parse_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Split an `<entry_date>,<id>` keyset cursor. A cursor means "the entries
+    sorting after (entry_date, id), newest first" whichever backend serves
+    the page, so it survives the entry being deleted or a switch between
+    the Journiv index and the mirror.
+    """
+    entry_date, sep, entry_id = cursor.partition(",")
+    if not sep or not entry_date or not entry_id:
+        raise ValueError("Cursor must look like '<entry_date>,<id>'")
+    return entry_date, entry_id
+
+
+def make_cursor(entry: EntryKey) -> str:
+    return f"{entry.entry_date},{entry.id}"
+
+
+@dataclass
+class JournalIndex:
+    """Ordered entry IDs of one journal, in the order Journiv pages them"""
+    journal_id: str
+    ids: List[str]
+    dates: List[str]
+    watermark: str  # Highest updated_at seen when the index was built
+    built_at: float = field(default_factory=time.monotonic)
+    full_built_at: float = field(default_factory=time.monotonic)  # Last time every page was read
+    positions: Dict[str, int] = field(init=False)
+    keys: List[Tuple[str, str]] = field(init=False)  # (entry_date, id), ascending
+
+    def __post_init__(self):
+        self.positions = {entry_id: i for i, entry_id in enumerate(self.ids)}
+        self.keys = sorted(zip(self.dates, self.ids))
+
+    @classmethod
+    def from_entries(cls, journal_id: str, entries: List[EntryKey]) -> "JournalIndex":
+        return cls(
+            journal_id=journal_id,
+            ids=[entry.id for entry in entries],
+            dates=[entry.entry_date for entry in entries],
+            watermark=max((entry.updated_at for entry in entries), default=""),
+        )
+
+    @property
+    def total_count(self) -> int:
+        return len(self.ids)
+
+    def offset_after(self, cursor: str) -> int:
+        """
+        Offset of the first entry following a keyset cursor: right after the
+        cursor's entry when it is still where the cursor says, otherwise the
+        number of entries sorting at or before (entry_date, id) newest first,
+        as the mirror counts it
+        """
+        entry_date, entry_id = parse_cursor(cursor)
+        position = self.positions.get(entry_id)
+        if position is not None and self.dates[position] == entry_date:
+            return position + 1
+        return len(self.keys) - bisect_left(self.keys, (entry_date, entry_id))
+
+    def matches_page(self, offset: int, entries: List[EntryKey]) -> bool:
+        """Whether a freshly fetched page agrees with the index (edits that keep the date do not matter)"""
+        return (
+            [entry.id for entry in entries] == self.ids[offset:offset + len(entries)]
+            and [entry.entry_date for entry in entries] == self.dates[offset:offset + len(entries)]
+        )
+
+    def aligned_at(self, entries: List[EntryKey]) -> Optional[int]:
+        """
+        Where a non-empty page fetched now lines up, unchanged, with the
+        index: same IDs and dates in the same order, nothing updated past
+        the watermark. None if it does not.
+        """
+        start = self.positions.get(entries[0].id)
+        if start is None or any(entry.updated_at > self.watermark for entry in entries):
+            return None
+        return start if self.matches_page(start, entries) else None
+
+
+class JournalIndexCache:
+    """
+    Per-journal entry indexes used to paginate without re-downloading the
+    journal for every page.
+
+    Once an index is older than `ttl`, or has been marked stale, it is
+    refreshed from the head of the journal: pages are read from offset 0
+    until one lines up with the old index, and the rest of the old index is
+    kept. New and recently edited entries sort first, so that is usually a
+    single page. Every `full_rebuild_interval`, or when dropped with
+    `invalidate(full=True)` (or still disagreeing with Journiv after a
+    refresh), the whole journal is read again to pick up deletions and
+    moves further back.
+    """
+
+    def __init__(
+        self,
+        client: "JournivClient",
+        ttl: float = Config.JOURNIV_INDEX_TTL,
+        full_rebuild_interval: float = Config.JOURNIV_INDEX_FULL_REBUILD_INTERVAL,
+        page_size: int = 100,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.full_rebuild_interval = full_rebuild_interval
+        self.page_size = page_size
+        self._indexes: Dict[str, JournalIndex] = {}
+        self._stale: Set[str] = set()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _is_fresh(self, index: Optional[JournalIndex]) -> bool:
+        return (
+            index is not None
+            and index.journal_id not in self._stale
+            and time.monotonic() - index.built_at < self.ttl
+        )
+
+    async def get(self, journal_id: str) -> JournalIndex:
+        """Return the index for a journal, building or refreshing it once if needed"""
+        index = self._indexes.get(journal_id)
+        if self._is_fresh(index):
+            return index
+
+        lock = self._locks.setdefault(journal_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(journal_id)
+            if self._is_fresh(index):
+                return index
+            self._stale.discard(journal_id)
+            if index is None or time.monotonic() - index.full_built_at >= self.full_rebuild_interval:
+                index = await self._build(journal_id)
+            else:
+                index = await self._refresh(index)
+            self._indexes[journal_id] = index
+            return index
+
+    async def _build(self, journal_id: str) -> JournalIndex:
+        # Only IDs, dates and updated_at are needed: skip titles and content
+        entries = await self.client.get_all_journal_entries(journal_id, model=EntryKey)
+        index = JournalIndex.from_entries(journal_id, entries)
+        logger.info(f"Indexed {index.total_count} entries of journal {journal_id}")
+        return index
+
+    async def _refresh(self, index: JournalIndex) -> JournalIndex:
+        """Re-read the head of the journal until it lines up with `index`"""
+        head: List[EntryKey] = []
+        tail_start = index.total_count
+        offset = 0
+        while True:
+            page = await self.client.get_journal_entries(
+                index.journal_id, limit=self.page_size, offset=offset, model=EntryKey
+            )
+            start = index.aligned_at(page) if page else None
+            if start is not None:
+                tail_start = start
+                break
+            head.extend(page)
+            if len(page) < self.page_size:
+                tail_start = index.total_count  # Read to the end: nothing of the old index is kept
+                break
+            offset += len(page)
+
+        refreshed = JournalIndex(
+            journal_id=index.journal_id,
+            ids=[entry.id for entry in head] + index.ids[tail_start:],
+            dates=[entry.entry_date for entry in head] + index.dates[tail_start:],
+            watermark=max([index.watermark] + [entry.updated_at for entry in head]),
+            full_built_at=index.full_built_at,
+        )
+        logger.info(
+            f"Refreshed the index of journal {index.journal_id} from {len(head)} head entries, "
+            f"{refreshed.total_count} entries"
+        )
+        return refreshed
+
+    def invalidate(self, journal_id: Optional[str] = None, full: bool = False) -> None:
+        """
+        Mark the index of one journal, or of every journal, for a refresh
+        from the head; with `full`, drop it so the whole journal is re-read
+        """
+        journal_ids = list(self._indexes) if journal_id is None else [journal_id]
+        for journal_id in journal_ids:
+            if full:
+                self._indexes.pop(journal_id, None)
+            else:
+                self._stale.add(journal_id)
@@ -1,25 +1,69 @@
+import asyncio
+from contextlib import aclosing
 from datetime import datetime, timedelta
-from src.homelab_services.journiv.schemas import EntryCreate, EntryResponse, EntryTagResponse, Mood, MoodLogCreate, MoodLogResponse, MoodLogUpdate, Tag
+from src.homelab_services.journiv.auth import JournivTokenManager
+from src.homelab_services.journiv.lookup import JournivLookup
+from src.homelab_services.journiv.pagination import gather_pages, iter_pages
+from src.homelab_services.journiv.schemas import EntryCreate, EntryKey, EntryResponse, EntryTagResponse, Mood, MoodLogCreate, MoodLogResponse, MoodLogUpdate, Tag
+from src.homelab_services.decoding import decode_list
+from src.homelab_services.resilience import Upstream
+from src.homelab_services.singleflight import SingleFlight
 from src.config import Config
-import requests
-from typing import List, Optional
+import httpx
+from typing import AsyncIterator, Dict, List, Optional, Type, TypeVar
 from src.logger import logger
 from random import choice
 
+# Entry model to validate into: the full EntryResponse or a lighter projection
+E = TypeVar("E", bound=EntryKey)
+
     
 class JournivClient:
     def __init__(self):
         self.base_url = Config.JOURNIV_BASE_URL
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self.auth = JournivTokenManager(self)
+        self.lookup = JournivLookup()
+        self.singleflight = SingleFlight()
+        self.upstream = Upstream(
+            "journiv",
+            timeouts={"login": 10.0, "refresh": 10.0, "entry_tags": 5.0, "tags": 10.0, "add_tag": 10.0},
+            default_timeout=Config.JOURNIV_TIMEOUT,
+            connect_timeout=Config.JOURNIV_CONNECT_TIMEOUT,
+        )
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Long-lived pooled HTTP client, created on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url or "",
+                timeout=httpx.Timeout(Config.JOURNIV_TIMEOUT, connect=Config.JOURNIV_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=Config.JOURNIV_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.JOURNIV_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.JOURNIV_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._http
 
-    def login(self) -> bool:
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and its connections"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def login(self) -> bool:
         """Login and store tokens"""
-        url = f"{self.base_url}/api/v1/auth/login"
+        url = "/api/v1/auth/login"
 
         payload = {"email": Config.JOURNIV_EMAIL, "password": Config.JOURNIV_PASSWORD}
         
-        response = requests.post(url, json=payload)
+        response = await self.upstream.call(
+            "login", lambda timeout: self.http.post(url, json=payload, timeout=timeout), idempotent=False
+        )
         
         if response.status_code == 200:
             data = response.json()
@@ -30,34 +74,68 @@ class JournivClient:
         logger.error("Failed to log in to Journiv")
         return False
 
-    def refresh_access_token(self) -> bool:
+    async def refresh_access_token(self) -> bool:
         """Refresh access token using refresh token"""
         if not self.refresh_token:
             return False
             
-        url = f"{self.base_url}/api/v1/auth/refresh"
+        url = "/api/v1/auth/refresh"
         payload = {"refresh_token": self.refresh_token}
         
-        response = requests.post(url, json=payload)
+        response = await self.upstream.call(
+            "refresh", lambda timeout: self.http.post(url, json=payload, timeout=timeout), idempotent=False
+        )
         
         if response.status_code == 200:
             data = response.json()
             self.access_token = data["access_token"]
+            self.refresh_token = data.get("refresh_token", self.refresh_token)
+            logger.info("Refreshed Journiv access token")
             return True
         return False
 
-    def _get_headers(self) -> dict:
+    def _get_headers(self, token: Optional[str] = None) -> dict:
         """Get headers with auth token"""
-        if not self.access_token:
+        token = token or self.access_token
+        if not token:
             raise ValueError("Not authenticated. Call login() first.")
         return {
             'accept': 'application/json',
-            'Authorization': f'Bearer {self.access_token}'
+            'Authorization': f'Bearer {token}'
         }
 
-    def get_journal_entries(self, journal_id: str, limit: int = 50, offset: int = 0, include_pinned: bool = True) -> List[EntryResponse]:
-        """Get entries for a specific journal"""
-        url = f"{self.base_url}/api/v1/entries/journal/{journal_id}"
+    async def _request(self, method: str, operation: str, url: str, params: Optional[dict] = None) -> httpx.Response:
+        """Send an authenticated request; identical concurrent GETs share one call"""
+        if method != "GET":
+            return await self._send(method, operation, url, params)
+        key = (url, tuple(sorted((params or {}).items())))
+        return await self.singleflight.do(key, lambda: self._send(method, operation, url, params))
+
+    async def _send(self, method: str, operation: str, url: str, params: Optional[dict] = None) -> httpx.Response:
+        """Send an authenticated request, renewing the shared token once on 401"""
+
+        def send(token: str):
+            return lambda timeout: self.http.request(
+                method, url, headers=self._get_headers(token), params=params, timeout=timeout
+            )
+
+        idempotent = method == "GET"
+        token = await self.auth.get_token()
+        response = await self.upstream.call(operation, send(token), idempotent=idempotent)
+        if response.status_code == 401:
+            token = await self.auth.handle_unauthorized(token)
+            response = await self.upstream.call(operation, send(token), idempotent=idempotent)
+        return response
+
+    async def get_journal_entries(
+        self, journal_id: str, limit: int = 50, offset: int = 0, include_pinned: bool = True,
+        model: Type[E] = EntryResponse
+    ) -> List[E]:
+        """
+        Get entries for a specific journal. Pass a projection such as
+        EntrySummary or EntryKey as `model` to validate only those fields.
+        """
+        url = f"/api/v1/entries/journal/{journal_id}"
         
         params = {
             'limit': min(limit, 100),  # API limits to 100 max
@@ -65,53 +143,64 @@ class JournivClient:
             'include_pinned': str(include_pinned).lower()
         }
         
-        response = requests.get(url, headers=self._get_headers(), params=params)
+        response = await self._request("GET", "entries", url, params=params)
         
         if response.status_code == 200:
-            entries_data = response.json()
-            return [EntryResponse(**entry) for entry in entries_data]
-        elif response.status_code == 401:
-            if self.refresh_access_token():
-                response = requests.get(url, headers=self._get_headers(), params=params)
-                if response.status_code == 200:
-                    entries_data = response.json()
-                    return [EntryResponse(**entry) for entry in entries_data]
+            return decode_list(response.content, model)
         
         response.raise_for_status()
         return []
 
-    def get_all_journal_entries(self, journal_id: str) -> List[EntryResponse]:
-        """Get all entries for a journal (handles pagination)"""
-        all_entries = []
-        limit = 100  # Max per request
-        offset = 0
-        
-        while True:
-            entries = self.get_journal_entries(journal_id, limit=limit, offset=offset)
-            if not entries:
-                break
-                
-            all_entries.extend(entries)
-            
-            # If we got fewer than the limit, we've reached the end
-            if len(entries) < limit:
-                break
-                
-            offset += limit
-        
-        return all_entries
-
-    def get_entries_by_date(self, entries: List[EntryResponse], target_date: str) -> List[EntryResponse]:
-        """Get all entries for a specific date (YYYY-MM-DD format) from a given list"""
-        # Filter entries by date
-        matching_entries = []
-        for entry in entries:
-            if entry.entry_date == target_date:
-                matching_entries.append(entry)
-        
-        return matching_entries
+    async def get_all_journal_entries(self, journal_id: str, model: Type[E] = EntryResponse) -> List[E]:
+        """Get all entries for a journal (fetches pages concurrently)"""
+        return await gather_pages(
+            lambda limit, offset: self.get_journal_entries(journal_id, limit=limit, offset=offset, model=model)
+        )
+
+    async def iter_journal_entries(
+        self, journal_id: str, model: Type[E] = EntryResponse, concurrency: int = Config.JOURNIV_PAGE_CONCURRENCY
+    ) -> AsyncIterator[E]:
+        """Stream all entries for a journal in order, page by page"""
+        pages = iter_pages(
+            lambda limit, offset: self.get_journal_entries(journal_id, limit=limit, offset=offset, model=model),
+            concurrency=concurrency,
+        )
+        async with aclosing(pages):
+            async for page in pages:
+                for entry in page:
+                    yield entry
+
+    async def load_entry_lookup(self, journal_id: str, ttl: float = Config.JOURNIV_LOOKUP_TTL) -> bool:
+        """
+        Index the journal's entries by date from one bulk fetch, unless an
+        index younger than `ttl` is loaded; False if the journal is too
+        large to index
+        """
+        if self.lookup.has_entries(journal_id, ttl):
+            return True
+
+        async def load() -> bool:
+            entries = await self.get_all_journal_entries(journal_id)
+            if not self.lookup.load_entries(journal_id, entries):
+                logger.warning(f"Journal {journal_id} has {len(entries)} entries, too many to index in memory")
+                return False
+            logger.info(f"Indexed {len(entries)} entries of journal {journal_id} by date")
+            return True
+
+        return await self.singleflight.do(("lookup", "entries", journal_id), load)
+
+    async def get_entries_by_date(self, target_date: str, journal_id: Optional[str] = None) -> List[EntryResponse]:
+        """
+        Get all entries for a specific date (YYYY-MM-DD format), from the
+        date index, or with a date-range call when the journal is too
+        large to index
+        """
+        journal_id = journal_id or Config.JOURNIV_JOURNAL_ID
+        if await self.load_entry_lookup(journal_id):
+            return self.lookup.get_entries_by_date(target_date)
+        return await self.get_entries_by_date_range(target_date, target_date, journal_id)
     
-    def get_entries_by_date_range(
+    async def get_entries_by_date_range(
         self, 
         start_date: str, 
         end_date: str, 
@@ -130,7 +219,7 @@ class JournivClient:
             List of EntryResponse objects
             
         Raises:
-            requests.HTTPError: If the API request fails
+            httpx.HTTPStatusError: If the API request fails
             ValueError: If date format is invalid
         """
         # Validate date format
@@ -140,7 +229,7 @@ class JournivClient:
         except ValueError as e:
             raise ValueError(f"Invalid date format. Use YYYY-MM-DD: {e}")
         
-        url = f"{self.base_url}/api/v1/entries/date-range"
+        url = "/api/v1/entries/date-range"
         
         params = {
             'start_date': start_date,
@@ -150,28 +239,10 @@ class JournivClient:
         if journal_id:
             params['journal_id'] = journal_id
         
-        response = requests.get(
-            url, 
-            headers=self._get_headers(),
-            params=params,
-        )
+        response = await self._request("GET", "entries_by_date_range", url, params=params)
         
         if response.status_code == 200:
-            entries_data = response.json()
-            return [EntryResponse(**entry) for entry in entries_data]
-        elif response.status_code == 401:
-            # Token might be expired, try to refresh
-            if self.refresh_access_token():
-                # Retry with new token
-                response = requests.get(
-                    url,
-                    headers=self._get_headers(),
-                    params=params,
-                    cookies=self._get_cookies()
-                )
-                if response.status_code == 200:
-                    entries_data = response.json()
-                    return [EntryResponse(**entry) for entry in entries_data]
+            return decode_list(response.content, EntryResponse)
         
         # If we get here, the request failed
         response.raise_for_status()
@@ -181,11 +252,11 @@ class JournivClient:
     # Moods
     ###########################################################################
     
-    def get_mood_logs(self, entry_id: Optional[str] = None, mood_id: Optional[str] = None, 
+    async def get_mood_logs(self, entry_id: Optional[str] = None, mood_id: Optional[str] = None, 
                      start_date: Optional[str] = None, end_date: Optional[str] = None,
                      limit: int = 50, offset: int = 0) -> List[MoodLogResponse]:
         """Get mood logs for the current user with optional filters"""
-        url = f"{self.base_url}/api/v1/moods/logs"
+        url = "/api/v1/moods/logs"
         
         params = {
             'limit': min(limit, 100),
@@ -201,50 +272,64 @@ class JournivClient:
         if end_date:
             params['end_date'] = end_date
         
-        response = requests.get(url, headers=self._get_headers(), params=params)
+        response = await self._request("GET", "mood_logs", url, params=params)
         
         if response.status_code == 200:
-            logs_data = response.json()
-            return [MoodLogResponse(**log) for log in logs_data]
-        elif response.status_code == 401:
-            if self.refresh_access_token():
-                response = requests.get(url, headers=self._get_headers(), params=params)
-                if response.status_code == 200:
-                    logs_data = response.json()
-                    return [MoodLogResponse(**log) for log in logs_data]
+            return decode_list(response.content, MoodLogResponse)
         
         response.raise_for_status()
         return []
 
-    def entry_has_mood_log(self, entry_id: str) -> bool:
-        """Check if an entry already has a mood logged to it"""
-        mood_logs = self.get_mood_logs(entry_id=entry_id, limit=1)
-        return len(mood_logs) > 0
+    async def get_all_mood_logs(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[MoodLogResponse]:
+        """Get all mood logs in an optional date window (fetches pages concurrently)"""
+        return await gather_pages(
+            lambda limit, offset: self.get_mood_logs(start_date=start_date, end_date=end_date, limit=limit, offset=offset)
+        )
+
+    async def get_mood_logs_by_entry(self, start_date: str, end_date: str) -> Dict[str, List[MoodLogResponse]]:
+        """Mood logs of a date window grouped by entry_id, in a single paginated sweep"""
+        mood_logs_by_entry: Dict[str, List[MoodLogResponse]] = {}
+        for log in await self.get_all_mood_logs(start_date=start_date, end_date=end_date):
+            if log.entry_id:
+                mood_logs_by_entry.setdefault(log.entry_id, []).append(log)
+        return mood_logs_by_entry
+
+    async def load_mood_lookup(self, ttl: float = Config.JOURNIV_LOOKUP_TTL) -> None:
+        """Index which entries have mood logs from one sweep, unless an index younger than `ttl` is loaded"""
+        if self.lookup.has_mood_logs(ttl):
+            return
+
+        async def load() -> None:
+            mood_logs = await self.get_all_mood_logs()
+            self.lookup.load_mood_logs(mood_logs)
+            logger.info(f"Indexed {len(mood_logs)} mood logs by entry")
+
+        await self.singleflight.do(("lookup", "mood_logs"), load)
+
+    async def entry_has_mood_log(self, entry_id: str) -> bool:
+        """Check if an entry already has a mood logged to it, from the mood index"""
+        await self.load_mood_lookup()
+        return self.lookup.entry_has_mood_log(entry_id)
 
 
     
     ###########################################################################
     # People
     ###########################################################################
-    def add_tag_to_entry(self, entry_id: str, tag_id: str) -> EntryTagResponse:
+    async def add_tag_to_entry(self, entry_id: str, tag_id: str) -> EntryTagResponse:
         """Add a tag to an entry"""
-        url = f"{self.base_url}/api/v1/tags/entry/{entry_id}/tag/{tag_id}"
+        url = f"/api/v1/tags/entry/{entry_id}/tag/{tag_id}"
         
-        response = requests.post(url, headers=self._get_headers())
+        response = await self._request("POST", "add_tag", url)
         
         if response.status_code == 201:
             return EntryTagResponse(**response.json())
-        elif response.status_code == 401:
-            if self.refresh_access_token():
-                response = requests.post(url, headers=self._get_headers())
-                if response.status_code == 201:
-                    return EntryTagResponse(**response.json())
         
         response.raise_for_status()
 
-    def get_tags(self, limit: int = 50, offset: int = 0, search: Optional[str] = None) -> List[Tag]:
+    async def get_tags(self, limit: int = 50, offset: int = 0, search: Optional[str] = None) -> List[Tag]:
         """Get tags for the current user"""
-        url = f"{self.base_url}/api/v1/tags/"
+        url = "/api/v1/tags/"
         
         params = {
             'limit': min(limit, 100),
@@ -253,74 +338,70 @@ class JournivClient:
         if search:
             params['search'] = search
         
-        response = requests.get(url, headers=self._get_headers(), params=params)
+        response = await self._request("GET", "tags", url, params=params)
         
         if response.status_code == 200:
-            tags_data = response.json()
-            return [Tag(**tag) for tag in tags_data]
-        elif response.status_code == 401:
-            if self.refresh_access_token():
-                response = requests.get(url, headers=self._get_headers(), params=params)
-                if response.status_code == 200:
-                    tags_data = response.json()
-                    return [Tag(**tag) for tag in tags_data]
+            tags = decode_list(response.content, Tag)
+            self.lookup.add_tags(tags)
+            return tags
         
         response.raise_for_status()
         return []
 
-    def get_all_tags(self, search: Optional[str] = None) -> List[Tag]:
-        """Get all tags for the current user (handles pagination)"""
-        all_tags = []
-        limit = 100  # Max per request
-        offset = 0
-        
-        while True:
-            tags = self.get_tags(limit=limit, offset=offset, search=search)
-            if not tags:
-                break
-                
-            all_tags.extend(tags)
-            
-            # If we got fewer than the limit, we've reached the end
-            if len(tags) < limit:
-                break
-                
-            offset += limit
-        
-        return all_tags
+    async def get_all_tags(self, search: Optional[str] = None) -> List[Tag]:
+        """Get all tags for the current user (fetches pages concurrently)"""
+        return await gather_pages(
+            lambda limit, offset: self.get_tags(limit=limit, offset=offset, search=search)
+        )
 
-    def get_tag_by_name(self, tag_name: str) -> Optional[Tag]:
-        """Get a tag by name (case-insensitive)"""
-        all_tags = self.get_all_tags()
-        tag_name_lower = tag_name.lower()
-        
-        for tag in all_tags:
-            if tag.name.lower() == tag_name_lower:
-                return tag
-        return None
+    async def iter_tags(self, search: Optional[str] = None) -> AsyncIterator[Tag]:
+        """Stream all tags for the current user in order, page by page"""
+        pages = iter_pages(
+            lambda limit, offset: self.get_tags(limit=limit, offset=offset, search=search)
+        )
+        async with aclosing(pages):
+            async for page in pages:
+                for tag in page:
+                    yield tag
 
-    def get_entry_tags(self, entry_id: str) -> List[Tag]:
+    async def get_tag_by_name(self, tag_name: str) -> Optional[Tag]:
+        """Get a tag by name (case-insensitive), from the lookup index once tags are loaded"""
+        if not self.lookup.tags_loaded:
+            await self.get_all_tags()  # Pages are added to the index as they arrive
+            self.lookup.tags_loaded = True
+        return self.lookup.get_tag_by_name(tag_name)
+
+    async def get_entry_tags(self, entry_id: str) -> List[Tag]:
         """Get all tags for an entry"""
-        url = f"{self.base_url}/api/v1/tags/entry/{entry_id}"
+        url = f"/api/v1/tags/entry/{entry_id}"
         
-        response = requests.get(url, headers=self._get_headers())
+        response = await self._request("GET", "entry_tags", url)
         
         if response.status_code == 200:
-            tags_data = response.json()
-            return [Tag(**tag) for tag in tags_data]
-        elif response.status_code == 401:
-            if self.refresh_access_token():
-                response = requests.get(url, headers=self._get_headers())
-                if response.status_code == 200:
-                    tags_data = response.json()
-                    return [Tag(**tag) for tag in tags_data]
+            return decode_list(response.content, Tag)
         
         response.raise_for_status()
         return []
 
+    async def get_tags_for_entries(
+        self, entry_ids: List[str], concurrency: int = Config.JOURNIV_FANOUT_CONCURRENCY
+    ) -> Dict[str, List[Tag]]:
+        """Tags of several entries, fetched concurrently with at most `concurrency` calls in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(entry_id: str) -> List[Tag]:
+            async with semaphore:
+                return await self.get_entry_tags(entry_id)
+
+        tags = await asyncio.gather(*[fetch(entry_id) for entry_id in entry_ids])
+        return dict(zip(entry_ids, tags))
+
 if __name__ == "__main__":
-    client = JournivClient()
-    client.login()
-    # Get all moods
-    entries = client.get_mood_logs(entry_id="1926b9fd-57b6-41a8-81b0-0e90c1de6bd5")
-    pass
\ No newline at end of file
+    async def main():
+        client = JournivClient()
+        # Get the mood logs of one entry
+        mood_logs = await client.get_mood_logs(entry_id="1926b9fd-57b6-41a8-81b0-0e90c1de6bd5")
+        print(mood_logs)
+        await client.aclose()
+
+    asyncio.run(main())
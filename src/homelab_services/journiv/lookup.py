@@ -0,0 +1,103 @@
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.config import Config
+from src.homelab_services.journiv.schemas import EntryResponse, MoodLogResponse, Tag
+
+
+class JournivLookup:
+    """
+    In-process index over Journiv data.
+
+    Entries are bucketed by `entry_date`, with the dates kept sorted so a
+    range is a bisect and a slice. Mood logs are indexed as the set of
+    entry IDs that have one, and tags are keyed by lowercase name.
+
+    Entries and mood logs are only ever loaded whole, so the index never
+    answers from a partial slice, and a journal with more than
+    `max_entries` entries is not indexed at all. Each part has a
+    `*_loaded` flag; until it is set (or once it is cleared by an
+    invalidation), lookups must go to Journiv.
+    """
+
+    def __init__(self, max_entries: int = Config.JOURNIV_LOOKUP_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries_by_date: Dict[str, List[EntryResponse]] = {}
+        self._dates: List[str] = []  # Keys of _entries_by_date, sorted
+        self._entries_with_mood: Set[str] = set()
+        self._tags_by_name: Dict[str, Tag] = {}
+        self._tag_names: Dict[str, str] = {}  # tag id -> lowercase name
+        self.entries_journal_id: Optional[str] = None
+        self.entries_loaded = False
+        self.entries_loaded_at = 0.0
+        self.mood_logs_loaded = False
+        self.mood_logs_loaded_at = 0.0
+        self.tags_loaded = False
+
+    ###########################################################################
+    # Entries
+    ###########################################################################
+
+    def load_entries(self, journal_id: str, entries: List[EntryResponse]) -> bool:
+        """Replace the entry index with a whole journal; False if it is too large to index"""
+        self._entries_by_date = {}
+        self._dates = []
+        self.entries_loaded = False
+        if len(entries) > self.max_entries:
+            return False
+        for entry in entries:
+            self._entries_by_date.setdefault(entry.entry_date, []).append(entry)
+        self._dates = sorted(self._entries_by_date)
+        self.entries_journal_id = journal_id
+        self.entries_loaded = True
+        self.entries_loaded_at = time.monotonic()
+        return True
+
+    def has_entries(self, journal_id: str, ttl: float) -> bool:
+        """Whether the journal's entries are loaded and younger than `ttl` seconds"""
+        return (
+            self.entries_loaded
+            and self.entries_journal_id == journal_id
+            and time.monotonic() - self.entries_loaded_at < ttl
+        )
+
+    def get_entries_by_date(self, target_date: str) -> List[EntryResponse]:
+        return list(self._entries_by_date.get(target_date, ()))
+
+    def get_entries_by_date_range(self, start_date: str, end_date: str) -> List[EntryResponse]:
+        """Entries with start_date <= entry_date <= end_date, oldest date first"""
+        lo = bisect_left(self._dates, start_date)
+        hi = bisect_right(self._dates, end_date)
+        return [entry for day in self._dates[lo:hi] for entry in self._entries_by_date[day]]
+
+    ###########################################################################
+    # Moods
+    ###########################################################################
+
+    def load_mood_logs(self, mood_logs: Iterable[MoodLogResponse]) -> None:
+        """Replace the mood index with every mood log of the user"""
+        self._entries_with_mood = {log.entry_id for log in mood_logs if log.entry_id}
+        self.mood_logs_loaded = True
+        self.mood_logs_loaded_at = time.monotonic()
+
+    def has_mood_logs(self, ttl: float) -> bool:
+        return self.mood_logs_loaded and time.monotonic() - self.mood_logs_loaded_at < ttl
+
+    def entry_has_mood_log(self, entry_id: str) -> bool:
+        return entry_id in self._entries_with_mood
+
+    ###########################################################################
+    # Tags
+    ###########################################################################
+
+    def add_tags(self, tags: Iterable[Tag]) -> None:
+        for tag in tags:
+            previous_name = self._tag_names.get(tag.id)
+            if previous_name is not None:
+                self._tags_by_name.pop(previous_name, None)
+            self._tags_by_name[tag.name.lower()] = tag
+            self._tag_names[tag.id] = tag.name.lower()
+
+    def get_tag_by_name(self, tag_name: str) -> Optional[Tag]:
+        return self._tags_by_name.get(tag_name.lower())
@@ -0,0 +1,526 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+from src.config import Config
+from src.homelab_services.journiv.pagination import gather_pages
+from src.homelab_services.journiv.schemas import EntryResponse, EntrySearchHit, MoodLogResponse, Tag
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.homelab_services.journiv.journiv import JournivClient
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id TEXT PRIMARY KEY,
+    journal_id TEXT,
+    entry_date TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    location TEXT,
+    weather TEXT,
+    prompt_id TEXT,
+    word_count INTEGER NOT NULL,
+    is_pinned INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_journal_date ON entries (journal_id, entry_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_entries_date ON entries (entry_date);
+
+CREATE TABLE IF NOT EXISTS mood_logs (
+    id TEXT PRIMARY KEY,
+    entry_id TEXT,
+    logged_date TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mood_logs_entry ON mood_logs (entry_id);
+CREATE INDEX IF NOT EXISTS idx_mood_logs_date ON mood_logs (logged_date);
+
+CREATE TABLE IF NOT EXISTS tags (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tags_name ON tags (name COLLATE NOCASE);
+
+-- Full-text index over entry titles and bodies, kept in step with the
+-- entries table by triggers, so it follows every updated_at-driven upsert
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, content, content='entries', content_rowid='rowid',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF title, content ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+    INSERT INTO entries_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+ENTRY_COLUMNS = (
+    "id", "journal_id", "entry_date", "title", "content", "location", "weather",
+    "prompt_id", "word_count", "is_pinned", "created_at", "updated_at",
+)
+
+
+# Markers around matched terms in search results
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# Title matches rank above body matches
+FTS_TITLE_WEIGHT = 5.0
+FTS_CONTENT_WEIGHT = 1.0
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix,
+    and FTS5 operators and quotes in the input are taken literally
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _row_to_entry(row: sqlite3.Row) -> EntryResponse:
+    data = dict(row)
+    data["is_pinned"] = bool(data["is_pinned"])
+    return EntryResponse(**data)
+
+
+class JournivMirror:
+    """
+    Local SQLite (WAL) copy of Journiv entries, mood logs and tags.
+
+    Reads go over a connection per thread and only hit indexes; page-sized
+    ones run on the event loop, whole-journal ones are meant for
+    asyncio.to_thread. Writes happen in a worker thread over their own
+    connection, one transaction per sync, so a sync never blocks request
+    handling and a crash never leaves half of one applied.
+    """
+
+    def __init__(self, path: str = Config.JOURNIV_MIRROR_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self._index_existing_entries()
+        self._writer.commit()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._writer.close()
+
+    def _index_existing_entries(self) -> None:
+        """Fill the full-text index of a mirror created before it existed"""
+        indexed = self._writer.execute("SELECT COUNT(*) FROM entries_fts_docsize").fetchone()[0]
+        if not indexed and self._writer.execute("SELECT EXISTS (SELECT 1 FROM entries)").fetchone()[0]:
+            self._writer.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+
+    ###########################################################################
+    # Sync state
+    ###########################################################################
+
+    def get_state(self, key: str, conn: Optional[sqlite3.Connection] = None) -> Optional[str]:
+        row = (conn or self._reader).execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._writer.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def is_ready(self, journal_id: str) -> bool:
+        """Whether the journal has completed at least one full sync"""
+        return self.get_state(f"full_sync:{journal_id}") is not None
+
+    ###########################################################################
+    # Writes (run in a worker thread)
+    ###########################################################################
+
+    def _upsert_entries(self, entries: Iterable[EntryResponse]) -> int:
+        rows = [
+            tuple(getattr(entry, column) for column in ENTRY_COLUMNS)
+            for entry in entries
+        ]
+        placeholders = ", ".join("?" for _ in ENTRY_COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in ENTRY_COLUMNS[1:])
+        cursor = self._writer.executemany(
+            f"INSERT INTO entries ({', '.join(ENTRY_COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates} "
+            f"WHERE excluded.updated_at > entries.updated_at",
+            rows,
+        )
+        return cursor.rowcount
+
+    def _upsert_mood_logs(self, logs: Iterable[MoodLogResponse]) -> None:
+        self._writer.executemany(
+            "INSERT INTO mood_logs (id, entry_id, logged_date, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET entry_id = excluded.entry_id, "
+            "logged_date = excluded.logged_date, data = excluded.data",
+            [(log.id, log.entry_id, log.logged_date, log.model_dump_json()) for log in logs],
+        )
+
+    def _upsert_tags(self, tags: Iterable[Tag]) -> None:
+        self._writer.executemany(
+            "INSERT INTO tags (id, name, updated_at, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+            "updated_at = excluded.updated_at, data = excluded.data",
+            [(tag.id, tag.name, tag.updated_at.isoformat(), tag.model_dump_json()) for tag in tags],
+        )
+
+    def _delete_missing(self, table: str, keep_ids: List[str], where: str = "", params: tuple = ()) -> None:
+        self._writer.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id TEXT PRIMARY KEY)")
+        self._writer.execute("DELETE FROM keep_ids")
+        self._writer.executemany("INSERT OR IGNORE INTO keep_ids (id) VALUES (?)", [(i,) for i in keep_ids])
+        clause = f"{where} AND " if where else ""
+        self._writer.execute(
+            f"DELETE FROM {table} WHERE {clause}id NOT IN (SELECT id FROM keep_ids)", params
+        )
+
+    def _apply_entries(self, journal_id: str, entries: List[EntryResponse], full: bool) -> int:
+        changed = self._upsert_entries(entries)
+        if full:
+            self._delete_missing("entries", [e.id for e in entries], "journal_id = ?", (journal_id,))
+        return changed
+
+    def _apply_mood_logs(self, logs: List[MoodLogResponse], full: bool) -> None:
+        self._upsert_mood_logs(logs)
+        if full:
+            self._delete_missing("mood_logs", [log.id for log in logs])
+
+    def apply_sync(
+        self, journal_id: str, entries: List[EntryResponse], logs: List[MoodLogResponse], tags: List[Tag], full: bool
+    ) -> int:
+        """
+        Upsert changed entries, mood logs and tags in one transaction; on a
+        full sync also drop what is gone upstream and mark the journal ready
+        """
+        with self._writer:
+            changed = self._apply_entries(journal_id, entries, full)
+            self._apply_mood_logs(logs, full)
+            self._upsert_tags(tags)
+            self._delete_missing("tags", [tag.id for tag in tags])
+            if full:
+                self._set_state(f"full_sync:{journal_id}", datetime.now().isoformat())
+        return changed
+
+    def apply_tags(self, tags: List[Tag]) -> None:
+        with self._writer:
+            self._upsert_tags(tags)
+            self._delete_missing("tags", [tag.id for tag in tags])
+
+    def apply_window(
+        self, journal_id: str, start_date: str, end_date: str, entries: List[EntryResponse], logs: List[MoodLogResponse]
+    ) -> int:
+        """Upsert one date window and drop what is no longer in it upstream, in one transaction"""
+        with self._writer:
+            changed = self._apply_entries(journal_id, entries, full=False)
+            self._upsert_mood_logs(logs)
+            self._delete_missing(
+                "entries", [e.id for e in entries],
+                "journal_id = ? AND entry_date BETWEEN ? AND ?", (journal_id, start_date, end_date),
+            )
+            self._delete_missing(
+                "mood_logs", [log.id for log in logs], "logged_date BETWEEN ? AND ?", (start_date, end_date)
+            )
+        return changed
+
+    def delete_entries(self, entry_ids: Iterable[str]) -> None:
+        with self._writer:
+            for entry_id in entry_ids:
+                self._writer.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                self._writer.execute("DELETE FROM mood_logs WHERE entry_id = ?", (entry_id,))
+
+    ###########################################################################
+    # Reads
+    ###########################################################################
+
+    def count_entries(self, journal_id: str) -> int:
+        row = self._reader.execute(
+            "SELECT COUNT(*) AS n FROM entries WHERE journal_id = ?", (journal_id,)
+        ).fetchone()
+        return row["n"]
+
+    def newest_entry_date(self, journal_id: str) -> Optional[str]:
+        row = self._reader.execute(
+            "SELECT MAX(entry_date) AS newest FROM entries WHERE journal_id = ?", (journal_id,)
+        ).fetchone()
+        return row["newest"]
+
+    def get_entries(self, journal_id: str, limit: Optional[int] = None, offset: int = 0) -> List[EntryResponse]:
+        """Entries of a journal, newest entry_date first"""
+        rows = self._reader.execute(
+            "SELECT * FROM entries WHERE journal_id = ? "
+            "ORDER BY entry_date DESC, id DESC LIMIT ? OFFSET ?",
+            (journal_id, -1 if limit is None else limit, offset),
+        ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def iter_entry_pages(self, journal_id: str, page_size: int = 100) -> Iterator[List[EntryResponse]]:
+        """Entries of a journal in get_entries order, one keyset page at a time"""
+        page = self.get_entries(journal_id, limit=page_size)
+        while page:
+            yield page
+            if len(page) < page_size:
+                return
+            page = self.get_entries_after(journal_id, page[-1].entry_date, page[-1].id, page_size)
+
+    def get_entries_after(self, journal_id: str, entry_date: str, entry_id: str, limit: int) -> List[EntryResponse]:
+        """Keyset page: entries that sort after (entry_date, id)"""
+        rows = self._reader.execute(
+            "SELECT * FROM entries WHERE journal_id = ? AND (entry_date, id) < (?, ?) "
+            "ORDER BY entry_date DESC, id DESC LIMIT ?",
+            (journal_id, entry_date, entry_id, limit),
+        ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def count_entries_before(self, journal_id: str, entry_date: str, entry_id: str) -> int:
+        """Number of entries sorting before (entry_date, id), i.e. the keyset offset"""
+        row = self._reader.execute(
+            "SELECT COUNT(*) AS n FROM entries WHERE journal_id = ? AND (entry_date, id) >= (?, ?)",
+            (journal_id, entry_date, entry_id),
+        ).fetchone()
+        return row["n"]
+
+    def get_entries_by_date_range(self, start_date: str, end_date: str, journal_id: Optional[str] = None) -> List[EntryResponse]:
+        query = "SELECT * FROM entries WHERE entry_date BETWEEN ? AND ?"
+        params: tuple = (start_date, end_date)
+        if journal_id:
+            query += " AND journal_id = ?"
+            params += (journal_id,)
+        rows = self._reader.execute(query + " ORDER BY entry_date DESC, id DESC", params).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def search_entries(
+        self, journal_id: str, text: str, limit: int = 10, offset: int = 0
+    ) -> Tuple[List[EntrySearchHit], int]:
+        """
+        Entries matching every word of `text` (as prefixes) in their title or
+        content, best bm25 rank first, with matches highlighted; also returns
+        the total number of matches
+        """
+        query = fts_query(text)
+        if query is None:
+            return [], 0
+        # CROSS JOIN keeps the MATCH as the outer loop; otherwise SQLite may
+        # walk the journal's entries and re-run the MATCH for each of them
+        total = self._reader.execute(
+            "SELECT COUNT(*) AS n FROM entries_fts CROSS JOIN entries e ON e.rowid = entries_fts.rowid "
+            "WHERE entries_fts MATCH ? AND e.journal_id = ?",
+            (query, journal_id),
+        ).fetchone()["n"]
+        if not total or offset >= total:
+            return [], total
+        rows = self._reader.execute(
+            "SELECT e.id, e.journal_id, e.entry_date, e.updated_at, e.word_count, "
+            "highlight(entries_fts, 0, ?, ?) AS title, "
+            "snippet(entries_fts, 1, ?, ?, '…', 32) AS snippet, "
+            "bm25(entries_fts, ?, ?) AS bm25_rank "
+            "FROM entries_fts CROSS JOIN entries e ON e.rowid = entries_fts.rowid "
+            "WHERE entries_fts MATCH ? AND e.journal_id = ? "
+            "ORDER BY bm25_rank, e.entry_date DESC LIMIT ? OFFSET ?",
+            (
+                HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END,
+                FTS_TITLE_WEIGHT, FTS_CONTENT_WEIGHT, query, journal_id, limit, offset,
+            ),
+        ).fetchall()
+        # bm25 is lower-is-better; flip it so a higher score means a better match
+        hits = [EntrySearchHit(**{**dict(row), "score": round(-row["bm25_rank"], 6)}) for row in rows]
+        return hits, total
+
+    def get_entry_stats(self, journal_id: str) -> List[Tuple[str, int]]:
+        """(entry_date, word_count) of every entry, without building models"""
+        return self._reader.execute(
+            "SELECT entry_date, word_count FROM entries WHERE journal_id = ?", (journal_id,)
+        ).fetchall()
+
+    def get_mood_stats(self) -> List[Tuple[str, str]]:
+        """(logged_date, mood category) of every mood log, without building models"""
+        return self._reader.execute(
+            "SELECT logged_date, json_extract(data, '$.mood.category') FROM mood_logs"
+        ).fetchall()
+
+    def get_mood_logs(self, entry_id: str) -> List[MoodLogResponse]:
+        rows = self._reader.execute("SELECT data FROM mood_logs WHERE entry_id = ?", (entry_id,)).fetchall()
+        return [MoodLogResponse.model_validate_json(row["data"]) for row in rows]
+
+    def get_tags(self) -> List[Tag]:
+        rows = self._reader.execute("SELECT data FROM tags ORDER BY name").fetchall()
+        return [Tag.model_validate_json(row["data"]) for row in rows]
+
+    def get_tag_by_name(self, name: str) -> Optional[Tag]:
+        row = self._reader.execute(
+            "SELECT data FROM tags WHERE name = ? COLLATE NOCASE", (name,)
+        ).fetchone()
+        return Tag.model_validate_json(row["data"]) if row else None
+
+    ###########################################################################
+    # Sync
+    ###########################################################################
+
+    async def sync(self, client: "JournivClient", journal_id: str, full: bool = False) -> None:
+        """
+        Pull changes from Journiv into the mirror.
+
+        A full sync walks every page and reconciles deletions. Journiv can
+        only filter entries and mood logs by date, not by updated_at, so an
+        incremental sync asks for those dated from the newest mirrored
+        entry_date (or today, for future-dated entries) minus
+        JOURNIV_MIRROR_LOOKBACK_DAYS. That covers new entries and edits to
+        recent ones; edits to older entries are picked up by the next full
+        sync or a change notification.
+        """
+        newest = self.newest_entry_date(journal_id)
+        full = full or newest is None or not self.is_ready(journal_id)
+        started = time.monotonic()
+
+        if full:
+            entries = await client.get_all_journal_entries(journal_id)
+            mood_logs = await gather_pages(
+                lambda limit, offset: client.get_mood_logs(limit=limit, offset=offset)
+            )
+        else:
+            today = date.today()
+            since = min(date.fromisoformat(newest[:10]), today) - timedelta(days=Config.JOURNIV_MIRROR_LOOKBACK_DAYS)
+            until = today + timedelta(days=1)
+            entries = await client.get_entries_by_date_range(since.isoformat(), until.isoformat(), journal_id)
+            mood_logs = await gather_pages(
+                lambda limit, offset: client.get_mood_logs(
+                    start_date=since.isoformat(), end_date=until.isoformat(), limit=limit, offset=offset
+                )
+            )
+        tags = await client.get_all_tags()
+
+        changed = await asyncio.to_thread(self.apply_sync, journal_id, entries, mood_logs, tags, full)
+
+        logger.info(
+            f"Journiv mirror {'full' if full else 'incremental'} sync: "
+            f"{changed} entries changed, {len(mood_logs)} mood logs, {len(tags)} tags "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+
+    async def sync_window(self, client: "JournivClient", journal_id: str, start_date: str, end_date: str) -> None:
+        """
+        Re-pull the entries and mood logs dated within one window, e.g. after
+        a change notification. Unlike an incremental sync, this also drops
+        what was deleted upstream inside the window.
+        """
+        entries, mood_logs = await asyncio.gather(
+            client.get_entries_by_date_range(start_date, end_date, journal_id),
+            gather_pages(
+                lambda limit, offset: client.get_mood_logs(
+                    start_date=start_date, end_date=end_date, limit=limit, offset=offset
+                )
+            ),
+        )
+        changed = await asyncio.to_thread(self.apply_window, journal_id, start_date, end_date, entries, mood_logs)
+        logger.info(f"Journiv mirror window sync {start_date}..{end_date}: {changed} entries changed")
+
+
+class MirrorSyncWorker:
+    """Background task keeping a JournivMirror in sync with Journiv"""
+
+    def __init__(
+        self,
+        mirror: JournivMirror,
+        client: "JournivClient",
+        journal_id: str,
+        interval: float = Config.JOURNIV_MIRROR_SYNC_INTERVAL,
+        full_sync_interval: float = Config.JOURNIV_MIRROR_FULL_SYNC_INTERVAL,
+    ):
+        self.mirror = mirror
+        self.client = client
+        self.journal_id = journal_id
+        self.interval = interval
+        self.full_sync_interval = full_sync_interval
+        self._task: Optional[asyncio.Task] = None
+        self._last_full_sync = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            full = time.monotonic() - self._last_full_sync >= self.full_sync_interval
+            try:
+                async with self._lock:
+                    await self.mirror.sync(self.client, self.journal_id, full=full)
+                if full:
+                    self._last_full_sync = time.monotonic()
+            except Exception as e:
+                logger.error(f"Journiv mirror sync failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def delete_entries(self, entry_ids: Iterable[str]) -> None:
+        """Drop entries deleted upstream, off the event loop and never during a sync"""
+        entry_ids = list(entry_ids)
+        async with self._lock:
+            await asyncio.to_thread(self.mirror.delete_entries, entry_ids)
+
+    async def refresh(self, dates: Iterable[str] = (), tags: bool = False) -> None:
+        """Pull the window spanning `dates`, and optionally all tags, right away"""
+        dates = sorted(dates)
+        async with self._lock:
+            if dates:
+                await self.mirror.sync_window(self.client, self.journal_id, dates[0], dates[-1])
+            if tags:
+                await asyncio.to_thread(self.mirror.apply_tags, await self.client.get_all_tags())
@@ -0,0 +1,59 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, TypeVar
+
+from src.config import Config
+
+T = TypeVar("T")
+
+# Fetches one page given (limit, offset)
+FetchPage = Callable[[int, int], Awaitable[List[T]]]
+
+
+async def iter_pages(
+    fetch_page: FetchPage,
+    limit: int = 100,
+    concurrency: int = Config.JOURNIV_PAGE_CONCURRENCY,
+) -> AsyncIterator[List[T]]:
+    """
+    Yield offset-paginated pages in order while prefetching ahead.
+
+    The first page is fetched alone; if it is full, up to `concurrency`
+    following offset windows are kept in flight at once. Iteration stops at
+    the first short page and any requests issued past it are cancelled.
+    """
+    first = await fetch_page(limit, 0)
+    if first:
+        yield first
+    if len(first) < limit:
+        return
+
+    next_offset = limit
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        while True:
+            while len(pending) < max(concurrency, 1):
+                pending.append(asyncio.create_task(fetch_page(limit, next_offset)))
+                next_offset += limit
+
+            page = await pending.popleft()
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def gather_pages(
+    fetch_page: FetchPage,
+    limit: int = 100,
+    concurrency: int = Config.JOURNIV_PAGE_CONCURRENCY,
+) -> List[T]:
+    """Fetch every page concurrently and return the items in order"""
+    items: List[T] = []
+    async for page in iter_pages(fetch_page, limit=limit, concurrency=concurrency):
+        items.extend(page)
+    return items
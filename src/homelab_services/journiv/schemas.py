@@ -13,19 +13,40 @@ class EntryCreate(BaseModel):
     weather: Optional[str] = None
     prompt_id: Optional[str] = None
 
-class EntryResponse(BaseModel):
+class EntryKey(BaseModel):
+    """Projection with only what pagination indexes need"""
     id: str
+    entry_date: str
+    updated_at: str
+
+class EntryStats(EntryKey):
+    """Projection with what the statistics columns need"""
+    word_count: int
+
+class EntrySummary(EntryKey):
+    """Projection with the fields the public API returns"""
     title: str
     content: str
-    entry_date: str
+    journal_id: Optional[str]
+    created_at: str
+
+class EntryResponse(EntrySummary):
     location: Optional[str]
     weather: Optional[str]
-    journal_id: Optional[str]
     prompt_id: Optional[str]
     word_count: int
     is_pinned: bool
-    created_at: str
+
+class EntrySearchHit(BaseModel):
+    """Full-text search match; `title` and `snippet` carry <mark> highlights"""
+    id: str
+    journal_id: Optional[str]
+    entry_date: str
     updated_at: str
+    word_count: int
+    title: str
+    snippet: str
+    score: float
 
 class EntryUpdate(BaseModel):
     title: Optional[str] = None
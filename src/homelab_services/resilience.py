@@ -0,0 +1,282 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from src.config import Config
+from src.logger import logger
+from src.metrics import (
+    UPSTREAM_REJECTED,
+    UPSTREAM_REQUEST_DURATION,
+    UPSTREAM_REQUESTS_IN_FLIGHT,
+    UPSTREAM_RESPONSE_SIZE,
+    UPSTREAM_RETRIES,
+    record_upstream_time,
+)
+from src.tracing import span
+
+# Statuses worth retrying for idempotent calls; 5xx also count against the breaker
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        super().__init__(f"circuit breaker for {upstream} is open, next attempt in {retry_after:.0f}s")
+
+
+# Failures that mean "upstream unreachable" rather than "bad request"
+UPSTREAM_ERRORS = (CircuitOpenError, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failed calls in a row the circuit opens and
+    calls fail fast for `reset_timeout` seconds. Then a single probe call
+    is let through (half-open): success closes the circuit, failure opens
+    it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = Config.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = Config.UPSTREAM_BREAKER_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the probe when half-open"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self._opened_at is None or self._probing:
+                self.opened += 1
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class OperationStats:
+    """Call counters and a window of recent latencies for one operation"""
+
+    def __init__(self, window: int = 512):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float, failed: bool) -> None:
+        self.calls += 1
+        self.failures += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 4)
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "mean_seconds": round(self.total_seconds / self.calls, 4) if self.calls else None,
+            "max_seconds": round(self.max_seconds, 4),
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "p99_seconds": percentile(0.99),
+        }
+
+
+class Upstream:
+    """
+    Resilience policy shared by every call to one upstream service.
+
+    Each call is named by an operation, which picks its timeout and keys
+    its latency stats. Idempotent calls are retried with jittered
+    exponential backoff on transport errors and 429/502/503/504 responses.
+    All calls go through one circuit breaker, so a down upstream costs a
+    fast `CircuitOpenError` rather than a timeout per request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = Config.UPSTREAM_MAX_RETRIES,
+        retry_base_delay: float = Config.UPSTREAM_RETRY_BASE_DELAY,
+        retry_max_delay: float = Config.UPSTREAM_RETRY_MAX_DELAY,
+    ):
+        self.name = name
+        overrides = {
+            key.split(".", 1)[1]: seconds
+            for key, seconds in Config.UPSTREAM_TIMEOUTS.items()
+            if key.startswith(f"{name}.")
+        }
+        self.timeouts = {**(timeouts or {}), **overrides}
+        self.default_timeout = default_timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker = CircuitBreaker()
+        self.operations: Dict[str, OperationStats] = {}
+
+    def timeout(self, operation: str) -> httpx.Timeout:
+        seconds = self.timeouts.get(operation, self.default_timeout)
+        return httpx.Timeout(seconds, connect=min(seconds, self.connect_timeout))
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def call(
+        self,
+        operation: str,
+        send: Callable[[httpx.Timeout], Awaitable[httpx.Response]],
+        idempotent: bool = True,
+    ) -> httpx.Response:
+        """
+        Run `send(timeout)` under the breaker, retrying idempotent calls.
+
+        Transport errors are re-raised once retries are exhausted; error
+        responses are returned to the caller as usual.
+        """
+        stats = self.operations.setdefault(operation, OperationStats())
+        timeout = self.timeout(operation)
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        labels = (self.name, operation)
+        start = time.perf_counter()
+
+        try:
+            for attempt in range(attempts):
+                if not self.breaker.allow():
+                    stats.rejected += 1
+                    UPSTREAM_REJECTED.inc(labels)
+                    raise CircuitOpenError(self.name, self.breaker.retry_after())
+                if attempt:
+                    stats.retries += 1
+                    UPSTREAM_RETRIES.inc(labels)
+
+                try:
+                    response = await self._attempt(operation, send, timeout)
+                except httpx.TransportError as e:
+                    self.breaker.record_failure()
+                    if isinstance(e, httpx.TimeoutException):
+                        stats.timeouts += 1
+                    if attempt + 1 == attempts:
+                        stats.observe(time.perf_counter() - start, failed=True)
+                        raise
+                    logger.warning(f"{self.name} {operation} failed ({e!r}), retrying")
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                except BaseException:
+                    # Cancelled or a bug in `send`; free a claimed half-open probe
+                    self.breaker._probing = False
+                    raise
+
+                failed = response.status_code >= 500
+                if failed:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                if response.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                    logger.warning(f"{self.name} {operation} returned {response.status_code}, retrying")
+                    await response.aclose()
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+                stats.observe(time.perf_counter() - start, failed=failed)
+                return response
+        finally:
+            record_upstream_time(self.name, time.perf_counter() - start)
+
+    async def _attempt(
+        self, operation: str, send: Callable[[httpx.Timeout], Awaitable[httpx.Response]], timeout: httpx.Timeout
+    ) -> httpx.Response:
+        """One upstream round-trip, recorded in the Prometheus metrics"""
+        in_flight = (self.name,)
+        outcome = "error"
+        UPSTREAM_REQUESTS_IN_FLIGHT.inc(in_flight)
+        start = time.perf_counter()
+        try:
+            with span(f"{self.name} {operation}", "upstream") as attrs:
+                response = await send(timeout)
+                attrs["status"] = response.status_code
+            outcome = f"{response.status_code // 100}xx"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        finally:
+            UPSTREAM_REQUESTS_IN_FLIGHT.dec(in_flight)
+            UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - start, (self.name, operation, outcome))
+
+        # Streamed responses have not been read yet; fall back to their declared length
+        if response.is_stream_consumed:
+            UPSTREAM_RESPONSE_SIZE.observe(len(response.content), (self.name, operation))
+        elif "content-length" in response.headers:
+            UPSTREAM_RESPONSE_SIZE.observe(int(response.headers["content-length"]), (self.name, operation))
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "upstream": self.name,
+            "breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "times_opened": self.breaker.opened,
+                "retry_after_seconds": round(self.breaker.retry_after(), 1),
+            },
+            "operations": {name: stats.snapshot() for name, stats in sorted(self.operations.items())},
+        }
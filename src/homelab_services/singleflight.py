@@ -0,0 +1,57 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from src.config import Config
+from src.tracing import span
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one.
+
+    While a call for `key` is in flight, further callers with the same key
+    await the same task instead of issuing their own request. The task is
+    shielded, so a leader being cancelled does not fail its followers.
+    """
+
+    def __init__(self, max_tracked_keys: int = Config.SINGLEFLIGHT_MAX_TRACKED_KEYS):
+        self.max_tracked_keys = max_tracked_keys
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._coalesced_by_key: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self._coalesced_by_key[key] = self._coalesced_by_key.pop(key, 0) + 1
+            while len(self._coalesced_by_key) > self.max_tracked_keys:
+                self._coalesced_by_key.popitem(last=False)
+            with span("wait for identical call", "singleflight"):
+                return await asyncio.shield(task)
+
+        self.calls += 1
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self, top: int = 20) -> dict:
+        busiest = sorted(self._coalesced_by_key.items(), key=lambda item: item[1], reverse=True)[:top]
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "coalesced_by_key": {str(key): count for key, count in busiest},
+        }
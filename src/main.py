@@ -1,13 +1,62 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware 
-from src.api.endpoints.immich.immich import router as immich_router
-from src.api.endpoints.journiv.journiv import router as journiv_router
+from src.api.cache_warmer import CacheWarmer
+from src.api.endpoints.blog.blog import router as blog_router
+from src.api.endpoints.immich.immich import router as immich_router, immich_client
+from src.api.endpoints.journiv.journiv import router as journiv_router, journiv_client, journiv_mirror, mirror_worker
+from src.api.endpoints.stats.stats import router as stats_router
+from src.api.invalidation import ChangeProbe, invalidator, router as hooks_router
+from src.api.metrics import MetricsMiddleware, router as metrics_router
+from src.api.response_cache import ResponseCacheMiddleware
+from src.api.tracing import TracedJSONResponse, TracingMiddleware, router as tracing_router
+from src.config import Config
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if mirror_worker is not None:
+        mirror_worker.start()
+    cache_warmer = (
+        CacheWarmer(app, Config.JOURNIV_JOURNAL_ID)
+        if Config.CACHE_WARMER_ENABLED and Config.JOURNIV_JOURNAL_ID
+        else None
+    )
+    if cache_warmer is not None:
+        cache_warmer.start()
+    # Journiv is only polled for changes when it is not calling the hook
+    change_probe = (
+        ChangeProbe(invalidator, journiv_client, Config.JOURNIV_JOURNAL_ID)
+        if not Config.INVALIDATION_HOOK_TOKEN and Config.INVALIDATION_PROBE_INTERVAL > 0 and Config.JOURNIV_JOURNAL_ID
+        else None
+    )
+    if change_probe is not None:
+        change_probe.start()
+    yield
+    if change_probe is not None:
+        await change_probe.stop()
+    if cache_warmer is not None:
+        await cache_warmer.stop()
+    if mirror_worker is not None:
+        await mirror_worker.stop()
+    if journiv_mirror is not None:
+        journiv_mirror.close()
+    await journiv_client.aclose()
+    await immich_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=TracedJSONResponse)
 
 app.include_router(immich_router, prefix="/api")
 app.include_router(journiv_router, prefix="/api")
+app.include_router(blog_router, prefix="/api")
+app.include_router(stats_router, prefix="/api")
+app.include_router(tracing_router, prefix="/api")
+app.include_router(hooks_router, prefix="/api")
+app.include_router(metrics_router)
+
+# Added before CORS so cached responses still get CORS headers
+app.add_middleware(ResponseCacheMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,9 +66,15 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["OPTIONS", "POST", "GET", "DELETE", "PUT", "PATCH"],
-    allow_headers=["Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "X-Trace"],
+    expose_headers=["X-Trace-Id"],
 )
 
+app.add_middleware(TracingMiddleware)
+
+# Outermost, so cache hits and CORS preflights are measured too
+app.add_middleware(MetricsMiddleware)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8100)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8100)
@@ -0,0 +1,184 @@
+import math
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric family whose samples are keyed by label values"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, LabelValues, str, float]]:
+        """(suffix, label values, extra label, value) for every sample"""
+        return ()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for values, value in self._values.items():
+            yield "", values, "", value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; `observe` is a bisect and two additions"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label values: [count per bucket..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self):
+        for values, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", values, f'le="{_format_value(float(bound))}"', cumulative
+            yield "_sum", values, "", total[0]
+            yield "_count", values, "", cumulative
+
+
+class CallbackMetric(Metric):
+    """Samples read from the rest of the app at scrape time, e.g. cache counters"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[LabelValues, Optional[float]]]],
+        type: str = "gauge",
+    ):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.collect = collect
+
+    def samples(self):
+        for values, value in self.collect():
+            if value is not None:
+                yield "", values, "", value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+HTTP_RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size by route", ("method", "route"), SIZE_BUCKETS
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+))
+HTTP_REQUEST_UPSTREAM_TIME = registry.register(Histogram(
+    "http_request_upstream_seconds", "Time a request spent waiting on each upstream, summed over its calls",
+    ("route", "upstream"),
+))
+
+UPSTREAM_REQUEST_DURATION = registry.register(Histogram(
+    "upstream_request_duration_seconds", "Latency of each upstream attempt by operation and outcome",
+    ("upstream", "operation", "outcome"),
+))
+UPSTREAM_RESPONSE_SIZE = registry.register(Histogram(
+    "upstream_response_size_bytes", "Upstream response body size by operation", ("upstream", "operation"), SIZE_BUCKETS
+))
+UPSTREAM_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "upstream_requests_in_flight", "Upstream requests currently waiting for a response", ("upstream",)
+))
+UPSTREAM_RETRIES = registry.register(Counter(
+    "upstream_retries_total", "Retried upstream attempts by operation", ("upstream", "operation")
+))
+UPSTREAM_REJECTED = registry.register(Counter(
+    "upstream_rejected_total", "Calls failed fast by an open circuit breaker", ("upstream", "operation")
+))
+
+# Seconds spent on each upstream during the current request, set by the route middleware
+upstream_time: ContextVar[Optional[Dict[str, float]]] = ContextVar("upstream_time", default=None)
+
+
+def record_upstream_time(upstream: str, seconds: float) -> None:
+    """Charge upstream time to the request being served, if any"""
+    spent = upstream_time.get()
+    if spent is not None:
+        spent[upstream] = spent.get(upstream, 0.0) + seconds
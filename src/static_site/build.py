@@ -0,0 +1,246 @@
+"""
+Render the blog as static JSON files that Vite or nginx can serve directly.
+
+    python -m src.static_site.build --out data-driven-blog-fe/public/static-api
+
+Layout of the output directory:
+
+    index.json             total count, page size and page count
+    pages/<n>.json         same body as /api/journal-entries/paginated?page=<n>
+    entries/<id>.json      one fully assembled BlogPost per entry
+    tags.json              every tag
+    manifest.json          updated_at per entry and hash per shard
+
+Builds are incremental: per-entry files are only re-rendered (and their
+tags and photos only fetched) when the entry's updated_at differs from the
+previous manifest, and shards are only rewritten when their content hash
+changed. Changes that leave updated_at alone (moods, tags) are fed in by
+the API's invalidation hook through `forget_entries`. Both sides only
+touch the manifest under `manifest_lock`, and an entry forgotten while a
+build is running stays forgotten for the next one.
+
+Photos are not tracked: adding or editing photos in Immich does not bump
+the entry's updated_at, so an entry file keeps the media it was rendered
+with until the entry itself changes. Run with --force to pick up photo
+changes on older entries.
+"""
+import argparse
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+from src.api.schemas import BlogPost, JournalEntryResponse, build_pagination
+from src.config import Config
+from src.homelab_services.immich.immich import ImmichClient
+from src.homelab_services.journiv.journiv import JournivClient
+from src.homelab_services.journiv.schemas import EntryResponse, MoodLogResponse
+from src.logger import logger
+
+
+def write_if_changed(path: str, data: bytes, previous_hash: Optional[str] = None) -> str:
+    """Atomically write `data` unless its hash matches; returns the hash"""
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == previous_hash and os.path.exists(path):
+        return digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return digest
+
+
+def load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, "manifest.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"entries": {}, "shards": {}}
+
+
+def write_manifest(out_dir: str, manifest: dict) -> None:
+    write_if_changed(os.path.join(out_dir, "manifest.json"), json.dumps(manifest, indent=2).encode())
+
+
+@contextmanager
+def manifest_lock(out_dir: str) -> Iterator[None]:
+    """Exclusive lock on the manifest, across threads and processes"""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, ".manifest.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def forget_entries(out_dir: str, entry_ids: List[str]) -> int:
+    """
+    Drop entries from the manifest so the next build re-renders them. Each
+    is also logged under `forgotten` with a sequence number, which is how a
+    build that is running meanwhile learns it must not record them as done.
+    """
+    if not os.path.exists(os.path.join(out_dir, "manifest.json")):
+        return 0
+    with manifest_lock(out_dir):
+        manifest = load_manifest(out_dir)
+        seq = manifest.get("forget_seq", 0) + 1
+        forgotten = manifest.setdefault("forgotten", {})
+        for entry_id in entry_ids:
+            forgotten[entry_id] = seq
+        dropped = [entry_id for entry_id in entry_ids if manifest["entries"].pop(entry_id, None) is not None]
+        manifest["forget_seq"] = seq
+        write_manifest(out_dir, manifest)
+    return len(dropped)
+
+
+def forgotten_since(manifest: dict, seq: int) -> Set[str]:
+    return {entry_id for entry_id, forgotten_at in manifest.get("forgotten", {}).items() if forgotten_at > seq}
+
+
+async def build(out_dir: str, journal_id: str, page_size: int, force: bool = False) -> None:
+    journiv = JournivClient()
+    immich = ImmichClient()
+    try:
+        with manifest_lock(out_dir):
+            manifest = load_manifest(out_dir)
+        start_seq = manifest.get("forget_seq", 0)
+        if force:
+            manifest = {"entries": {}, "shards": {}}
+        if manifest.get("page_size") != page_size:
+            manifest["shards"] = {}
+
+        entries, mood_logs, tags = await asyncio.gather(
+            journiv.get_all_journal_entries(journal_id),
+            journiv.get_all_mood_logs(),
+            journiv.get_all_tags(),
+        )
+        entries.sort(key=lambda entry: (entry.entry_date, entry.id), reverse=True)
+
+        moods: Dict[str, List[MoodLogResponse]] = {}
+        for log in mood_logs:
+            if log.entry_id:
+                moods.setdefault(log.entry_id, []).append(log)
+
+        previous = manifest.get("entries", {})
+        changed = [entry for entry in entries if previous.get(entry.id) != entry.updated_at]
+        removed = set(previous) - {entry.id for entry in entries}
+        logger.info(f"Static build: {len(changed)} changed, {len(removed)} removed, {len(entries)} total")
+
+        await write_entry_files(out_dir, journiv, immich, changed, moods)
+        for entry_id in removed:
+            path = os.path.join(out_dir, "entries", f"{entry_id}.json")
+            if os.path.exists(path):
+                os.remove(path)
+
+        shards = write_page_shards(out_dir, entries, page_size, manifest.get("shards", {}))
+        shards["tags.json"] = write_if_changed(
+            os.path.join(out_dir, "tags.json"),
+            json.dumps([tag.model_dump(mode="json") for tag in tags]).encode(),
+            manifest.get("shards", {}).get("tags.json"),
+        )
+
+        total_pages = (len(entries) + page_size - 1) // page_size
+        index = {"totalCount": len(entries), "totalPages": total_pages, "pageSize": page_size}
+        shards["index.json"] = write_if_changed(
+            os.path.join(out_dir, "index.json"), json.dumps(index).encode(), manifest.get("shards", {}).get("index.json")
+        )
+
+        with manifest_lock(out_dir):
+            # Entries forgotten while this build ran may have been rendered
+            # before the change, so they stay out of the manifest
+            current = load_manifest(out_dir)
+            late = forgotten_since(current, start_seq)
+            write_manifest(out_dir, {
+                "built_at": datetime.now().isoformat(),
+                "journal_id": journal_id,
+                "page_size": page_size,
+                "entries": {entry.id: entry.updated_at for entry in entries if entry.id not in late},
+                "shards": shards,
+                "forget_seq": current.get("forget_seq", 0),
+                "forgotten": {entry_id: current["forgotten"][entry_id] for entry_id in late},
+            })
+    finally:
+        await journiv.aclose()
+        await immich.aclose()
+
+
+async def write_entry_files(
+    out_dir: str,
+    journiv: JournivClient,
+    immich: ImmichClient,
+    entries: List[EntryResponse],
+    moods: Dict[str, List[MoodLogResponse]],
+) -> None:
+    """Render a BlogPost file for each changed entry"""
+    if not entries:
+        return
+
+    media, tags = await asyncio.gather(
+        immich.search_assets_by_dates([date.fromisoformat(entry.entry_date) for entry in entries]),
+        journiv.get_tags_for_entries([entry.id for entry in entries]),
+    )
+    for entry in entries:
+        entry_moods = moods.get(entry.id) or []
+        post = BlogPost(
+            id=entry.id,
+            title=entry.title,
+            content=entry.content,
+            entry_date=entry.entry_date,
+            created_at=entry.created_at,
+            updated_at=entry.updated_at,
+            mood=entry_moods[0] if entry_moods else None,
+            tags=tags.get(entry.id, []),
+            media=media.get(entry.entry_date, []),
+        )
+        write_if_changed(os.path.join(out_dir, "entries", f"{entry.id}.json"), post.model_dump_json().encode())
+
+
+def write_page_shards(out_dir: str, entries: List[EntryResponse], page_size: int, previous: Dict[str, str]) -> Dict[str, str]:
+    """Write pages/<n>.json shards whose content changed; drop shards past the end"""
+    shards: Dict[str, str] = {}
+    total_count = len(entries)
+    for offset in range(0, total_count, page_size):
+        page = entries[offset:offset + page_size]
+        name = f"pages/{offset // page_size + 1}.json"
+        body = {
+            "entries": [
+                JournalEntryResponse(
+                    id=entry.id,
+                    title=entry.title,
+                    content=entry.content,
+                    entry_date=entry.entry_date,
+                    created_at=entry.created_at,
+                    updated_at=entry.updated_at
+                ).model_dump(mode="json")
+                for entry in page
+            ],
+            "pagination": build_pagination(page, offset, page_size, total_count),
+        }
+        shards[name] = write_if_changed(os.path.join(out_dir, name), json.dumps(body).encode(), previous.get(name))
+
+    for name in set(previous) - set(shards):
+        if name.startswith("pages/"):
+            path = os.path.join(out_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+    return shards
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the blog as static JSON shards")
+    parser.add_argument("--out", default=Config.STATIC_SITE_DIR, help="Output directory")
+    parser.add_argument(
+        "--journal-id", default=Config.JOURNIV_JOURNAL_ID, required=Config.JOURNIV_JOURNAL_ID is None,
+        help="Journal to build (default: JOURNIV_JOURNAL_ID)",
+    )
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--force", action="store_true", help="Ignore the previous manifest and rebuild everything")
+    args = parser.parse_args()
+
+    asyncio.run(build(args.out, args.journal_id, args.page_size, args.force))
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from src.config import Config
+
+# Trace of the request being served, set by the tracing middleware
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Spans recorded while serving one request.
+
+    Every span is a Chrome trace "complete" event. Concurrent asyncio tasks
+    (and threads) get their own lane, so fan-out shows up side by side.
+    """
+
+    def __init__(self, name: str, forced: bool = False):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.forced = forced
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.status: Optional[int] = None
+        self.events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter_ns()
+        self._lanes: Dict[int, int] = {}
+
+    def lane(self) -> int:
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = threading.get_ident()
+        return self._lanes.setdefault(key, len(self._lanes) + 1)
+
+    def add(self, name: str, category: str, start_ns: int, end_ns: int, lane: int, args: Dict[str, Any]) -> None:
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self._origin) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": 1,
+            "tid": lane,
+            "args": args,
+        })
+
+    def summary(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_seconds": round(self.duration, 4) if self.duration is not None else None,
+            "spans": len(self.events),
+            "forced": self.forced,
+        }
+
+    def to_chrome(self) -> dict:
+        """Chrome trace JSON, loadable in chrome://tracing or Perfetto"""
+        return {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": self.summary(),
+        }
+
+
+class Span:
+    __slots__ = ("trace", "name", "category", "args", "start", "lane")
+
+    def __init__(self, trace: Trace, name: str, category: str, args: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.lane = self.trace.lane()
+        self.start = time.perf_counter_ns()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace.add(self.name, self.category, self.start, time.perf_counter_ns(), self.lane, self.args)
+        return False
+
+
+class _NoopSpan:
+    def __enter__(self) -> Dict[str, Any]:
+        return {}
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, category: str = "app", **args: Any):
+    """
+    Time a block as a span of the current trace; a no-op when the request
+    is not being traced. Entering yields a dict for attaching results:
+
+        with span("journiv entries", "upstream") as attrs:
+            attrs["status"] = response.status_code
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return Span(trace, name, category, args)
+
+
+class TraceBuffer:
+    """The most recent kept traces, oldest dropped first"""
+
+    def __init__(self, size: int = Config.TRACE_BUFFER_SIZE):
+        self._traces: Deque[Trace] = deque(maxlen=size)
+
+    def add(self, trace: Trace) -> None:
+        self._traces.append(trace)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        for trace in self._traces:
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def list(self) -> List[dict]:
+        return [trace.summary() for trace in reversed(self._traces)]
+
+    def clear(self) -> None:
+        self._traces.clear()
+
+
+trace_buffer = TraceBuffer()
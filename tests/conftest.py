@@ -0,0 +1,78 @@
+"""
+The tests run against the fake Journiv/Immich upstream from bench/, served
+over real HTTP from a background thread for the whole session. The
+environment has to point at it before anything under `src` is imported,
+since Config reads it at import time.
+"""
+import argparse
+import asyncio
+import copy
+import tempfile
+
+import pytest
+
+from bench.fake_upstream import JOURNAL_ID, Dataset, Faults
+from bench.load_test import configure_app_env, start_fake_upstream
+
+DATASET = Dataset(entries=250)
+UPSTREAM_URL, stop_upstream = start_fake_upstream(DATASET, Faults())
+configure_app_env(UPSTREAM_URL, argparse.Namespace(mirror=False, no_response_cache=False), tempfile.mkdtemp())
+
+
+def pytest_sessionfinish(session, exitstatus):
+    stop_upstream()
+
+
+@pytest.fixture
+def dataset() -> Dataset:
+    return DATASET
+
+
+@pytest.fixture
+def restore_dataset(dataset):
+    """Undo a test's edits to the fake upstream's entries"""
+    entries = copy.deepcopy(dataset.entry_list)
+    yield
+    dataset.entry_list[:] = entries
+    dataset.entries_by_id = {entry["id"]: entry for entry in entries}
+
+
+@pytest.fixture
+def journal_id() -> str:
+    return JOURNAL_ID
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """An empty JournivMirror in the test's temporary directory"""
+    from src.homelab_services.journiv.mirror import JournivMirror
+
+    mirror = JournivMirror(str(tmp_path / "mirror.sqlite3"))
+    yield mirror
+    mirror.close()
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine function with a fresh JournivClient on its own event loop"""
+    from src.homelab_services.journiv.journiv import JournivClient
+
+    def run(test):
+        async def main():
+            client = JournivClient()
+            try:
+                return await test(client)
+            finally:
+                await client.aclose()
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def upstream_calls():
+    """Calls made to the fake upstream since the test started, by route"""
+    import httpx
+
+    httpx.post(f"{UPSTREAM_URL}/__reset")
+    return lambda: httpx.get(f"{UPSTREAM_URL}/__stats").json()
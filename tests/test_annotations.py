@@ -0,0 +1,20 @@
+from src.api.endpoints.journiv.journiv import fetch_annotations
+from src.homelab_services.journiv.schemas import EntrySummary
+
+MOOD_LOGS = "GET /api/v1/moods/logs"
+ENTRY_TAGS = "GET /api/v1/tags/entry/{entry_id}"
+
+
+def test_page_annotations_sweep_moods_once(run, dataset, journal_id, upstream_calls):
+    entries = [EntrySummary.model_validate(entry) for entry in dataset.entry_list[10:30]]
+
+    moods, tags = run(lambda client: fetch_annotations(client, entries, concurrency=4))
+
+    calls = upstream_calls()
+    # The page's mood logs fit in one window of the date sweep, not one call per entry
+    assert calls[MOOD_LOGS] == 1
+    assert calls[ENTRY_TAGS] == len(entries)
+    for entry in entries:
+        expected = [log["id"] for log in dataset.mood_logs if log["entry_id"] == entry.id]
+        assert [log.id for log in moods.get(entry.id, [])] == expected
+        assert [tag.id for tag in tags[entry.id]] == [tag["id"] for tag in dataset.entry_tags[entry.id]]
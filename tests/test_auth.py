@@ -0,0 +1,37 @@
+import asyncio
+
+from src.homelab_services.journiv import auth
+
+
+def test_concurrent_401s_renew_the_session_once(run, journal_id, upstream_calls):
+    async def requests(client):
+        # A token the upstream rejects, with no expiry to catch it early
+        client.access_token = "not-a-jwt"
+        await asyncio.gather(
+            *(client.get_journal_entries(journal_id, limit=5, offset=offset) for offset in range(0, 50, 5))
+        )
+        return client.auth.metrics
+
+    metrics = run(requests)
+    calls = upstream_calls()
+    assert calls["POST /api/v1/auth/login"] == 1
+    assert metrics.logins == 1 and metrics.auth_retries == 10
+
+
+def test_token_is_refreshed_before_it_expires(run, journal_id, upstream_calls, monkeypatch):
+    async def requests(client):
+        first = await client.auth.get_token()
+        assert await client.auth.get_token() == first
+
+        expires_at = client.auth.expires_at
+        monkeypatch.setattr(auth.time, "time", lambda: expires_at - client.auth.refresh_margin + 1)
+        second = await client.auth.get_token()
+        await client.get_journal_entries(journal_id, limit=5)
+        return first, second, client.auth.metrics
+
+    first, second, metrics = run(requests)
+    calls = upstream_calls()
+    assert second != first
+    assert calls["POST /api/v1/auth/login"] == 1
+    assert calls["POST /api/v1/auth/refresh"] == 1
+    assert metrics.auth_retries == 0
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import date
+
+import httpx
+
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.main import app
+
+
+def blog_posts(**params) -> httpx.Response:
+    async def main():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                return await http.get("/api/blog-posts", params=params)
+        finally:
+            await immich_client.aclose()
+            await journiv_client.aclose()
+
+    return asyncio.run(main())
+
+
+def test_posts_join_entries_moods_tags_and_photos(dataset, journal_id):
+    response = blog_posts(journal_id=journal_id, page=2, limit=7)
+    assert response.status_code == 200
+    body = response.json()
+
+    entries = dataset.entry_list[7:14]
+    moods = {log["entry_id"]: log for log in dataset.mood_logs}
+    assert [post["id"] for post in body["posts"]] == [entry["id"] for entry in entries]
+    for post, entry in zip(body["posts"], entries):
+        assert post["title"] == entry["title"] and post["entry_date"] == entry["entry_date"]
+        assert (post["mood"] or {}).get("id") == moods.get(entry["id"], {}).get("id")
+        assert [tag["id"] for tag in post["tags"]] == [tag["id"] for tag in dataset.entry_tags[entry["id"]]]
+        photos = dataset.assets_for_day(date.fromisoformat(entry["entry_date"]))
+        assert [asset["id"] for asset in post["media"]] == [asset["id"] for asset in photos]
+    assert body["pagination"]["currentPage"] == 2
+    assert body["pagination"]["totalCount"] == len(dataset.entry_list)
+
+
+def test_posts_survive_immich_being_down(dataset, journal_id, monkeypatch):
+    async def down(dates, with_exif=True):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(immich_client, "search_assets_by_dates", down)
+    response = blog_posts(journal_id=journal_id, page=1, limit=3)
+    assert response.status_code == 200
+    posts = response.json()["posts"]
+    assert [post["id"] for post in posts] == [entry["id"] for entry in dataset.entry_list[:3]]
+    assert all(post["media"] == [] for post in posts)
@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from src.api.cache_warmer import CacheWarmer
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.main import app
+
+SEARCH = "POST /api/search/metadata"
+
+
+def test_warmed_pages_need_no_immich_search(journal_id, upstream_calls):
+    warmer = CacheWarmer(app, journal_id, pages=2, page_size=10, paths=["/api/journal-entries/paginated"])
+
+    async def main():
+        try:
+            await warmer.warm()
+            warmed = upstream_calls().get(SEARCH, 0)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                for page in (1, 2):
+                    response = await http.get("/api/blog-posts", params={"journal_id": journal_id, "page": page, "limit": 10})
+                    assert response.status_code == 200 and response.json()["posts"][0]["media"] is not None
+            return warmed, upstream_calls().get(SEARCH, 0)
+        finally:
+            await immich_client.aclose()
+            await journiv_client.aclose()
+
+    warmed, after = asyncio.run(main())
+    assert warmed > 0
+    assert after == warmed
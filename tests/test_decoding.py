@@ -0,0 +1,30 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from src.homelab_services.decoding import decode_list, list_adapter
+from src.homelab_services.journiv.schemas import EntryKey, EntryResponse, EntrySummary
+
+
+def test_projections_keep_only_their_fields(dataset):
+    content = json.dumps(dataset.entry_list[:5]).encode()
+
+    keys = decode_list(content, EntryKey)
+    assert [key.id for key in keys] == [entry["id"] for entry in dataset.entry_list[:5]]
+    assert set(EntryKey.model_fields) == set(keys[0].model_dump())
+
+    summaries = decode_list(content, EntrySummary)
+    full = decode_list(content, EntryResponse)
+    assert summaries[0].model_dump() == {field: full[0].model_dump()[field] for field in EntrySummary.model_fields}
+
+
+def test_adapters_are_cached_per_model():
+    assert list_adapter(EntryKey) is list_adapter(EntryKey)
+    assert list_adapter(EntryKey) is not list_adapter(EntrySummary)
+
+
+def test_invalid_items_are_rejected():
+    assert decode_list(b"[]", EntryKey) == []
+    with pytest.raises(ValidationError):
+        decode_list(b'[{"id": "entry-1"}]', EntryKey)
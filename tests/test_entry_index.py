@@ -0,0 +1,114 @@
+import pytest
+
+from src.homelab_services.journiv.entry_index import JournalIndex, JournalIndexCache, make_cursor, parse_cursor
+from src.homelab_services.journiv.mirror import JournivMirror
+from src.homelab_services.journiv.schemas import EntryKey
+
+
+def test_cursor_round_trip():
+    entry = EntryKey(id="entry-1", entry_date="2025-01-02", updated_at="2025-01-02T10:00:00")
+    assert parse_cursor(make_cursor(entry)) == ("2025-01-02", "entry-1")
+    for bad in ["", "2025-01-02", ",entry-1", "2025-01-02,"]:
+        with pytest.raises(ValueError):
+            parse_cursor(bad)
+
+
+def test_index_walks_the_journal_by_cursor(run, dataset, journal_id, upstream_calls):
+    async def walk(client):
+        cache = JournalIndexCache(client, ttl=60)
+        index = await cache.get(journal_id)
+        assert await cache.get(journal_id) is index
+
+        seen, offset = [], 0
+        while offset < index.total_count:
+            page = await client.get_journal_entries(journal_id, limit=40, offset=offset, model=EntryKey)
+            assert index.matches_page(offset, page)
+            seen.extend(entry.id for entry in page)
+            offset = index.offset_after(make_cursor(page[-1]))
+        return index, seen
+
+    index, seen = run(walk)
+    assert seen == [entry["id"] for entry in dataset.entry_list]
+    assert index.total_count == len(dataset.entry_list)
+    assert upstream_calls()["GET /api/v1/entries/journal/{journal_id}"] >= 3
+
+
+def test_index_resolves_cursors_by_keyset():
+    entries = [
+        EntryKey(id=f"e{i}", entry_date=f"2025-01-{30 - i:02d}", updated_at="2025-02-01T00:00:00")
+        for i in range(5)
+    ]
+    index = JournalIndex.from_entries("journal", entries)
+
+    assert index.offset_after("2025-01-29,e1") == 2
+    # The cursor's entry is gone or moved: the keyset still places it
+    assert index.offset_after("2025-01-29,gone") == 1
+    assert index.offset_after("2025-01-27,e1") == 4
+    assert index.offset_after("2024-12-31,e9") == 5
+
+    edited = entries[2].model_copy(update={"updated_at": "2025-03-01T00:00:00"})
+    moved = entries[2].model_copy(update={"entry_date": "2025-01-01"})
+    assert index.matches_page(2, [edited, entries[3]]), "edits that keep the date do not matter"
+    assert not index.matches_page(2, [moved, entries[3]])
+    assert not index.matches_page(2, entries[3:5])
+
+
+def test_refresh_reads_only_the_head(run, dataset, journal_id, upstream_calls, restore_dataset):
+    route = "GET /api/v1/entries/journal/{journal_id}"
+
+    async def refresh(client):
+        cache = JournalIndexCache(client, ttl=60)
+        await cache.get(journal_id)
+        built = upstream_calls()[route]
+
+        newest = dict(dataset.entry_list[0], id="entry-new", entry_date="2099-01-01", updated_at="2099-01-01T00:00:00")
+        dataset.entry_list.insert(0, newest)
+        del dataset.entry_list[50]
+        cache.invalidate(journal_id)
+        index = await cache.get(journal_id)
+        return index, upstream_calls()[route] - built
+
+    index, calls = run(refresh)
+    assert calls == 2
+    assert index.ids == [entry["id"] for entry in dataset.entry_list]
+    assert index.watermark == "2099-01-01T00:00:00"
+
+
+def test_full_invalidation_catches_deletions_further_back(run, dataset, journal_id, restore_dataset):
+    async def rebuild(client):
+        cache = JournalIndexCache(client, ttl=60)
+        await cache.get(journal_id)
+        del dataset.entry_list[200]
+        cache.invalidate(journal_id)
+        refreshed = (await cache.get(journal_id)).total_count
+        cache.invalidate(journal_id, full=True)
+        return refreshed, (await cache.get(journal_id)).total_count
+
+    refreshed, rebuilt = run(rebuild)
+    assert refreshed == len(dataset.entry_list) + 1, "a refresh keeps the old tail"
+    assert rebuilt == len(dataset.entry_list)
+
+
+def test_mirror_and_index_resolve_cursors_alike(run, tmp_path, dataset, journal_id):
+    mirror = JournivMirror(str(tmp_path / "mirror.sqlite3"))
+
+    async def build(client):
+        await mirror.sync(client, journal_id, full=True)
+        return await JournalIndexCache(client).get(journal_id)
+
+    try:
+        index = run(build)
+        middle = dataset.entry_list[100]
+        cursors = [
+            f"{middle['entry_date']},{middle['id']}",
+            f"{middle['entry_date']},entry-deleted",  # an entry that no longer exists
+            f"{middle['entry_date']},{'z' * 10}",
+        ]
+        for cursor in cursors:
+            entry_date, entry_id = parse_cursor(cursor)
+            offset = mirror.count_entries_before(journal_id, entry_date, entry_id)
+            assert index.offset_after(cursor) == offset
+            after = mirror.get_entries_after(journal_id, entry_date, entry_id, limit=5)
+            assert [entry.id for entry in after] == index.ids[offset:offset + 5]
+    finally:
+        mirror.close()
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.api.endpoints.journiv import journiv as endpoints
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.main import app
+
+
+def export(journal_id: str, accept_encoding: str, format: str = "ndjson") -> httpx.Response:
+    async def main():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                return await http.get(
+                    "/api/journal-entries/export",
+                    params={"journal_id": journal_id, "format": format},
+                    headers={"Accept-Encoding": accept_encoding},
+                )
+        finally:
+            await journiv_client.aclose()
+
+    return asyncio.run(main())
+
+
+def test_export_is_gzipped_on_request(dataset, journal_id):
+    response = export(journal_id, "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    lines = response.text.splitlines()  # httpx undoes the gzip
+    assert [json.loads(line)["id"] for line in lines] == [entry["id"] for entry in dataset.entry_list]
+
+
+def test_uncompressed_export_still_varies(journal_id):
+    response = export(journal_id, "identity")
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+@pytest.fixture
+def failing_export(dataset, monkeypatch):
+    """Exports that fail after the first page"""
+    from src.homelab_services.journiv.schemas import EntrySummary
+
+    async def pages(client, journal_id):
+        yield [EntrySummary.model_validate(entry) for entry in dataset.entry_list[:3]]
+        raise httpx.ReadTimeout("Journiv stopped answering")
+
+    monkeypatch.setattr(endpoints, "iter_entry_pages", pages)
+
+
+def test_failed_ndjson_export_ends_with_an_error_record(failing_export, journal_id):
+    lines = [json.loads(line) for line in export(journal_id, "identity").text.splitlines()]
+    assert len(lines) == 4
+    assert all("error" not in line for line in lines[:3])
+    assert "Journiv stopped answering" in lines[-1]["error"]
+
+
+def test_failed_json_export_is_not_valid_json(failing_export, journal_id):
+    body = export(journal_id, "identity", format="json").text
+    assert body.startswith("[")
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(body)
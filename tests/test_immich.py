@@ -0,0 +1,90 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from src.api.endpoints.immich.schemas import SearchAssetsRequest, SearchMetadataSummaryResponse
+from src.homelab_services.immich.immich import ImmichClient, date_windows
+
+
+@pytest.mark.parametrize("max_pages", [1, 2, 3])
+def test_prefetch_holds_at_most_max_pages(max_pages):
+    client = ImmichClient()
+    fetched, consumed, held = [], [], []
+
+    async def search_metadata(request, use_cache, model):
+        held.append(len(fetched) + 1 - len(consumed))  # counting the page being fetched
+        fetched.append(request.page)
+        await asyncio.sleep(0)
+        return SimpleNamespace(assets=SimpleNamespace(nextPage=request.page + 1 if request.page < 8 else None))
+
+    client.search_metadata = search_metadata
+
+    async def main():
+        async for result in client.iter_asset_pages(SearchAssetsRequest(), prefetch=True, max_pages=max_pages):
+            await asyncio.sleep(0.001)  # a slow consumer lets the producer run ahead
+            consumed.append(result)
+
+    asyncio.run(main())
+    assert fetched == list(range(1, 9))
+    assert max(held) == max_pages
+
+
+def days(*offsets: int) -> list:
+    return [date(2025, 1, 1) + timedelta(days=offset) for offset in offsets]
+
+
+def test_date_windows_merge_only_near_days():
+    assert date_windows([]) == []
+    assert date_windows(days(0, 1, 2, 4), max_gap=2, max_span=14) == [(days(0)[0], days(4)[0])]
+    # Sparse days get a search each instead of one over the whole month
+    assert date_windows(days(0, 10, 20, 30), max_gap=2, max_span=14) == [(d, d) for d in days(0, 10, 20, 30)]
+    assert date_windows(days(0, 3), max_gap=2, max_span=14) == [(d, d) for d in days(0, 3)]
+
+
+def test_date_windows_split_long_runs():
+    windows = date_windows(days(*range(30)), max_gap=2, max_span=14)
+    assert windows == [(days(0)[0], days(13)[0]), (days(14)[0], days(27)[0]), (days(28)[0], days(29)[0])]
+    assert all((end - start).days < 14 for start, end in windows)
+
+
+def test_sparse_dates_search_only_around_each_day(dataset, upstream_calls):
+    client = ImmichClient()
+    wanted = [dataset.end - timedelta(days=offset) for offset in (0, 1, 20, 45)]
+
+    async def main():
+        try:
+            return await client.search_assets_by_dates(wanted)
+        finally:
+            await client.aclose()
+
+    grouped = asyncio.run(main())
+    assert upstream_calls()["POST /api/search/metadata"] == 3
+    assert sorted(grouped) == sorted(day.isoformat() for day in wanted)
+    for day in wanted:
+        assert [str(asset.id) for asset in grouped[day.isoformat()]] == [asset["id"] for asset in dataset.assets_for_day(day)]
+
+
+def test_failed_asset_stream_ends_with_an_error_record(monkeypatch):
+    from src.api.endpoints.immich.immich import immich_client
+    from src.main import app
+
+    async def assets(request, **kwargs):
+        yield SimpleNamespace(model_dump_json=lambda: '{"id": "asset-1"}')
+        # Immich sent a page the model rejects
+        SearchMetadataSummaryResponse.model_validate({"assets": "not a page"})
+
+    monkeypatch.setattr(immich_client, "iter_assets", assets)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            return await http.post("/api/immich/search/assets/date/2025-06-30/stream")
+
+    response = asyncio.run(main())
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 2
+    assert "error" not in lines[0]
+    assert "aborted" in lines[-1]["error"]
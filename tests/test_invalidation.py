@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+from src.api import invalidation
+from src.api.invalidation import ChangeEvent, Invalidator
+from src.homelab_services.immich.immich import ImmichClient
+from src.homelab_services.journiv.entry_index import JournalIndexCache
+from src.homelab_services.journiv.mirror import JournivMirror, MirrorSyncWorker
+
+
+def make_invalidator(client, tmp_path, journal_id):
+    mirror = JournivMirror(str(tmp_path / "mirror.sqlite3"))
+    worker = MirrorSyncWorker(mirror, client, journal_id)
+    invalidator = Invalidator(
+        client, JournalIndexCache(client), ImmichClient(), mirror, worker,
+        journal_id=journal_id, static_dir=str(tmp_path / "static"),
+    )
+    return invalidator, mirror
+
+
+def test_plan_has_no_side_effects(run, tmp_path, dataset, journal_id):
+    entry = dataset.entry_list[0]
+
+    async def plan(client):
+        invalidator, mirror = make_invalidator(client, tmp_path, journal_id)
+        try:
+            await mirror.sync(client, journal_id, full=True)
+            client.lookup.tags_loaded = True
+            events = [
+                ChangeEvent(type="entry", action="deleted", id=entry["id"], journal_id=journal_id),
+                ChangeEvent(type="mood_log", entry_id=entry["id"]),
+                ChangeEvent(type="tag", id="tag-001"),
+            ]
+            result = invalidator._plan(events)
+            return result, mirror.count_entries(journal_id), client.lookup.tags_loaded
+        finally:
+            mirror.close()
+
+    result, count, tags_loaded = run(plan)
+    assert result.mirror_deletes == {entry["id"]}
+    assert result.rerender == {entry["id"]} and result.tags_changed
+    assert result.entries_changed and result.mood_logs_changed
+    assert {f"entry:{entry['id']}", f"journal:{journal_id}", "tag:tag-001", "stats"} <= result.tags
+    assert count == len(dataset.entry_list)
+    assert tags_loaded
+
+
+def test_apply_deletes_from_the_mirror_in_the_background(run, tmp_path, dataset, journal_id):
+    entry = dataset.entry_list[0]
+
+    async def apply(client):
+        invalidator, mirror = make_invalidator(client, tmp_path, journal_id)
+        try:
+            await mirror.sync(client, journal_id, full=True)
+            summary = await invalidator.apply([ChangeEvent(type="entry", action="deleted", id=entry["id"])])
+            await asyncio.gather(*invalidator._refreshes)
+            return summary, {e.id for e in mirror.get_entries(journal_id)}
+        finally:
+            mirror.close()
+
+    summary, remaining = run(apply)
+    assert summary["mirror_refresh"] and summary["journals"] == [journal_id]
+    assert entry["id"] not in remaining
+    assert len(remaining) == len(dataset.entry_list) - 1
+
+
+def test_static_manifest_is_updated_off_the_event_loop(run, tmp_path, journal_id, monkeypatch):
+    threads = []
+
+    def forget_entries(out_dir, entry_ids):
+        threads.append(threading.get_ident())
+        return len(entry_ids)
+
+    monkeypatch.setattr(invalidation, "forget_entries", forget_entries)
+
+    async def apply(client):
+        invalidator, mirror = make_invalidator(client, tmp_path, journal_id)
+        try:
+            summary = await invalidator.apply([ChangeEvent(type="mood_log", entry_id="entry-000001")])
+            return summary, threading.get_ident()
+        finally:
+            mirror.close()
+
+    summary, loop_thread = run(apply)
+    assert summary["static_entries"] == 1
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,60 @@
+from src.homelab_services.journiv.lookup import JournivLookup
+from src.homelab_services.journiv.schemas import EntryResponse
+
+ENTRIES = "GET /api/v1/entries/journal/{journal_id}"
+MOOD_LOGS = "GET /api/v1/moods/logs"
+
+
+def entry(entry_id: str, entry_date: str) -> EntryResponse:
+    return EntryResponse(
+        id=entry_id, journal_id="journal", entry_date=entry_date, title="", content="",
+        location=None, weather=None, prompt_id=None, word_count=0, is_pinned=False,
+        created_at="2025-01-01T00:00:00", updated_at="2025-01-01T00:00:00",
+    )
+
+
+def test_entries_are_bucketed_by_date():
+    lookup = JournivLookup()
+    entries = [entry("a", "2025-01-03"), entry("b", "2025-01-01"), entry("c", "2025-01-03"), entry("d", "2025-01-07")]
+    assert lookup.load_entries("journal", entries)
+
+    assert [e.id for e in lookup.get_entries_by_date("2025-01-03")] == ["a", "c"]
+    assert lookup.get_entries_by_date("2025-01-02") == []
+    assert [e.id for e in lookup.get_entries_by_date_range("2025-01-02", "2025-01-07")] == ["a", "c", "d"]
+    assert lookup.has_entries("journal", ttl=60) and not lookup.has_entries("other", ttl=60)
+
+
+def test_journals_over_the_bound_are_not_indexed():
+    lookup = JournivLookup(max_entries=2)
+    assert lookup.load_entries("journal", [entry("a", "2025-01-01")])
+    assert not lookup.load_entries("journal", [entry(i, "2025-01-01") for i in "abc"])
+    assert not lookup.entries_loaded
+    assert lookup.get_entries_by_date("2025-01-01") == []
+
+
+def test_entries_by_date_come_from_one_bulk_load(run, dataset, journal_id, upstream_calls):
+    days = [dataset.entry_list[i]["entry_date"] for i in (0, 40, 120)]
+
+    async def lookups(client):
+        found = [await client.get_entries_by_date(day, journal_id) for day in days]
+        loaded = upstream_calls().get(ENTRIES, 0)
+        found.append(await client.get_entries_by_date(days[0], journal_id))
+        return found, loaded
+
+    found, loaded = run(lookups)
+    for day, entries in zip(days + days[:1], found):
+        assert sorted(e.id for e in entries) == sorted(e["id"] for e in dataset.entry_list if e["entry_date"] == day)
+    assert upstream_calls()[ENTRIES] == loaded, "later lookups do not call Journiv"
+    assert "GET /api/v1/entries/date-range" not in upstream_calls()
+
+
+def test_mood_checks_share_one_sweep(run, dataset, upstream_calls):
+    with_mood = {log["entry_id"] for log in dataset.mood_logs}
+    checked = dataset.entry_list[:20]
+
+    async def checks(client):
+        return [await client.entry_has_mood_log(e["id"]) for e in checked]
+
+    assert run(checks) == [e["id"] in with_mood for e in checked]
+    pages = -(-len(dataset.mood_logs) // 50)
+    assert upstream_calls()[MOOD_LOGS] <= pages + 1
@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+
+import httpx
+
+from src.api.endpoints.immich import immich as endpoints
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.homelab_services.immich.thumbnail_cache import ThumbnailCache
+from src.main import app
+
+
+def request_then_scrape(*paths: str) -> str:
+    async def main():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                for path in paths:
+                    await http.get(path)
+                return (await http.get("/metrics")).text
+        finally:
+            await immich_client.aclose()
+            await journiv_client.aclose()
+
+    return asyncio.run(main())
+
+
+def samples(text: str, name: str) -> list:
+    return [line for line in text.splitlines() if line.startswith(name + "{")]
+
+
+def test_requests_are_labelled_by_route_template(tmp_path, monkeypatch):
+    monkeypatch.setattr(endpoints, "thumbnail_cache", ThumbnailCache(str(tmp_path)))
+    asset_ids = [str(uuid.uuid4()) for _ in range(3)]
+    text = request_then_scrape(*(f"/api/immich/assets/{asset_id}/thumbnail" for asset_id in asset_ids))
+
+    requests = samples(text, "http_requests_total")
+    route = 'route="/api/immich/assets/{asset_id}/thumbnail"'
+    assert any(route in line and 'status="200"' in line for line in requests)
+    assert not any(asset_id in line for asset_id in asset_ids for line in text.splitlines())
+    assert any(route in line and 'upstream="immich"' in line for line in samples(text, "http_request_upstream_seconds_count"))
+
+
+def test_unknown_paths_share_one_label():
+    paths = [f"/no/such/{uuid.uuid4()}" for _ in range(3)]
+    text = request_then_scrape(*paths)
+
+    assert any('route="unmatched"' in line and 'status="404"' in line for line in samples(text, "http_requests_total"))
+    assert not any(path in text for path in paths)
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+
+def test_full_sync_mirrors_the_journal(run, mirror, dataset, journal_id):
+    run(lambda client: mirror.sync(client, journal_id, full=True))
+
+    assert mirror.is_ready(journal_id)
+    assert mirror.count_entries(journal_id) == len(dataset.entry_list)
+    assert [entry.id for entry in mirror.get_entries(journal_id, limit=10)] == [
+        entry["id"] for entry in dataset.entry_list[:10]
+    ]
+    assert len(mirror.get_tags()) == len(dataset.tag_list)
+
+
+def test_window_sync_applies_edits_and_deletions(run, mirror, dataset, journal_id, restore_dataset):
+    run(lambda client: mirror.sync(client, journal_id, full=True))
+    edited, deleted = dataset.entry_list[3], dataset.entry_list[4]
+    edited["title"] = "Xylophone recital"
+    edited["updated_at"] = "2099-01-01T00:00:00"
+    dataset.entry_list.remove(deleted)
+    start = min(edited["entry_date"], deleted["entry_date"])
+    end = max(edited["entry_date"], deleted["entry_date"])
+
+    run(lambda client: mirror.sync_window(client, journal_id, start, end))
+
+    hits, total = mirror.search_entries(journal_id, "xylophone")
+    assert total == 1 and hits[0].id == edited["id"]
+    assert mirror.count_entries(journal_id) == len(dataset.entry_list)
+    assert deleted["id"] not in {entry.id for entry in mirror.get_entries_by_date_range(start, end, journal_id)}
+    assert mirror.search_entries(journal_id, deleted["title"].split()[0])[1] <= len(dataset.entry_list)
+
+
+def test_incremental_sync_picks_up_recent_edits(run, mirror, dataset, journal_id, restore_dataset):
+    # An old entry edited long after it was written does not move the window
+    dataset.entry_list[-1]["updated_at"] = "2099-01-01T00:00:00"
+    run(lambda client: mirror.sync(client, journal_id, full=True))
+    recent = dataset.entry_list[0]
+    recent["title"] = "Xylophone recital"
+    recent["updated_at"] = "2025-07-02T09:00:00"
+    newer = dict(recent, id="entry-newer", title="Glockenspiel lesson", entry_date="2025-07-01")
+    dataset.entry_list.insert(0, newer)
+    dataset.entries_by_id[newer["id"]] = newer
+
+    run(lambda client: mirror.sync(client, journal_id))
+
+    assert [hit.id for hit in mirror.search_entries(journal_id, "xylophone")[0]] == [recent["id"]]
+    assert [hit.id for hit in mirror.search_entries(journal_id, "glockenspiel")[0]] == [newer["id"]]
+    assert mirror.count_entries(journal_id) == len(dataset.entry_list)
+
+
+def test_window_sync_is_one_transaction(run, mirror, dataset, journal_id, restore_dataset, monkeypatch):
+    run(lambda client: mirror.sync(client, journal_id, full=True))
+    edited = dataset.entry_list[3]
+    edited["title"] = "Marimba concert"
+    edited["updated_at"] = "2099-01-01T00:00:00"
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crashed mid-window")
+
+    monkeypatch.setattr(mirror, "_delete_missing", crash)
+    with pytest.raises(RuntimeError):
+        run(lambda client: mirror.sync_window(client, journal_id, edited["entry_date"], edited["entry_date"]))
+    assert mirror.search_entries(journal_id, "marimba") == ([], 0), "the upserts were rolled back"
+
+
+def test_reads_use_a_connection_per_thread(mirror, journal_id):
+    async def connections():
+        return mirror._reader, await asyncio.to_thread(lambda: mirror._reader)
+
+    loop_conn, thread_conn = asyncio.run(connections())
+    assert loop_conn is not thread_conn
+    assert mirror._reader is loop_conn
+    assert isinstance(mirror.get_entry_stats(journal_id), list)
@@ -0,0 +1,65 @@
+import asyncio
+
+from src.homelab_services.journiv.pagination import gather_pages, iter_pages
+from src.homelab_services.journiv.schemas import EntryKey
+
+
+def fake_pages(total: int, fetched: list):
+    async def fetch_page(limit: int, offset: int) -> list:
+        fetched.append(offset)
+        await asyncio.sleep(0.001 * (offset // limit % 3))  # finish out of order
+        return list(range(total))[offset:offset + limit]
+    return fetch_page
+
+
+def test_gather_pages_keeps_order_and_stops_at_short_page():
+    fetched = []
+    items = asyncio.run(gather_pages(fake_pages(95, fetched), limit=10, concurrency=4))
+
+    assert items == list(range(95))
+    # Page 9 (offset 90) is short; at most `concurrency` windows were in flight past it
+    assert max(fetched) <= 90 + 4 * 10
+    assert sorted(fetched) == list(range(0, max(fetched) + 10, 10))
+
+
+def test_gather_pages_single_short_page_fetches_once():
+    fetched = []
+    assert asyncio.run(gather_pages(fake_pages(7, fetched), limit=10, concurrency=4)) == list(range(7))
+    assert fetched == [0]
+
+
+def test_gather_pages_exact_multiple_stops_at_empty_page():
+    fetched = []
+    assert asyncio.run(gather_pages(fake_pages(30, fetched), limit=10, concurrency=2)) == list(range(30))
+    assert 30 in fetched
+
+
+def test_iter_pages_cancels_prefetch_when_closed_early():
+    started, cancelled = [], []
+
+    async def fetch_page(limit: int, offset: int) -> list:
+        started.append(offset)
+        try:
+            await asyncio.sleep(0 if offset == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(offset)
+            raise
+        return list(range(limit))
+
+    async def main():
+        pages = iter_pages(fetch_page, limit=10, concurrency=3)
+        assert await anext(pages) == list(range(10))
+        await asyncio.sleep(0)
+        await pages.aclose()
+
+    asyncio.run(main())
+    assert sorted(cancelled) == sorted(offset for offset in started if offset)
+
+
+def test_journal_fan_out_against_upstream(run, dataset, journal_id, upstream_calls):
+    entries = run(lambda client: client.get_all_journal_entries(journal_id, model=EntryKey))
+
+    assert [entry.id for entry in entries] == [entry["id"] for entry in dataset.entry_list]
+    pages = len(dataset.entry_list) // 100 + 1
+    calls = upstream_calls()["GET /api/v1/entries/journal/{journal_id}"]
+    assert pages <= calls <= pages + 4
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.homelab_services.resilience import CircuitBreaker, CircuitOpenError, Upstream
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed", "a success resets the count"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.opened == 1
+    assert 0 < breaker.retry_after() <= 60
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow(), "only one probe at a time"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_upstream_fails_fast_once_open():
+    upstream = Upstream("test", max_retries=0)
+    upstream.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    attempts = []
+
+    async def send(timeout: httpx.Timeout) -> httpx.Response:
+        attempts.append(timeout)
+        raise httpx.ConnectError("connection refused")
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await upstream.call("op", send)
+        with pytest.raises(CircuitOpenError):
+            await upstream.call("op", send)
+
+    asyncio.run(main())
+    assert len(attempts) == 2
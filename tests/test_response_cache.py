@@ -0,0 +1,130 @@
+import asyncio
+from contextvars import ContextVar
+
+import httpx
+from fastapi import FastAPI
+
+from src.api.response_cache import ResponseCacheMiddleware, invalidate_tagged, response_cache, tag_response
+
+
+def make_app(ttl: float, swr: float):
+    app = FastAPI()
+    renders = {"count": 0}
+
+    @app.get("/entry")
+    async def entry(id: str):
+        renders["count"] += 1
+        tag_response(f"entry:{id}")
+        return {"id": id, "render": renders["count"]}
+
+    response_cache.clear()
+    return ResponseCacheMiddleware(app, paths={"/entry"}, ttl=ttl, swr=swr), renders
+
+
+def client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_hit_and_conditional_request():
+    app, renders = make_app(ttl=60, swr=60)
+
+    async def main():
+        async with client(app) as http:
+            first = await http.get("/entry?id=a")
+            second = await http.get("/entry?id=a")
+            not_modified = await http.get("/entry?id=a", headers={"If-None-Match": first.headers["etag"]})
+            return first, second, not_modified
+
+    first, second, not_modified = asyncio.run(main())
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT" and second.json() == first.json()
+    assert not_modified.status_code == 304
+    assert renders["count"] == 1
+
+
+def test_stale_response_is_served_then_revalidated_once():
+    app, renders = make_app(ttl=0.05, swr=60)
+
+    async def main():
+        async with client(app) as http:
+            await http.get("/entry?id=a")
+            await asyncio.sleep(0.06)
+            stale = await asyncio.gather(*(http.get("/entry?id=a") for _ in range(3)))
+            await asyncio.sleep(0.01)  # let the background refresh land
+            fresh = await http.get("/entry?id=a")
+            return stale, fresh
+
+    stale, fresh = asyncio.run(main())
+    assert {response.headers["x-cache"] for response in stale} == {"STALE"}
+    assert {response.json()["render"] for response in stale} == {1}
+    assert renders["count"] == 2, "one background refresh for concurrent stale hits"
+    assert fresh.headers["x-cache"] == "HIT" and fresh.json()["render"] == 2
+
+
+def test_invalidate_tagged_drops_only_matching_responses():
+    app, renders = make_app(ttl=60, swr=60)
+
+    async def main():
+        async with client(app) as http:
+            await http.get("/entry?id=a")
+            await http.get("/entry?id=b")
+            dropped = invalidate_tagged({"entry:a", "entry:unrelated"})
+            a = await http.get("/entry?id=a")
+            b = await http.get("/entry?id=b")
+            return dropped, a, b
+
+    dropped, a, b = asyncio.run(main())
+    assert dropped == 1
+    assert a.headers["x-cache"] == "MISS" and a.json()["render"] == 3
+    assert b.headers["x-cache"] == "HIT"
+
+
+def test_fill_is_dropped_only_when_its_own_tags_were_invalidated():
+    app = FastAPI()
+    gate = asyncio.Event()
+
+    @app.get("/entry")
+    async def entry(id: str):
+        tag_response(f"entry:{id}")
+        await gate.wait()
+        return {"id": id}
+
+    response_cache.clear()
+    cached = ResponseCacheMiddleware(app, paths={"/entry"}, ttl=60, swr=60)
+
+    async def main():
+        async with client(cached) as http:
+            filling = [asyncio.create_task(http.get(f"/entry?id={id}")) for id in "ab"]
+            await asyncio.sleep(0.01)
+            invalidate_tagged({"entry:a"})
+            gate.set()
+            await asyncio.gather(*filling)
+            a, b = await http.get("/entry?id=a"), await http.get("/entry?id=b")
+            return a.headers["x-cache"], b.headers["x-cache"]
+
+    assert asyncio.run(main()) == ("MISS", "HIT")
+
+
+def test_background_refresh_does_not_inherit_request_context():
+    request_id: ContextVar = ContextVar("request_id", default=None)
+    app = FastAPI()
+    seen = []
+
+    @app.get("/entry")
+    async def entry(id: str):
+        seen.append(request_id.get())
+        return {"id": id}
+
+    response_cache.clear()
+    cached = ResponseCacheMiddleware(app, paths={"/entry"}, ttl=0.01, swr=60)
+
+    async def main():
+        async with client(cached) as http:
+            await http.get("/entry?id=a")
+            await asyncio.sleep(0.02)
+            request_id.set("stale request")
+            assert (await http.get("/entry?id=a")).headers["x-cache"] == "STALE"
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert seen == [None, None]
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import httpx
+
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv import journiv as endpoints
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.main import app
+
+
+def test_search_ranks_and_highlights(run, mirror, journal_id):
+    run(lambda client: mirror.sync(client, journal_id, full=True))
+
+    hits, total = mirror.search_entries(journal_id, "coffee", limit=5)
+    assert total > 5 and len(hits) == 5
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    assert all("coffee" in (hit.title + hit.snippet).lower() for hit in hits)
+
+    # Prefix matching, and input that is not valid FTS syntax
+    assert mirror.search_entries(journal_id, "COFF")[1] == total
+    assert mirror.search_entries(journal_id, 'coffee" OR (')[1] <= total
+    assert mirror.search_entries(journal_id, "   ") == ([], 0)
+
+
+def test_search_endpoint_pages_off_the_event_loop(run, mirror, journal_id, monkeypatch):
+    run(lambda client: mirror.sync(client, journal_id, full=True))
+    monkeypatch.setattr(endpoints, "journiv_mirror", mirror)
+    threads = set()
+    search_entries = mirror.search_entries
+
+    def traced(*args, **kwargs):
+        threads.add(threading.current_thread())
+        return search_entries(*args, **kwargs)
+
+    monkeypatch.setattr(mirror, "search_entries", traced)
+
+    async def main():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                return await http.get(
+                    "/api/journal-entries/search", params={"q": "coffee", "journal_id": journal_id, "page": 2, "limit": 5}
+                )
+        finally:
+            await immich_client.aclose()
+            await journiv_client.aclose()
+
+    response = asyncio.run(main())
+    assert response.status_code == 200
+    body = response.json()
+    _, total = search_entries(journal_id, "coffee")
+    assert len(body["results"]) == 5
+    assert body["pagination"] == {
+        "currentPage": 2,
+        "totalPages": (total + 4) // 5,
+        "totalCount": total,
+        "hasNext": total > 10,
+        "hasPrevious": True,
+        "nextCursor": None,
+    }
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from src.homelab_services.singleflight import SingleFlight
+
+
+def test_singleflight_shares_errors_and_does_not_cache_them():
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream said no")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(5)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(calls) == 1
+        assert flight.coalesced == 4
+
+        with pytest.raises(ValueError):
+            await flight.do("key", failing)
+        assert len(calls) == 2
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_singleflight_leader_cancellation_does_not_fail_followers():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "done"
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import asyncio
+import json
+import os
+
+from src.static_site import build as static_build
+
+
+def manifest(out_dir) -> dict:
+    with open(os.path.join(out_dir, "manifest.json")) as f:
+        return json.load(f)
+
+
+def test_forget_during_a_build_survives_it(tmp_path, dataset, journal_id, monkeypatch):
+    out_dir = str(tmp_path)
+    asyncio.run(static_build.build(out_dir, journal_id, page_size=50))
+    assert len(manifest(out_dir)["entries"]) == len(dataset.entry_list)
+    assert os.path.exists(os.path.join(out_dir, "pages", "1.json"))
+
+    first, second = dataset.entry_list[0]["id"], dataset.entry_list[1]["id"]
+    assert static_build.forget_entries(out_dir, [first]) == 1
+    write_entry_files = static_build.write_entry_files
+    rendered = []
+
+    async def render_then_change(out_dir, journiv, immich, entries, moods):
+        rendered.append([entry.id for entry in entries])
+        await write_entry_files(out_dir, journiv, immich, entries, moods)
+        # A mood changes on another entry while the build is still running
+        static_build.forget_entries(out_dir, [second])
+
+    monkeypatch.setattr(static_build, "write_entry_files", render_then_change)
+    asyncio.run(static_build.build(out_dir, journal_id, page_size=50))
+
+    assert rendered == [[first]]
+    entries = manifest(out_dir)["entries"]
+    assert first in entries
+    assert second not in entries, "the late forget was not overwritten by the build"
+
+    monkeypatch.setattr(static_build, "write_entry_files", write_entry_files)
+    asyncio.run(static_build.build(out_dir, journal_id, page_size=50))
+    assert len(manifest(out_dir)["entries"]) == len(dataset.entry_list)
+    assert manifest(out_dir)["forgotten"] == {}
+
+
+def test_forget_without_a_build_does_nothing(tmp_path):
+    assert static_build.forget_entries(str(tmp_path), ["entry-000001"]) == 0
+    assert not os.path.exists(os.path.join(tmp_path, "manifest.json"))
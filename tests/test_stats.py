@@ -0,0 +1,103 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.analytics.columns import iso
+from src.analytics.dataset import JournalColumns, PhotoWindows, load_columns
+from src.api.endpoints.stats.stats import get_columns
+from src.homelab_services.immich.immich import ImmichClient
+from src.main import app
+
+
+def test_load_columns_from_journiv(run, dataset, journal_id):
+    async def load(client):
+        immich = ImmichClient()
+        try:
+            return await load_columns(journal_id, client, immich)
+        finally:
+            await immich.aclose()
+
+    columns = run(load)
+    assert len(columns.entry_days) == len(dataset.entry_list)
+    assert sum(columns.word_counts) == sum(entry["word_count"] for entry in dataset.entry_list)
+    assert len(columns.mood_days) == len(dataset.mood_logs)
+    assert columns.photos_loaded and len(columns.photo_days) > 0
+
+
+def test_rolling_photos_without_photos_is_a_bad_request():
+    columns = JournalColumns("journal", photos_loaded=False)
+    app.dependency_overrides[get_columns] = lambda: columns
+    try:
+        client = TestClient(app)
+        assert client.get("/api/stats/rolling?metric=photos").status_code == 400
+        assert client.get("/api/stats/rolling?metric=words").json() == []
+    finally:
+        app.dependency_overrides.clear()
+
+
+def load_twice(run, journal_id, between=None, windows=None):
+    windows = windows or PhotoWindows(window_days=31, concurrency=2)
+
+    async def load(client):
+        immich = ImmichClient()
+        try:
+            first = await load_columns(journal_id, client, immich, photo_windows=windows)
+            searched = windows.searches
+            if between is not None:
+                between(windows)
+            second = await load_columns(journal_id, client, immich, photo_windows=windows)
+            return first, second, searched, windows.searches - searched
+        finally:
+            await immich.aclose()
+
+    return run(load)
+
+
+def test_reload_searches_only_changed_photo_windows(run, journal_id):
+    first, unchanged, searched, researched = load_twice(run, journal_id)
+    start = PhotoWindows(window_days=31).window_start(first.first_day - 1)
+    assert searched == -(-(first.last_day + 2 - start) // 31)
+    assert researched == 0 and unchanged.photo_days == first.photo_days
+
+    # A day in the middle of a window only drops that window
+    middle = iso(start + 31 + 15)
+    _, changed, _, researched = load_twice(run, journal_id, lambda windows: windows.invalidate_day(middle))
+    assert researched == 1 and changed.photo_days == first.photo_days
+
+
+def test_photo_window_searches_are_bounded(run, journal_id, monkeypatch):
+    windows = PhotoWindows(window_days=7, concurrency=3)
+    in_flight = peak = 0
+    search = windows._search
+
+    async def counted(*args):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            return await search(*args)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(windows, "_search", counted)
+    first, _, searched, _ = load_twice(run, journal_id, windows=windows)
+    assert searched > 3 and peak == 3
+    assert first.photos_loaded
+
+
+def test_window_invalidated_mid_search_is_searched_again(run, journal_id, monkeypatch):
+    windows = PhotoWindows(window_days=31, concurrency=1)
+    search = windows._search
+    invalidated = []
+
+    async def racing(immich, start, end):
+        result = await search(immich, start, end)
+        if not invalidated:
+            # A change notification arriving while the search was in flight
+            invalidated.append(windows.invalidate_day(iso(start + 15)))
+        return result
+
+    monkeypatch.setattr(windows, "_search", racing)
+    _, _, searched, researched = load_twice(run, journal_id, windows=windows)
+    assert invalidated == [0] and researched == 1
@@ -0,0 +1,78 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from src.api.endpoints.immich import immich as endpoints
+from src.api.endpoints.immich.immich import immich_client
+from src.api.endpoints.journiv.journiv import journiv_client
+from src.homelab_services.immich.thumbnail_cache import ThumbnailCache
+from src.main import app
+
+
+def store(cache: ThumbnailCache, key: str, data: bytes, media_type: str = "image/jpeg") -> None:
+    pending = cache.begin(key)
+    pending.write(data)
+    pending.commit(media_type)
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=250)
+    store(cache, "aa01", b"x" * 100)
+    store(cache, "bb02", b"x" * 100)
+    assert cache.get("aa01") is not None  # bb02 is now the least recently used
+
+    store(cache, "cc03", b"x" * 100)
+    assert cache.get("bb02") is None
+    assert cache.get("aa01") is not None and cache.get("cc03") is not None
+    assert cache.stats()["bytes"] == 200
+    assert sorted(p.name for p in tmp_path.rglob("*") if p.is_file()) == ["aa01", "aa01.type", "cc03", "cc03.type"]
+
+
+def test_replacing_a_key_counts_its_size_once(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=250)
+    for _ in range(5):
+        store(cache, "aa01", b"x" * 100)
+    assert cache.stats()["bytes"] == 100
+    assert cache.get("aa01") is not None
+
+
+def test_aborted_download_leaves_nothing_behind(tmp_path):
+    cache = ThumbnailCache(str(tmp_path))
+    pending = cache.begin("aa01")
+    pending.write(b"partial")
+    pending.abort()
+    assert cache.get("aa01") is None
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+def test_content_type_round_trips(tmp_path):
+    cache = ThumbnailCache(str(tmp_path))
+    store(cache, "aa01", b"RIFF", "image/webp")
+    path, media_type = cache.get("aa01")
+    assert media_type == "image/webp"
+    assert open(path, "rb").read() == b"RIFF"
+
+
+@pytest.mark.parametrize("size, media_type", [("thumbnail", "image/webp"), ("preview", "image/jpeg")])
+def test_hit_serves_the_content_type_of_the_miss(tmp_path, monkeypatch, size, media_type):
+    monkeypatch.setattr(endpoints, "thumbnail_cache", ThumbnailCache(str(tmp_path)))
+    asset_id = str(uuid.uuid4())
+
+    async def main():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                url = f"/api/immich/assets/{asset_id}/thumbnail"
+                miss = await http.get(url, params={"size": size})
+                hit = await http.get(url, params={"size": size})
+                return miss, hit
+        finally:
+            await immich_client.aclose()
+            await journiv_client.aclose()
+
+    miss, hit = asyncio.run(main())
+    assert miss.status_code == hit.status_code == 200
+    assert miss.headers["content-type"] == hit.headers["content-type"] == media_type
+    assert miss.content == hit.content
+    assert endpoints.thumbnail_cache.stats()["hits"] == 1
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+from src.config import Config
+from src.main import app
+from src.tracing import trace_buffer
+
+client = TestClient(app)
+
+
+def test_admin_traces_need_a_configured_token(monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_TOKEN", None)
+    assert client.get("/api/admin/traces").status_code == 404
+
+    monkeypatch.setattr(Config, "ADMIN_TOKEN", "secret")
+    assert client.get("/api/admin/traces").status_code == 401
+    assert client.get("/api/admin/traces", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/api/admin/traces", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+def test_forced_trace_needs_the_token(monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_TOKEN", "secret")
+    trace_buffer.clear()
+
+    anonymous = client.get("/api/immich/cache/stats?trace=1", headers={"X-Trace": "1"})
+    assert "x-trace-id" not in anonymous.headers
+    assert trace_buffer.list() == []
+
+    admin = client.get("/api/immich/cache/stats", headers={"X-Trace": "1", "Authorization": "Bearer secret"})
+    trace_id = admin.headers["x-trace-id"]
+    trace = client.get(f"/api/admin/traces/{trace_id}", headers={"Authorization": "Bearer secret"})
+    assert trace.status_code == 200 and trace.json()["traceEvents"]